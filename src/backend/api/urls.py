@@ -1,6 +1,8 @@
 from django.urls import path, include
+from . import views
 
 urlpatterns = [
     path('auth/', include('users.urls')),
+    path('system/db-pool/', views.db_pool_view, name='db-pool'),
     path('', include('material_site.urls')),
 ]
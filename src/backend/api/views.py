@@ -0,0 +1,26 @@
+"""
+系统运维接口
+"""
+
+import os
+
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from backend.db import all_pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_pool_view(request: Request) -> Response:
+    """
+    数据库连接池指标（仅管理员）
+
+    指标属于处理本次请求的进程，多 worker 部署时每个进程各有一个连接池。
+
+    Returns:
+        Response: 进程号和各数据库别名的连接池指标
+    """
+    return Response({'pid': os.getpid(), 'databases': all_pool_stats()})
@@ -0,0 +1,46 @@
+"""
+缓存工具
+跨进程同步状态（版本号、失效标记、草图）的模块需要共享缓存；
+进程内缓存（LocMemCache）和空缓存中的数据其他进程不可见
+"""
+
+import logging
+from typing import Set, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+# 已提示过的（功能, 缓存别名），每个进程只记录一次
+_warned: Set[Tuple[str, str]] = set()
+
+
+def is_shared_cache(alias: str) -> bool:
+    """缓存别名是否跨进程共享"""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def require_shared_cache(alias: str, feature: str) -> bool:
+    """
+    检查功能使用的缓存是否跨进程共享，不共享时记录一次警告
+
+    Args:
+        alias: 缓存别名
+        feature: 功能名称（写入日志）
+
+    Returns:
+        bool: 是否为共享缓存
+    """
+    if is_shared_cache(alias):
+        return True
+    if (feature, alias) not in _warned:
+        _warned.add((feature, alias))
+        logger.warning(
+            f"{feature} requires a cache shared by all processes, but '{alias}' is "
+            f"{type(caches[alias]).__name__}; falling back"
+        )
+    return False
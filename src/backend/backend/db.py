@@ -0,0 +1,154 @@
+"""
+数据库连接配置模块
+从 DATABASE_URL 解析连接参数，PostgreSQL 可启用 psycopg 连接池（Django 5.1+），
+其他情况使用带健康检查的持久连接；并提供各连接别名的连接池指标
+"""
+
+import logging
+from importlib.util import find_spec
+from typing import Optional
+
+import dj_database_url
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CONN_MAX_AGE': 600,        # 未启用连接池时持久连接的保留时间（秒）
+    'HEALTH_CHECKS': True,      # 复用连接前检查连接是否可用
+    'POOL': {
+        'min_size': 2,          # 每个进程保持的最少连接数
+        'max_size': 10,         # 每个进程最多连接数，超出时请求排队等待
+        'timeout': 10,          # 等待可用连接的最长时间（秒），超时抛出 PoolTimeout
+        'max_idle': 600,        # 超过 min_size 的空闲连接在该时间后关闭（秒）
+        'max_lifetime': 3600,   # 连接最长使用时间（秒），到期后替换
+    },
+}
+
+# DATABASE_URL 中的连接池参数，例如 postgres://...?pool=true&pool_max_size=20
+POOL_PARAMS = {
+    'pool_min_size': 'min_size',
+    'pool_max_size': 'max_size',
+    'pool_timeout': 'timeout',
+    'pool_max_idle': 'max_idle',
+    'pool_max_lifetime': 'max_lifetime',
+}
+
+# 取值可为小数（秒）的连接池参数
+POOL_FLOAT_PARAMS = {'timeout', 'max_idle', 'max_lifetime'}
+
+POSTGRESQL_ENGINE = 'django.db.backends.postgresql'
+
+
+def has_psycopg_pool() -> bool:
+    """是否安装了 psycopg 3 和 psycopg_pool"""
+    return find_spec('psycopg') is not None and find_spec('psycopg_pool') is not None
+
+
+def database_config(url: str) -> dict:
+    """
+    把 DATABASE_URL 解析为 Django 数据库配置
+
+    除数据库驱动参数外，URL 查询参数还支持：
+    - pool=true：启用 psycopg 连接池（仅 PostgreSQL，需要 psycopg[pool]），
+      pool_min_size / pool_max_size / pool_timeout / pool_max_idle / pool_max_lifetime 调整连接池
+    - conn_max_age=秒：未启用连接池时持久连接的保留时间（默认600）
+    - health_checks=false：关闭复用前的连接检查
+
+    Args:
+        url: 数据库URL
+
+    Returns:
+        dict: DATABASES 中单个别名的配置
+    """
+    config = dj_database_url.parse(url)
+    options = config.setdefault('OPTIONS', {})
+    use_pool = options.pop('pool', False)
+    health_checks = bool(options.pop('health_checks', DEFAULTS['HEALTH_CHECKS']))
+    conn_max_age = options.pop('conn_max_age', DEFAULTS['CONN_MAX_AGE'])
+    # dj_database_url 只把整数和布尔值转换类型，小数仍是字符串
+    pool_options = {
+        target: float(options.pop(name)) if target in POOL_FLOAT_PARAMS else int(options.pop(name))
+        for name, target in POOL_PARAMS.items() if name in options
+    }
+
+    config['CONN_HEALTH_CHECKS'] = health_checks
+    if use_pool and config['ENGINE'] == POSTGRESQL_ENGINE:
+        if has_psycopg_pool():
+            from psycopg_pool import ConnectionPool
+
+            pool = {**DEFAULTS['POOL'], **pool_options}
+            if health_checks:
+                # 借出连接前执行检查，失效连接会被丢弃并重新获取
+                pool['check'] = ConnectionPool.check_connection
+            options['pool'] = pool
+            # 连接池自行管理连接生命周期，Django 要求持久连接关闭
+            config['CONN_MAX_AGE'] = 0
+            return config
+        logger.warning("Database pool requested but psycopg[pool] is not installed; using persistent connections")
+
+    config['CONN_MAX_AGE'] = None if conn_max_age is None else int(conn_max_age)
+    return config
+
+
+def pool_stats(alias: str = 'default') -> dict:
+    """
+    连接别名的连接池指标（当前进程）
+
+    Returns:
+        dict: 未启用连接池时只包含连接模式；启用时包含连接数、等待次数和等待时间等
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'pooled': False,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+    }
+    pool = _get_pool(connection)
+    if pool is None:
+        return stats
+
+    raw = pool.get_stats()
+    size = raw.get('pool_size', 0)
+    available = raw.get('pool_available', 0)
+    requests = raw.get('requests_num', 0)
+    wait_ms = raw.get('requests_wait_ms', 0)
+    stats.update({
+        'pooled': True,
+        'min_size': pool.min_size,
+        'max_size': pool.max_size,
+        'size': size,
+        'available': available,
+        'in_use': size - available,
+        'overflow': max(size - pool.min_size, 0),
+        'waiting': raw.get('requests_waiting', 0),
+        'requests': requests,
+        'queued': raw.get('requests_queued', 0),
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg': round(wait_ms / requests, 2) if requests else 0.0,
+        'timeouts': raw.get('requests_errors', 0),
+        'connections_opened': raw.get('connections_num', 0),
+        'connection_errors': raw.get('connections_errors', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+        'bad_returns': raw.get('returns_bad', 0),
+    })
+    return stats
+
+
+def _get_pool(connection) -> Optional[object]:
+    """PostgreSQL 后端的 psycopg 连接池（未启用时为 None）"""
+    if connection.vendor != 'postgresql' or not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+        return None
+    try:
+        return connection.pool
+    except Exception as e:
+        logger.error(f"Failed to get database pool for {connection.alias}: {str(e)}")
+        return None
+
+
+def all_pool_stats() -> list:
+    """所有数据库别名的连接池指标"""
+    return [pool_stats(alias) for alias in connections]
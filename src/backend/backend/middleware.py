@@ -1,6 +1,7 @@
 """
 Django中间件模块
-包含日志记录、错误处理和CORS相关中间件
+包含日志记录、错误处理和CORS相关中间件。
+所有中间件同时支持同步和异步调用，ASGI 部署下请求不会因中间件切换到线程池
 """
 
 import logging
@@ -8,27 +9,74 @@ import time
 import json
 import traceback
 from typing import Dict, Any, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
 from rest_framework import status
 from rest_framework.response import Response
 
 logger = logging.getLogger(__name__)
 
 
-class LoggingMiddleware:
+class HybridMiddleware:
     """
-    日志记录中间件
-    功能：记录所有API请求的详细信息，便于调试和监控
+    同步/异步双模式中间件基类
+    get_response 为协程函数时（ASGI 下的异步视图链）__call__ 转交 __acall__
 
     Attributes:
         get_response: Django请求处理函数
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request)
+
+    def process(self, request: HttpRequest) -> HttpResponse:
+        raise NotImplementedError
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        raise NotImplementedError
+
+
+class StaticFilesMiddleware(HybridMiddleware, WhiteNoiseMiddleware):
+    """
+    WhiteNoise 静态文件中间件的异步兼容版本
+    静态文件命中时直接返回文件响应，其余请求原样交给后续处理
+    """
+
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        HybridMiddleware.__init__(self, get_response)
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
+    def process(self, request: HttpRequest) -> HttpResponse:
+        return WhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class LoggingMiddleware(HybridMiddleware):
+    """
+    日志记录中间件
+    功能：记录所有API请求的详细信息，便于调试和监控
+    """
+
+    def process(self, request: HttpRequest) -> HttpResponse:
         """处理请求并记录日志"""
         start_time = time.time()
 
@@ -49,14 +97,29 @@ class LoggingMiddleware:
             self.log_exception(request, e, start_time)
             raise
 
-    def log_request(self, request: HttpRequest) -> None:
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """异步处理请求并记录日志（通过 auser() 获取用户，不阻塞事件循环）"""
+        start_time = time.time()
+
+        try:
+            self.log_request(request, await request.auser())
+            response = await self.get_response(request)
+            self.log_response(request, response, start_time)
+            return response
+
+        except Exception as e:
+            self.log_exception(request, e, start_time)
+            raise
+
+    def log_request(self, request: HttpRequest, user=None) -> None:
         """记录请求信息"""
+        user = request.user if user is None else user
         log_data = {
             'type': 'request',
             'method': request.method,
             'path': request.path,
             'ip': self.get_client_ip(request),
-            'user': str(request.user) if request.user.is_authenticated else 'anonymous',
+            'user': str(user) if user.is_authenticated else 'anonymous',
             'user_agent': request.META.get('HTTP_USER_AGENT', '')[:200],
         }
 
@@ -123,22 +186,25 @@ class LoggingMiddleware:
         return ip
 
 
-class ErrorHandlingMiddleware:
+class ErrorHandlingMiddleware(HybridMiddleware):
     """
     错误处理中间件
     功能：统一处理API异常，返回标准化的错误响应
     """
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request: HttpRequest) -> HttpResponse:
+    def process(self, request: HttpRequest) -> HttpResponse:
         try:
             response = self.get_response(request)
             return response
         except Exception as e:
             return self.handle_exception(request, e)
 
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        try:
+            return await self.get_response(request)
+        except Exception as e:
+            return self.handle_exception(request, e)
+
     def handle_exception(self, request: HttpRequest, exception: Exception) -> JsonResponse:
         """处理异常并返回标准化错误响应"""
 
@@ -174,17 +240,21 @@ class ErrorHandlingMiddleware:
         return JsonResponse(error_data, status=status_code)
 
 
-class RequestValidationMiddleware:
+class RequestValidationMiddleware(HybridMiddleware):
     """
     请求验证中间件
     功能：验证请求的Content-Type和基本格式
     """
 
-    def __init__(self, get_response):
-        self.get_response = get_response
+    def process(self, request: HttpRequest) -> HttpResponse:
+        return self.validate(request) or self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        return self.validate(request) or await self.get_response(request)
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
-        # 验证JSON请求的Content-Type
+    @staticmethod
+    def validate(request: HttpRequest) -> Optional[JsonResponse]:
+        """验证JSON请求体，格式错误时返回错误响应"""
         if request.method in ['POST', 'PUT', 'PATCH']:
             content_type = request.content_type
             if 'application/json' in content_type and request.body:
@@ -196,5 +266,4 @@ class RequestValidationMiddleware:
                         'message': 'Invalid JSON format in request body',
                         'code': 'invalid_json',
                     }, status=status.HTTP_400_BAD_REQUEST)
-
-        return self.get_response(request)
\ No newline at end of file
+        return None
\ No newline at end of file
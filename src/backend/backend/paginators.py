@@ -0,0 +1,78 @@
+"""
+分页器模块
+大表的后台列表使用数据库统计信息中的估算行数，避免每次翻页都执行精确 COUNT(*)
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ESTIMATED_COUNTS': True,       # 是否启用估算行数
+    'ESTIMATE_THRESHOLD': 100000,   # 估算行数低于该值时仍执行精确计数
+}
+
+
+def get_config() -> dict:
+    """读取 settings.ADMIN_PERFORMANCE 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'ADMIN_PERFORMANCE', {})}
+
+
+def estimated_count(queryset: QuerySet) -> Optional[int]:
+    """
+    未筛选查询集的估算行数
+
+    PostgreSQL 读取 pg_class.reltuples（由 VACUUM/ANALYZE 维护）；
+    带筛选条件、去重或其他数据库时无法估算。
+
+    Args:
+        queryset: 查询集
+
+    Returns:
+        Optional[int]: 估算行数，无法估算时为 None
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.is_sliced or query.combinator:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [connection.ops.quote_name(queryset.model._meta.db_table)]
+            )
+            row = cursor.fetchone()
+    except DatabaseError as e:
+        logger.error(f"Failed to estimate row count for {queryset.model._meta.db_table}: {str(e)}")
+        return None
+    # 从未 ANALYZE 的表为 -1（PostgreSQL 14+）或 0
+    if row is None or row[0] is None or row[0] <= 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    估算总数的分页器
+
+    未筛选的大表使用估算行数，其余情况与 Paginator 相同。
+    估算值可能与实际行数略有出入，最后一页可能为空或不完整。
+    """
+
+    @cached_property
+    def count(self) -> int:
+        config = get_config()
+        if config['ESTIMATED_COUNTS'] and isinstance(self.object_list, QuerySet):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= config['ESTIMATE_THRESHOLD']:
+                return estimate
+        return super().count
@@ -0,0 +1,108 @@
+"""
+高性能渲染器与解析器
+基于 orjson 的 JSON 渲染/解析，以及通过 Accept 头选择的 MessagePack 渲染/解析。
+orjson / msgpack 为可选依赖，未安装时 settings 不会注册对应的类
+"""
+
+from django.core.files import File
+from django.db.models.fields.files import FieldFile
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    orjson / msgpack 无法直接编码的对象
+
+    文件字段输出 URL（空文件为 None），其余类型（Decimal、日期时间、UUID、
+    惰性翻译字符串、QuerySet 等）与 DRF JSONEncoder 的结果一致，
+    保证切换渲染器后响应内容不变。
+    """
+    if isinstance(obj, FieldFile):
+        return obj.url if obj else None
+    if isinstance(obj, File):
+        return obj.name
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    基于 orjson 的 JSON 渲染器
+
+    字符串、整数、布尔值、Decimal 和日期时间的输出与 DRF JSONRenderer
+    （紧凑格式、不转义非 ASCII 字符）逐字节一致，日期时间交给 encode_default 处理以保持 DRF 的格式（UTC 写作 Z）。
+    以下情况与 DRF 不同：
+    - 浮点数使用 orjson 的最短表示，数值相同但写法可能不同（1e-05 写作 0.00001，1e+20 写作 1e20）
+    - NaN / Infinity 输出为 null，DRF 会抛出 ValueError
+
+    超出 64 位的整数等 orjson 无法编码的数据，以及请求了 indent 参数
+    或关闭了 UNICODE_JSON / COMPACT_JSON 时，退回到标准库 json。
+    """
+
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(data, default=encode_default, option=self.OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # 与 DRF 一致：转义 JavaScript 中不合法的行分隔符
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class ORJSONParser(BaseParser):
+    """基于 orjson 的 JSON 解析器"""
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """MessagePack 渲染器，客户端通过 Accept: application/msgpack 选择"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    """MessagePack 解析器"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
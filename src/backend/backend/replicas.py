@@ -0,0 +1,210 @@
+"""
+只读副本路由模块
+素材、分类、标签视图集的安全请求（GET/HEAD/OPTIONS）把读取查询发往只读副本；
+用户写入后的短时间内通过 Cookie（及按用户的缓存标记）固定到主库，保证读到自己的写入；
+副本出错时标记为不可用并在主库上重试
+"""
+
+import logging
+import random
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.http import HttpRequest, HttpResponse
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+
+from backend.middleware import HybridMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'REPLICAS': [],             # 只读副本的数据库别名
+    'PIN_SECONDS': 15,          # 写入后固定到主库的时长，应大于副本的复制延迟
+    'COOKIE_NAME': 'db_pin',    # 记录固定截止时间的 Cookie
+    'CACHE_ALIAS': 'default',   # 按用户记录固定标记的缓存（令牌客户端不一定携带 Cookie）
+    'FAILURE_COOLDOWN': 30,     # 副本出错后暂停使用的时间（秒）
+}
+
+# 当前请求使用的副本别名；ASGI 下随 sync_to_async 传递到执行查询的线程
+_replica: ContextVar[Optional[str]] = ContextVar('db_replica', default=None)
+
+# 出错副本的恢复时间（进程内）
+_failed_until: Dict[str, float] = {}
+
+
+def get_config() -> dict:
+    """读取 settings.DATABASE_REPLICATION 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_REPLICATION', {})}
+
+
+def pin_cache_key(user_id: int) -> str:
+    return f'db_pin:user:{user_id}'
+
+
+class ReplicaRouter:
+    """
+    数据库路由
+    请求上下文选择了副本时读取发往该副本，写入和其余读取使用主库
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        return _replica.get()
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # 副本与主库数据相同，跨别名的关联视为同一数据库
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        return None
+
+
+# ========== 副本选择 ==========
+
+def healthy_replicas() -> List[str]:
+    """当前可用的副本"""
+    now = time.monotonic()
+    return [alias for alias in get_config()['REPLICAS'] if _failed_until.get(alias, 0) <= now]
+
+
+def mark_failed(alias: str) -> None:
+    """副本出错，冷却期内不再使用"""
+    _failed_until[alias] = time.monotonic() + get_config()['FAILURE_COOLDOWN']
+    logger.warning(f"Replica {alias} failed, using primary for {get_config()['FAILURE_COOLDOWN']}s")
+
+
+def current_replica() -> Optional[str]:
+    """当前上下文使用的副本（None 表示主库）"""
+    return _replica.get()
+
+
+def use_replica(alias: Optional[str]) -> Token:
+    """切换当前上下文的读取库，返回用于 reset_replica 的令牌"""
+    return _replica.set(alias)
+
+
+def reset_replica(token: Optional[Token]) -> None:
+    if token is not None:
+        _replica.reset(token)
+
+
+def fail_over(exc: Exception) -> bool:
+    """
+    副本上的查询出错时标记该副本并切换到主库
+
+    Returns:
+        bool: 是否应在主库上重试
+    """
+    alias = current_replica()
+    if alias is None or not isinstance(exc, DatabaseError):
+        return False
+    logger.error(f"Replica {alias} query failed: {str(exc)}")
+    mark_failed(alias)
+    use_replica(None)
+    return True
+
+
+def is_pinned(request) -> bool:
+    """请求方最近是否写入过（Cookie 未过期或用户有固定标记）"""
+    config = get_config()
+    try:
+        if float(request.COOKIES.get(config['COOKIE_NAME'], 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user = getattr(request, 'user', None)
+    if user is not None and not isinstance(user, SimpleLazyObject) and user.is_authenticated:
+        return bool(caches[config['CACHE_ALIAS']].get(pin_cache_key(user.pk)))
+    return False
+
+
+def activate(request) -> Optional[Token]:
+    """
+    为安全请求选择副本
+
+    Args:
+        request: DRF 请求（已完成认证）
+
+    Returns:
+        Optional[Token]: 选中副本时返回令牌，请求结束时传给 reset_replica
+    """
+    if request.method not in SAFE_METHODS or is_pinned(request):
+        return None
+    replicas = healthy_replicas()
+    if not replicas:
+        return None
+    return use_replica(random.choice(replicas))
+
+
+def pin(request: HttpRequest, response: HttpResponse) -> None:
+    """写入成功后把请求方固定到主库"""
+    config = get_config()
+    seconds = config['PIN_SECONDS']
+    response.set_cookie(
+        config['COOKIE_NAME'], f'{time.time() + seconds:.0f}', max_age=seconds, httponly=True, samesite='Lax'
+    )
+    user = getattr(request, 'user', None)
+    # 会话中尚未求值的用户不在此处查询，只依赖 Cookie
+    if user is not None and not isinstance(user, SimpleLazyObject) and user.is_authenticated:
+        caches[config['CACHE_ALIAS']].set(pin_cache_key(user.pk), 1, seconds)
+
+
+class PrimaryPinMiddleware(HybridMiddleware):
+    """
+    写后固定中间件
+    非安全方法的请求成功后设置固定 Cookie，之后的读取在 PIN_SECONDS 内使用主库
+    """
+
+    def process(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        self.pin_after_write(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.get_response(request)
+        self.pin_after_write(request, response)
+        return response
+
+    @staticmethod
+    def pin_after_write(request: HttpRequest, response: HttpResponse) -> None:
+        if not get_config()['REPLICAS'] or request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        pin(request, response)
+
+
+class ReplicaReadMixin:
+    """
+    视图集混入：安全请求的读取查询使用只读副本
+
+    认证和权限检查之后才选择副本（认证查询走主库），dispatch 结束时无论成功与否都恢复，
+    未处理的异常不会把副本留在线程的上下文中；
+    处理过程中副本抛出数据库错误时标记该副本并在主库上重新执行一次。
+    """
+    _replica_token: Optional[Token] = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            reset_replica(self._replica_token)
+            self._replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = activate(request)
+
+    def handle_exception(self, exc):
+        if not fail_over(exc):
+            return super().handle_exception(exc)
+        try:
+            handler = getattr(self, self.request.method.lower(), self.http_method_not_allowed)
+            return handler(self.request, *self.args, **self.kwargs)
+        except Exception as retry_exc:
+            return super().handle_exception(retry_exc)
@@ -0,0 +1,143 @@
+"""
+令牌桶限流模块
+按视图动作（basename.action，如 material.download）配置每用户、每 IP 的令牌桶，
+桶状态保存在缓存中（多进程部署时缓存需在进程间共享，如 Redis、Memcached 或文件缓存），
+每次检查只读写一个缓存键，不访问数据库；超限时返回 429 和 Retry-After
+"""
+
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'throttle:',
+    # {'material.download': {'user': '60/min', 'ip': '120/min'}}，
+    # 速率 N/period 表示桶容量 N（允许的突发量），每 period/N 秒补充一个令牌
+    'RATES': {},
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_config() -> dict:
+    """读取 settings.THROTTLING 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'THROTTLING', {})}
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """
+    解析速率字符串
+
+    Args:
+        rate: 如 '30/min'、'5/s'、'1000/day'
+
+    Returns:
+        Tuple[int, float]: (桶容量, 补充一个令牌的间隔秒数)
+    """
+    count, period = rate.split('/')
+    capacity = int(count)
+    if capacity < 1:
+        raise ValueError(f"Invalid throttle rate: {rate}")
+    return capacity, PERIODS[period[0]] / capacity
+
+
+class TokenBucket:
+    """
+    缓存中的令牌桶
+
+    以 GCRA 形式保存：只记录桶被填满的时间点（理论到达时间 TAT），
+    剩余令牌数 = (now + 容量 × 间隔 - TAT) / 间隔，单个数值即可描述桶状态。
+    读-算-写之间没有加锁，并发请求可能多放行个别请求，不会少放行。
+    """
+
+    def __init__(self, cache, key: str, capacity: int, interval: float):
+        self.cache = cache
+        self.key = key
+        self.capacity = capacity
+        self.interval = interval
+
+    def consume(self, now: float, tokens: int = 1) -> float:
+        """
+        取出令牌
+
+        Returns:
+            float: 0 表示放行；否则为需要等待的秒数
+        """
+        tat = max(self.cache.get(self.key) or 0.0, now)
+        new_tat = tat + self.interval * tokens
+        window = self.interval * self.capacity
+        if new_tat - now > window:
+            return new_tat - now - window
+        # 桶重新填满后状态即可丢弃
+        self.cache.set(self.key, new_tat, max(int(new_tat - now) + 1, 1))
+        return 0.0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    按动作配置的令牌桶限流
+
+    视图可用 throttle_scope 指定配置名，默认为 "basename.action"；
+    没有配置的动作不访问缓存。已登录用户同时检查 user 桶和 ip 桶，匿名用户只检查 ip 桶。
+    """
+
+    def __init__(self):
+        self.wait_seconds: Optional[float] = None
+
+    @staticmethod
+    def get_scope(view) -> Optional[str]:
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        basename, action = getattr(view, 'basename', None), getattr(view, 'action', None)
+        if basename and action:
+            return f'{basename}.{action}'
+        return None
+
+    def get_buckets(self, request, scope: str, rates: Dict[str, str]) -> list:
+        config = get_config()
+        cache = caches[config['CACHE_ALIAS']]
+        idents = []
+        if 'ip' in rates:
+            idents.append(('ip', rates['ip'], self.get_ident(request)))
+        if 'user' in rates and request.user and request.user.is_authenticated:
+            idents.append(('user', rates['user'], request.user.pk))
+        buckets = []
+        for kind, rate, ident in idents:
+            capacity, interval = parse_rate(rate)
+            key = f"{config['KEY_PREFIX']}{scope}:{kind}:{ident}"
+            buckets.append(TokenBucket(cache, key, capacity, interval))
+        return buckets
+
+    def allow_request(self, request, view) -> bool:
+        config = get_config()
+        if not config['ENABLED']:
+            return True
+        scope = self.get_scope(view)
+        rates = config['RATES'].get(scope) if scope else None
+        if not rates:
+            return True
+
+        now = time.time()
+        try:
+            for bucket in self.get_buckets(request, scope, rates):
+                wait = bucket.consume(now)
+                if wait:
+                    self.wait_seconds = wait
+                    logger.warning(f"Throttled {scope} for {bucket.key}, retry after {wait:.1f}s")
+                    return False
+        except Exception as e:
+            # 缓存不可用时放行，不影响正常请求
+            logger.error(f"Throttle check failed for {scope}: {str(e)}")
+        return True
+
+    def wait(self) -> Optional[float]:
+        return self.wait_seconds
@@ -1,6 +1,5 @@
 import os
 import django
-from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 
@@ -9,6 +8,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
 from material_site.models import Category, Tag, Material
+from material_site.counters import reconcile_user_counters
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
 
@@ -311,12 +311,7 @@ def create_sample_materials():
 
 def update_user_stats():
     """更新用户统计数据"""
-    for user in User.objects.all():
-        user.materials_count = user.materials.filter(status='approved').count()
-        user.downloads_count = user.materials.aggregate(
-            total_downloads=models.Sum('download_count')
-        )['total_downloads'] or 0
-        user.save()
+    reconcile_user_counters()
     print("✅ 用户统计数据更新完成")
 
 
@@ -0,0 +1,23 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from backend.paginators import EstimatedCountPaginator
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'queue', 'priority', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue']
+    search_fields = ['name']
+    readonly_fields = ['locked_by', 'locked_until', 'created_at', 'finished_at', 'last_error']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['retry_jobs']
+
+    @admin.action(description='重新执行所选任务', permissions=['change'])
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='pending', attempts=0, run_at=timezone.now(), finished_at=None, last_error=''
+        )
+        self.message_user(request, f'已重新入队 {updated} 个任务', messages.SUCCESS)
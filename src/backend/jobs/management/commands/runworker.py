@@ -0,0 +1,65 @@
+"""
+后台任务执行命令
+启动一个或多个 worker 进程，每个进程在线程池中执行任务；收到 SIGTERM/SIGINT 后执行完进行中的任务再退出
+
+示例：
+    python manage.py runworker --concurrency 8
+    python manage.py runworker --processes 4 --queue default --queue exports
+    python manage.py runworker --burst      # 处理完当前到期任务后退出（适合 cron）
+"""
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.worker import Worker
+
+
+def run_worker(options: dict) -> None:
+    """子进程入口"""
+    Worker(
+        queues=options['queues'], concurrency=options['concurrency'], poll_interval=options['poll_interval']
+    ).run(burst=options['burst'])
+
+
+class Command(BaseCommand):
+    help = '执行数据库队列中的后台任务（多个进程或多台主机可同时运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', help='处理的队列，可重复指定；默认 JOBS["QUEUES"]')
+        parser.add_argument('--concurrency', type=int, help='每个进程的执行线程数；默认 JOBS["CONCURRENCY"]')
+        parser.add_argument('--processes', type=int, default=1, help='worker 进程数')
+        parser.add_argument('--poll-interval', type=float, help='队列为空时的轮询间隔（秒）')
+        parser.add_argument('--burst', action='store_true', help='没有到期任务时退出')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or (options['concurrency'] is not None and options['concurrency'] < 1):
+            raise CommandError('--processes 和 --concurrency 必须大于 0')
+
+        if options['processes'] == 1:
+            processed = Worker(
+                queues=options['queues'], concurrency=options['concurrency'], poll_interval=options['poll_interval']
+            ).run(burst=options['burst'])
+            self.stdout.write(self.style.SUCCESS(f'worker 已退出，处理任务 {processed} 个'))
+            return
+
+        # 子进程不能继承父进程的数据库连接
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=run_worker, args=(options,), daemon=False)
+                     for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C 由子进程各自处理
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS(f"{options['processes']} 个 worker 进程已退出"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='任务名')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='位置参数')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='关键字参数')),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='队列')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='优先级')),
+                ('status', models.CharField(choices=[('pending', '等待执行'), ('running', '执行中'), ('succeeded', '已完成'), ('failed', '已失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='已执行次数')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='最多执行次数')),
+                ('last_error', models.TextField(blank=True, verbose_name='最近错误')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='计划执行时间')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='执行进程')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='租约到期时间')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '后台任务',
+                'verbose_name_plural': '后台任务',
+                'db_table': 'jobs',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['queue', '-priority', 'run_at'], name='job_pending_idx'), models.Index(condition=models.Q(('status', 'running')), fields=['locked_until'], name='job_running_idx'), models.Index(fields=['status', 'finished_at'], name='jobs_status_007bc0_idx')],
+            },
+        ),
+    ]
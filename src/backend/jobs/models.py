@@ -0,0 +1,48 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """后台任务"""
+
+    STATUS_CHOICES = (
+        ('pending', '等待执行'),
+        ('running', '执行中'),
+        ('succeeded', '已完成'),
+        ('failed', '已失败'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='任务名')
+    args = models.JSONField(default=list, blank=True, verbose_name='位置参数')
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name='关键字参数')
+    queue = models.CharField(max_length=50, default='default', verbose_name='队列')
+    priority = models.SmallIntegerField(default=0, verbose_name='优先级')  # 越大越先执行
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='已执行次数')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='最多执行次数')
+    last_error = models.TextField(blank=True, verbose_name='最近错误')
+
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='计划执行时间')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='执行进程')
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='租约到期时间')
+
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = '后台任务'
+        verbose_name_plural = verbose_name
+        indexes = [
+            # worker 领取：按队列取到期的等待任务，优先级高、计划时间早的在前
+            models.Index(fields=['queue', '-priority', 'run_at'], condition=Q(status='pending'),
+                         name='job_pending_idx'),
+            # 回收执行进程退出后租约过期的任务
+            models.Index(fields=['locked_until'], condition=Q(status='running'), name='job_running_idx'),
+            models.Index(fields=['status', 'finished_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name}#{self.pk}'
@@ -0,0 +1,141 @@
+"""
+后台任务队列
+任务保存在数据库的 jobs 表中，由 runworker 命令领取执行，不需要外部消息中间件。
+
+入队只是在当前事务中插入一行：调用方的事务提交后任务才对 worker 可见，
+事务回滚时任务一起撤销，因此在视图和信号中入队与 transaction.on_commit 的效果一致，
+且进程在提交后崩溃也不会丢失任务。
+
+用法：
+    # material_site/tasks.py（应用启动时自动加载各应用的 tasks 模块）
+    @task(priority=5, max_attempts=5)
+    def refresh_file_size(material_id): ...
+
+    refresh_file_size.delay(material.pk)
+    refresh_file_size.schedule(args=[material.pk], delay=60)
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'QUEUES': ['default'],          # runworker 默认处理的队列
+    'CONCURRENCY': 4,               # 每个 worker 进程的执行线程数
+    'POLL_INTERVAL': 1.0,           # 队列为空时的轮询间隔（秒）
+    'LEASE_SECONDS': 300,           # 领取租约，执行中定期续期；进程退出后到期的任务重新入队
+    'RETRY_DELAY': 10,              # 首次重试的延迟（秒），之后每次翻倍
+    'KEEP_SUCCEEDED': 7 * 86400,    # 已完成任务的保留时间（秒），失败任务保留供排查
+}
+
+_registry: Dict[str, 'Task'] = {}
+
+
+def get_config() -> dict:
+    """读取 settings.JOBS 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+class Task:
+    """
+    已注册的任务
+
+    Attributes:
+        func: 任务函数，参数需可 JSON 序列化
+        name: 任务名（默认 模块.函数名）
+        queue: 默认队列
+        priority: 默认优先级，越大越先执行
+        max_attempts: 最多执行次数（含首次）
+        retry_delay: 首次重试延迟（秒），None 使用 RETRY_DELAY
+    """
+
+    def __init__(self, func: Callable, name: str, queue: str, priority: int, max_attempts: int,
+                 retry_delay: Optional[float]):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def get_retry_delay(self, attempts: int) -> timedelta:
+        """第 attempts 次执行失败后的重试延迟（指数退避）"""
+        base = get_config()['RETRY_DELAY'] if self.retry_delay is None else self.retry_delay
+        return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+    def delay(self, *args, **kwargs) -> Job:
+        """立即入队"""
+        return enqueue(self.name, args, kwargs)
+
+    def schedule(self, args: Iterable = (), kwargs: Optional[dict] = None, *, run_at: Optional[datetime] = None,
+                 delay: Optional[float] = None, priority: Optional[int] = None,
+                 queue: Optional[str] = None) -> Job:
+        """按指定时间、延迟、优先级或队列入队"""
+        return enqueue(self.name, args, kwargs, run_at=run_at, delay=delay, priority=priority, queue=queue)
+
+
+def task(func: Optional[Callable] = None, *, name: Optional[str] = None, queue: str = 'default',
+         priority: int = 0, max_attempts: int = 3, retry_delay: Optional[float] = None):
+    """
+    注册后台任务（可带参数使用：@task 或 @task(priority=5)）
+
+    Returns:
+        Task: 可直接调用，也可通过 delay() / schedule() 入队
+    """
+    def register(function: Callable) -> Task:
+        task_name = name or f'{function.__module__}.{function.__qualname__}'
+        registered = Task(function, task_name, queue, priority, max_attempts, retry_delay)
+        _registry[task_name] = registered
+        return registered
+
+    return register(func) if func is not None else register
+
+
+def get_task(name: str) -> Optional[Task]:
+    return _registry.get(name)
+
+
+def enqueue(name: str, args: Iterable = (), kwargs: Optional[dict] = None, *, run_at: Optional[datetime] = None,
+            delay: Optional[float] = None, priority: Optional[int] = None, queue: Optional[str] = None) -> Job:
+    """
+    把任务写入队列（在调用方的当前事务中）
+
+    Args:
+        name: 任务名
+        args: 位置参数
+        kwargs: 关键字参数
+        run_at: 计划执行时间
+        delay: 延迟执行的秒数（与 run_at 同时给出时取 run_at）
+        priority: 优先级，默认取任务注册时的设置
+        queue: 队列，默认取任务注册时的设置
+
+    Returns:
+        Job: 新建的任务行
+
+    Raises:
+        LookupError: 任务未注册
+    """
+    registered = get_task(name)
+    if registered is None:
+        raise LookupError(f"Unknown job task: {name}")
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        queue=queue or registered.queue,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts,
+        run_at=run_at,
+    )
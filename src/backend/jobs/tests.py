@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import enqueue, task
+from .worker import Worker
+
+calls = []
+
+
+@task
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@task(priority=5)
+def urgent(value):
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=30)
+def flaky():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    """数据库任务队列"""
+
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(concurrency=2)
+
+    def _drain(self):
+        jobs = self.worker.claim(10)
+        for job in jobs:
+            self.worker.execute(job)
+        return jobs
+
+    def test_priority_and_schedule(self):
+        record.delay('a', suffix='!')
+        urgent.delay('b')
+        record.schedule(args=['later'], delay=60)
+        self.assertEqual([job.name for job in self._drain()], [urgent.name, record.name])
+        self.assertEqual(calls, ['b', 'a!'])
+        self.assertEqual(Job.objects.filter(status='succeeded').count(), 2)
+
+        Job.objects.filter(status='pending').update(run_at=timezone.now())
+        self._drain()
+        self.assertEqual(calls[-1], 'later')
+
+    def test_enqueue_rolls_back_with_transaction(self):
+        try:
+            with transaction.atomic():
+                record.delay('x')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(Job.objects.exists())
+        with self.assertRaises(LookupError):
+            enqueue('missing.task')
+
+    def test_claims_are_exclusive(self):
+        for i in range(3):
+            record.delay(i)
+        other = Worker()
+        other.name = 'other:1'
+        first = self.worker.claim(2)
+        second = other.claim(10)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(other.claim(10), [])
+
+    def test_retry_with_backoff_then_fail(self):
+        flaky.delay()
+        job = self._drain()[0]
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=25))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self._drain()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_expired_lease_requeued(self):
+        record.delay('lost')
+        job = self.worker.claim(1)[0]
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        Worker.maintain()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('pending', ''))
+        self._drain()
+        self.assertEqual(calls, ['lost'])
@@ -0,0 +1,189 @@
+"""
+后台任务执行进程
+按优先级领取到期任务，在线程池中执行，失败按指数退避重试；
+领取时支持 SKIP LOCKED 的数据库锁定候选行并跳过其他 worker 正在领取的行，
+其他数据库逐行以条件 UPDATE 抢占，多个 worker 并行时不会重复执行同一任务
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_config, get_task
+
+logger = logging.getLogger(__name__)
+
+# 回收过期租约和清理已完成任务的间隔（秒）
+MAINTENANCE_INTERVAL = 60
+
+
+class Worker:
+    """
+    任务执行进程
+
+    Attributes:
+        name: worker 标识（主机名:进程号），写入领取的任务
+        queues: 处理的队列
+        concurrency: 执行线程数
+    """
+
+    def __init__(self, queues: Optional[Sequence[str]] = None, concurrency: Optional[int] = None,
+                 poll_interval: Optional[float] = None, lease_seconds: Optional[int] = None):
+        config = get_config()
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.queues = list(queues or config['QUEUES'])
+        self.concurrency = concurrency or config['CONCURRENCY']
+        self.poll_interval = config['POLL_INTERVAL'] if poll_interval is None else poll_interval
+        self.lease = timedelta(seconds=lease_seconds or config['LEASE_SECONDS'])
+        self.processed = 0
+        self._stopping = threading.Event()
+
+    def stop(self, *args) -> None:
+        """执行完进行中的任务后退出"""
+        if not self._stopping.is_set():
+            logger.info(f"Worker {self.name} stopping")
+        self._stopping.set()
+
+    # ========== 领取 ==========
+
+    def claim(self, limit: int) -> List[Job]:
+        """
+        领取最多 limit 个到期任务
+
+        Returns:
+            List[Job]: 已标记为 running 并写入租约的任务
+        """
+        now = timezone.now()
+        candidates = (
+            Job.objects.filter(status='pending', queue__in=self.queues, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'pk')
+        )
+        claimed = {
+            'status': 'running', 'locked_by': self.name, 'locked_until': now + self.lease,
+            'attempts': F('attempts') + 1,
+        }
+        if connections[Job.objects.db].features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job_ids = list(candidates.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+                Job.objects.filter(pk__in=job_ids).update(**claimed)
+        else:
+            # 每行一条条件 UPDATE（自动提交），抢占失败的行已被其他 worker 领取；
+            # 不包在事务中，避免 SQLite 读锁升级为写锁时直接报 database is locked
+            job_ids = [
+                pk for pk in candidates.values_list('pk', flat=True)[:limit]
+                if Job.objects.filter(pk=pk, status='pending').update(**claimed)
+            ]
+        if not job_ids:
+            return []
+        return list(Job.objects.filter(pk__in=job_ids, locked_by=self.name).order_by('-priority', 'run_at', 'pk'))
+
+    def heartbeat(self, job_ids: Sequence[int]) -> None:
+        """为执行中的任务续期租约"""
+        if job_ids:
+            Job.objects.filter(pk__in=job_ids, status='running', locked_by=self.name).update(
+                locked_until=timezone.now() + self.lease
+            )
+
+    @staticmethod
+    def maintain() -> None:
+        """租约过期的任务（执行进程已退出）重新入队或标记失败，并清理过期的已完成任务"""
+        now = timezone.now()
+        expired = Job.objects.filter(status='running', locked_until__lt=now)
+        failed = expired.filter(attempts__gte=F('max_attempts')).update(
+            status='failed', finished_at=now, locked_by='', locked_until=None, last_error='租约过期，执行进程可能已退出'
+        )
+        requeued = expired.update(status='pending', locked_by='', locked_until=None)
+        purged, _ = Job.objects.filter(
+            status='succeeded', finished_at__lt=now - timedelta(seconds=get_config()['KEEP_SUCCEEDED'])
+        ).delete()
+        if failed or requeued or purged:
+            logger.warning(f"Job maintenance: {requeued} requeued, {failed} failed, {purged} purged")
+
+    # ========== 执行 ==========
+
+    def execute(self, job: Job) -> None:
+        """执行单个任务并记录结果，失败时按指数退避重新入队"""
+        started = time.monotonic()
+        registered = get_task(job.name)
+        owned = Job.objects.filter(pk=job.pk, status='running', locked_by=self.name)
+        try:
+            if registered is None:
+                raise LookupError(f"Unknown job task: {job.name}")
+            registered.func(*job.args, **job.kwargs)
+        except Exception:
+            now = timezone.now()
+            error = traceback.format_exc()
+            if registered is not None and job.attempts < job.max_attempts:
+                run_at = now + registered.get_retry_delay(job.attempts)
+                owned.update(status='pending', run_at=run_at, last_error=error, locked_by='', locked_until=None)
+                logger.warning(f"Job {job} failed (attempt {job.attempts}/{job.max_attempts}), retry at {run_at}")
+            else:
+                owned.update(status='failed', finished_at=now, last_error=error, locked_by='', locked_until=None)
+                logger.error(f"Job {job} failed permanently: {error}")
+        else:
+            owned.update(status='succeeded', finished_at=timezone.now(), last_error='', locked_by='',
+                         locked_until=None)
+            logger.info(f"Job {job} succeeded in {time.monotonic() - started:.2f}s")
+        finally:
+            close_old_connections()
+
+    def run(self, burst: bool = False) -> int:
+        """
+        领取并执行任务直到收到停止信号
+
+        Args:
+            burst: 队列中没有到期任务且进行中的任务都完成后退出
+
+        Returns:
+            int: 处理的任务数
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Worker {self.name} started: queues={self.queues}, concurrency={self.concurrency}")
+
+        running: Dict[Future, int] = {}
+        last_heartbeat = last_maintenance = 0.0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as executor:
+            while not self._stopping.is_set():
+                now = time.monotonic()
+                if now - last_maintenance >= MAINTENANCE_INTERVAL:
+                    self.maintain()
+                    last_maintenance = now
+                if now - last_heartbeat >= self.lease.total_seconds() / 3:
+                    self.heartbeat(list(running.values()))
+                    last_heartbeat = now
+
+                free = self.concurrency - len(running)
+                jobs = self.claim(free) if free else []
+                for job in jobs:
+                    running[executor.submit(self.execute, job)] = job.pk
+
+                if not running:
+                    if burst:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                # 最多等待一个轮询间隔，期间有任务完成时立即领取新任务
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    self.processed += 1
+            wait(running)
+            self.processed += len(running)
+
+        close_old_connections()
+        logger.info(f"Worker {self.name} stopped after {self.processed} jobs")
+        return self.processed
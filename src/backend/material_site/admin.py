@@ -1,12 +1,24 @@
-from django.contrib import admin
-from .models import Category, Tag, Material, Favorite, DownloadHistory
+from django.contrib import admin, messages
+
+from backend.paginators import EstimatedCountPaginator
+from .models import Category, Tag, Material, Favorite, DownloadHistory, ModerationLease
+from .moderation import moderate
+
+
+class LargeTableAdminMixin:
+    """大表后台列表：估算总数，筛选后不再额外统计全表行数"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'parent', 'sort_order', 'is_active']
     list_filter = ['is_active', 'parent']
+    list_select_related = ['parent']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    autocomplete_fields = ['parent']
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -15,12 +27,15 @@ class TagAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Material)
-class MaterialAdmin(admin.ModelAdmin):
+class MaterialAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'material_type', 'status', 'view_count', 'download_count', 'created_at']
     list_filter = ['status', 'material_type', 'license_type', 'is_featured', 'created_at']
+    list_select_related = ['author']
+    date_hierarchy = 'created_at'
     search_fields = ['title', 'description']
-    readonly_fields = ['view_count', 'download_count', 'like_count', 'favorite_count']
-    filter_horizontal = ['tags']
+    readonly_fields = ['view_count', 'download_count', 'like_count', 'favorite_count', 'updated_at']
+    autocomplete_fields = ['author', 'category', 'tags']
+    actions = ['approve_materials', 'reject_materials', 'feature_materials', 'unfeature_materials']
     fieldsets = (
         ('基础信息', {
             'fields': ('title', 'slug', 'description', 'material_type', 'author')
@@ -45,12 +60,44 @@ class MaterialAdmin(admin.ModelAdmin):
         }),
     )
 
+    def _moderate(self, request, queryset, action, label):
+        updated = moderate(queryset, action)
+        self.message_user(request, f'已{label} {len(updated)} 个素材', messages.SUCCESS)
+
+    @admin.action(description='发布所选素材', permissions=['change'])
+    def approve_materials(self, request, queryset):
+        self._moderate(request, queryset, 'approve', '发布')
+
+    @admin.action(description='拒绝所选素材', permissions=['change'])
+    def reject_materials(self, request, queryset):
+        self._moderate(request, queryset, 'reject', '拒绝')
+
+    @admin.action(description='推荐所选素材', permissions=['change'])
+    def feature_materials(self, request, queryset):
+        self._moderate(request, queryset, 'feature', '推荐')
+
+    @admin.action(description='取消推荐所选素材', permissions=['change'])
+    def unfeature_materials(self, request, queryset):
+        self._moderate(request, queryset, 'unfeature', '取消推荐')
+
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'material', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['user', 'material']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['user', 'material']
 
 @admin.register(DownloadHistory)
-class DownloadHistoryAdmin(admin.ModelAdmin):
+class DownloadHistoryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'material', 'downloaded_at', 'ip_address']
-    list_filter = ['downloaded_at']
\ No newline at end of file
+    list_filter = ['downloaded_at']
+    list_select_related = ['user', 'material']
+    date_hierarchy = 'downloaded_at'
+    autocomplete_fields = ['user', 'material']
+
+@admin.register(ModerationLease)
+class ModerationLeaseAdmin(admin.ModelAdmin):
+    list_display = ['material', 'moderator', 'claimed_at', 'expires_at']
+    list_select_related = ['material', 'moderator']
+    autocomplete_fields = ['material', 'moderator']
@@ -0,0 +1,251 @@
+"""
+异步只读视图模块
+ASGI 部署下素材列表/详情、分类、标签和分面的 GET 请求在事件循环中处理：
+数据库查询使用异步 ORM，缓存使用异步接口，等待期间不占用线程。
+认证、权限、内容协商、异常处理和分页链接仍走视图集的 DRF 流程，响应与同步视图一致；
+写操作和可浏览 API 交给同步视图集处理。
+"""
+
+import logging
+from typing import Awaitable, Callable, List
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.db import DatabaseError
+from django.db.models import Count, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from backend import replicas
+from . import fast_serializers, views
+from .facets import compute_facets, facet_cache_key, get_cache_ttl
+from .fast_serializers import (
+    FastMaterialDetailSerializer, FastMaterialListSerializer, compile_fields, extract
+)
+from .models import Category, Material, Tag
+from .serializers import CategorySerializer, TagSerializer
+from .view_tracking import get_viewer_key, view_tracker
+
+logger = logging.getLogger(__name__)
+
+# 依赖标签索引的筛选参数（索引可能需要从数据库重建，只能同步执行）
+TAG_FILTER_PARAMS = ('tags', 'tag_expr')
+
+CATEGORY_FIELDS = compile_fields(
+    Category, [name for name in CategorySerializer.Meta.fields if name != 'material_count']
+)
+TAG_FIELDS = compile_fields(Tag, TagSerializer.Meta.fields)
+
+# 同步视图，与路由器注册的视图相同
+material_list_view = views.MaterialViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='material', detail=False
+)
+material_detail_view = views.MaterialViewSet.as_view(
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+    basename='material', detail=True
+)
+material_facets_view = views.MaterialViewSet.as_view({'get': 'facets'}, basename='material', detail=False)
+category_list_view = views.CategoryViewSet.as_view({'get': 'list'}, basename='category', detail=False)
+tag_list_view = views.TagViewSet.as_view({'get': 'list'}, basename='tag', detail=False)
+
+
+class UseSyncView(Exception):
+    """请求不适合异步处理，交给同步视图"""
+
+
+async def _authenticate(drf_request) -> None:
+    """
+    认证当前请求
+
+    不带 Authorization 头的请求直接视为匿名用户；
+    带令牌时认证类可能需要查询用户（缓存未命中时），在线程中执行。
+    """
+    if 'HTTP_AUTHORIZATION' not in drf_request.META:
+        drf_request.user = AnonymousUser()
+        drf_request.auth = None
+        return
+    await sync_to_async(lambda: drf_request.user)()
+
+
+async def _dispatch(viewset_class, basename: str, action: str, handler: Callable[..., Awaitable[Response]],
+                    request: HttpRequest, **kwargs) -> HttpResponse:
+    """
+    以异步处理函数替代 action 执行 DRF 的请求流程
+
+    Args:
+        viewset_class: 视图集类（提供查询集、筛选、分页和权限配置）
+        basename: 路由注册的 basename
+        action: 对应的 action 名称
+        handler: 异步处理函数，参数为视图集实例和 URL 参数
+        request: Django 请求
+
+    Returns:
+        HttpResponse: 已渲染的响应（不再经过 Django 的延迟渲染）
+
+    Raises:
+        UseSyncView: 协商结果为可浏览 API
+    """
+    view = viewset_class(basename=basename, detail='pk' in kwargs)
+    view.action_map = {'get': action}
+    view.args, view.kwargs = (), kwargs
+    view.format_kwarg = None
+    drf_request = view.initialize_request(request, **kwargs)
+    view.request = drf_request
+    view.headers = view.default_response_headers
+
+    previous_replica = replicas.current_replica()
+    try:
+        try:
+            await _authenticate(drf_request)
+            # initial() 检查权限和限流（可能查询数据库、访问缓存），在线程中执行
+            await sync_to_async(view.initial)(drf_request)
+            if isinstance(drf_request.accepted_renderer, BrowsableAPIRenderer):
+                raise UseSyncView()
+            try:
+                response = await handler(view, **kwargs)
+            except DatabaseError as exc:
+                # 只读副本出错时在主库上重试一次
+                if not replicas.fail_over(exc):
+                    raise
+                response = await handler(view, **kwargs)
+        except UseSyncView:
+            raise
+        except Exception as exc:
+            response = await sync_to_async(view.handle_exception)(exc)
+        response = await sync_to_async(view.finalize_response)(drf_request, response)
+    finally:
+        # initial() 选择的副本由 sync_to_async 带回当前上下文，
+        # 令牌属于线程中的上下文副本，不能在这里 reset，直接恢复原值
+        replicas.use_replica(previous_replica)
+        view._replica_token = None
+
+    response.render()
+    http_response = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        http_response[header] = value
+    return http_response
+
+
+async def paginate(view, queryset: QuerySet, serialize: Callable[[List], Awaitable[list]]) -> Response:
+    """
+    异步分页，结果与 PageNumberPagination.paginate_queryset 相同
+
+    Args:
+        view: 视图集实例
+        queryset: 已筛选排序的查询集
+        serialize: 把一页数据行转换为输出的异步函数
+
+    Returns:
+        Response: 分页响应（未配置分页时为完整列表）
+    """
+    paginator = view.paginator
+    page_size = paginator.get_page_size(view.request) if paginator is not None else None
+    if not page_size:
+        return Response(await serialize([row async for row in queryset]))
+
+    paginator.request = view.request
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(view.request, django_paginator)
+    try:
+        paginator.page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    rows = [row async for row in paginator.page.object_list]
+    return paginator.get_paginated_response(await serialize(rows))
+
+
+async def _filtered_queryset(view) -> QuerySet:
+    """视图集的筛选后查询集；使用标签筛选时在线程中构建"""
+    if any(name in view.request.query_params for name in TAG_FILTER_PARAMS):
+        return await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+    return view.filter_queryset(view.get_queryset())
+
+
+# ========== 处理函数 ==========
+
+async def _material_list(view) -> Response:
+    serializer = FastMaterialListSerializer(view.get_serializer_context())
+    queryset = serializer.prepare(await _filtered_queryset(view), serializer.columns)
+    return await paginate(view, queryset, serializer.aserialize)
+
+
+async def _material_detail(view, pk: int) -> Response:
+    serializer = FastMaterialDetailSerializer(view.get_serializer_context())
+    queryset = serializer.prepare(view.get_queryset().filter(pk=pk), serializer.columns)
+    rows = [row async for row in queryset]
+    if not rows:
+        raise Http404(f'No {Material._meta.object_name} matches the given query.')
+    # 到期时 record_view 会刷新草图并写数据库，只能在线程中执行
+    await sync_to_async(view_tracker.record_view)(pk, get_viewer_key(view.request))
+    return Response((await serializer.aserialize(rows))[0])
+
+
+async def _material_facets(view) -> Response:
+    key = facet_cache_key(view.request.query_params.lists())
+    data = await cache.aget(key)
+    if data is None:
+        queryset = await _filtered_queryset(view)
+        data = await sync_to_async(compute_facets)(queryset)
+        await cache.aset(key, data, get_cache_ttl())
+    return Response(data)
+
+
+async def _category_list(view) -> Response:
+    queryset = view.filter_queryset(view.get_queryset()).values(*(column for _, column, _ in CATEGORY_FIELDS))
+
+    async def serialize(rows: List[dict]) -> List[dict]:
+        counts = {
+            row['category_id']: row['total'] async for row in
+            Material.objects.filter(category_id__in=[row['id'] for row in rows]).order_by()
+            .values('category_id').annotate(total=Count('pk'))
+        }
+        results = []
+        for row in rows:
+            data = extract(row, CATEGORY_FIELDS, view.request)
+            data['material_count'] = counts.get(row['id'], 0)
+            results.append({name: data[name] for name in CategorySerializer.Meta.fields})
+        return results
+
+    return await paginate(view, queryset, serialize)
+
+
+async def _tag_list(view) -> Response:
+    queryset = view.filter_queryset(view.get_queryset()).values(*(column for _, column, _ in TAG_FIELDS))
+
+    async def serialize(rows: List[dict]) -> List[dict]:
+        return [extract(row, TAG_FIELDS, view.request) for row in rows]
+
+    return await paginate(view, queryset, serialize)
+
+
+# ========== 视图 ==========
+
+def read_view(viewset_class, basename: str, action: str, handler, sync_view):
+    """
+    组合异步读取与同步写入的视图
+
+    GET 请求在启用快速列表序列化时由 handler 异步处理，
+    其余方法以及需要可浏览 API 的请求在线程中交给 sync_view。
+    """
+    async def view(request: HttpRequest, **kwargs) -> HttpResponse:
+        if request.method == 'GET' and fast_serializers.is_enabled():
+            try:
+                return await _dispatch(viewset_class, basename, action, handler, request, **kwargs)
+            except UseSyncView:
+                pass
+        return await sync_to_async(sync_view)(request, **kwargs)
+
+    return csrf_exempt(view)
+
+
+materials = read_view(views.MaterialViewSet, 'material', 'list', _material_list, material_list_view)
+material_detail = read_view(views.MaterialViewSet, 'material', 'retrieve', _material_detail, material_detail_view)
+material_facets = read_view(views.MaterialViewSet, 'material', 'facets', _material_facets, material_facets_view)
+categories = read_view(views.CategoryViewSet, 'category', 'list', _category_list, category_list_view)
+tags = read_view(views.TagViewSet, 'tag', 'list', _tag_list, tag_list_view)
@@ -0,0 +1,170 @@
+"""
+压缩位图
+按 2^16 个ID分块存储的整数集合（Roaring 位图的简化实现），支持交、并、差运算
+"""
+
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Union
+
+import numpy as np
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_BYTES = CHUNK_SIZE // 8
+LOW_MASK = CHUNK_SIZE - 1
+
+# 稀疏块元素超过该数量时改用位集存储（此时位集 8KB 不大于集合的内存占用）
+SPARSE_LIMIT = 4096
+
+Container = Union[FrozenSet[int], int]
+
+
+def _to_bits(container: Container) -> int:
+    """将块转换为位集（Python 整数）"""
+    if isinstance(container, int):
+        return container
+    bits = np.zeros(CHUNK_SIZE, dtype=np.uint8)
+    bits[list(container)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def _lows(container: Container) -> np.ndarray:
+    """块内元素的低16位（升序）"""
+    if isinstance(container, int):
+        raw = np.frombuffer(container.to_bytes(CHUNK_BYTES, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+    return np.array(sorted(container), dtype=np.int64)
+
+
+def _compact(container: Container) -> Container:
+    """按元素数量选择存储方式"""
+    if isinstance(container, int):
+        if bin(container).count('1') <= SPARSE_LIMIT:
+            return frozenset(_lows(container).tolist())
+        return container
+    if len(container) > SPARSE_LIMIT:
+        return _to_bits(container)
+    return container
+
+
+def _filter(members: FrozenSet[int], bits: int, keep: bool) -> FrozenSet[int]:
+    """保留（keep=True）或剔除位集中存在的集合元素"""
+    raw = bits.to_bytes(CHUNK_BYTES, 'little')
+    return frozenset(x for x in members if bool(raw[x >> 3] >> (x & 7) & 1) == keep)
+
+
+def _and(a: Container, b: Container) -> Container:
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _filter(a, b, keep=True)
+    return a & b
+
+
+def _or(a: Container, b: Container) -> Container:
+    if isinstance(a, frozenset) and isinstance(b, frozenset):
+        return a | b
+    return _to_bits(a) | _to_bits(b)
+
+
+def _sub(a: Container, b: Container) -> Container:
+    if isinstance(a, frozenset):
+        return a - b if isinstance(b, frozenset) else _filter(a, b, keep=False)
+    return a & ~_to_bits(b)
+
+
+class Bitmap:
+    """
+    压缩位图
+
+    高16位相同的ID放在同一块中，块内元素较少时用 frozenset 存储低16位，
+    较多时用 2^16 位的整数位集存储。空块不保存。
+    运算结果不与操作数共享可变状态，可以放心缓存和跨线程读取。
+
+    Attributes:
+        chunks: {块号: 块}
+    """
+
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks: Dict[int, Container] = None):
+        self.chunks = chunks or {}
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> 'Bitmap':
+        """由ID序列构建位图"""
+        groups = defaultdict(set)
+        for value in ids:
+            groups[value >> CHUNK_BITS].add(value & LOW_MASK)
+        return cls({key: _compact(frozenset(lows)) for key, lows in groups.items()})
+
+    def _combine(self, other: 'Bitmap', operation, keys) -> 'Bitmap':
+        chunks = {}
+        for key in keys:
+            a, b = self.chunks.get(key), other.chunks.get(key)
+            if a is None or b is None:
+                result = a if b is None else (b if operation is _or else None)
+            else:
+                result = operation(a, b)
+            if result:
+                chunks[key] = result
+        return Bitmap(chunks)
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _and, self.chunks.keys() & other.chunks.keys())
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _or, self.chunks.keys() | other.chunks.keys())
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _sub, self.chunks.keys())
+
+    def add(self, value: int) -> None:
+        key, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self.chunks.get(key, frozenset())
+        if isinstance(container, int):
+            self.chunks[key] = container | (1 << low)
+        else:
+            self.chunks[key] = _compact(container | {low})
+
+    def discard(self, value: int) -> None:
+        key, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self.chunks.get(key)
+        if container is None:
+            return
+        container = container & ~(1 << low) if isinstance(container, int) else container - {low}
+        if container:
+            self.chunks[key] = container
+        else:
+            del self.chunks[key]
+
+    def __contains__(self, value: int) -> bool:
+        container = self.chunks.get(value >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = value & LOW_MASK
+        return bool(container >> low & 1) if isinstance(container, int) else low in container
+
+    def __len__(self) -> int:
+        return sum(
+            bin(container).count('1') if isinstance(container, int) else len(container)
+            for container in self.chunks.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.chunks)
+
+    def to_ids(self) -> List[int]:
+        """升序的ID列表"""
+        ids: List[int] = []
+        for key in sorted(self.chunks):
+            ids.extend((_lows(self.chunks[key]) + (key << CHUNK_BITS)).tolist())
+        return ids
+
+    def __getstate__(self):
+        return (self.chunks,)
+
+    def __setstate__(self, state):
+        self.chunks, = state
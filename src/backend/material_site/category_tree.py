@@ -0,0 +1,174 @@
+"""
+分类树快照
+一次查询构建带素材数的完整分类树，按版本号缓存渲染后的响应内容；
+分类或素材变化时信号递增共享缓存中的版本号，各进程在下次请求时重建或从缓存加载
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+
+from .models import Category
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',   # 多进程部署时应指向共享缓存
+    'TTL': 600,                 # 快照最长使用时间（秒），兜底绕过信号的批量修改
+}
+
+VERSION_KEY = 'category_tree:version'
+
+NODE_FIELDS = ('id', 'name', 'slug', 'description', 'icon', 'sort_order')
+
+# 影响分类树内容的素材字段
+MATERIAL_FIELDS = {'status', 'category', 'category_id'}
+
+
+def get_config() -> dict:
+    """读取 settings.CATEGORY_TREE 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'CATEGORY_TREE', {})}
+
+
+def content_cache_key(version: int, media_type: str) -> str:
+    return f'category_tree:{version}:{media_type}'
+
+
+def build_tree() -> List[dict]:
+    """
+    一次查询构建分类树
+
+    每个节点包含自身的已发布素材数 material_count 和含子分类的 total_material_count；
+    停用分类及其子树不出现。兄弟节点按分类的默认排序（sort_order, name）排列。
+    始终查询主库：版本号在写入提交后递增，此时只读副本可能尚未同步，
+    用副本的数据构建会把旧内容缓存到新版本下。
+
+    Returns:
+        List[dict]: 顶级分类节点，子分类在 children 中
+    """
+    rows = (
+        Category.objects.using('default').filter(is_active=True)
+        .annotate(material_count=Count('materials', filter=Q(materials__status='approved')))
+        .values(*NODE_FIELDS, 'parent_id', 'material_count')
+    )
+    nodes: Dict[int, dict] = {}
+    parents: Dict[int, Optional[int]] = {}
+    for row in rows:
+        parents[row['id']] = row.pop('parent_id')
+        nodes[row['id']] = {**row, 'total_material_count': row['material_count'], 'children': []}
+
+    roots = []
+    for category_id, node in nodes.items():
+        parent_id = parents[category_id]
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]['children'].append(node)
+
+    def total(node: dict) -> int:
+        node['total_material_count'] += sum(total(child) for child in node['children'])
+        return node['total_material_count']
+
+    for root in roots:
+        total(root)
+    return roots
+
+
+class CategoryTree:
+    """
+    进程内的分类树快照
+
+    版本号与共享缓存一致且未超过 TTL 时直接使用本地渲染结果，
+    正常请求只读取一次缓存（版本号）。
+
+    Attributes:
+        version: 本地快照对应的版本号
+        data: 分类树（只从缓存加载了渲染结果时为 None）
+        rendered: {媒体类型: 渲染后的内容}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.loaded_at = 0.0
+        self.data: Optional[List[dict]] = None
+        self.rendered: Dict[str, bytes] = {}
+
+    @staticmethod
+    def _cache():
+        return caches[get_config()['CACHE_ALIAS']]
+
+    def _current_version(self) -> int:
+        cache = self._cache()
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # 版本号丢失（缓存清空或淘汰）时以当前时间重新开始，不会与旧快照的版本号重复
+            cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(VERSION_KEY, 0)
+        return version
+
+    def _sync(self, version: int) -> None:
+        """版本变化或快照超过 TTL 时丢弃本地快照"""
+        if version != self.version or time.monotonic() - self.loaded_at >= get_config()['TTL']:
+            self.version = version
+            self.loaded_at = time.monotonic()
+            self.data = None
+            self.rendered = {}
+
+    def invalidate(self) -> None:
+        """使所有进程在下次请求时重建分类树"""
+        cache = self._cache()
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+    def _data(self) -> List[dict]:
+        if self.data is None:
+            self.data = build_tree()
+            logger.info(f"Category tree v{self.version} built: {len(self.data)} root categories")
+        return self.data
+
+    def get_data(self) -> List[dict]:
+        """当前版本的分类树"""
+        version = self._current_version()
+        with self._lock:
+            self._sync(version)
+            return self._data()
+
+    def render(self, renderer) -> bytes:
+        """
+        当前版本的分类树按渲染器序列化后的内容
+
+        本地没有时先在共享缓存中查找，其他进程已渲染过时不再查询数据库。
+
+        Args:
+            renderer: DRF 渲染器实例
+
+        Returns:
+            bytes: 响应内容
+        """
+        version = self._current_version()
+        media_type = renderer.media_type
+        with self._lock:
+            self._sync(version)
+            content = self.rendered.get(media_type)
+            if content is not None:
+                return content
+
+            key = content_cache_key(version, media_type)
+            content = self._cache().get(key)
+            if content is None:
+                content = renderer.render(self._data(), media_type, {})
+                self._cache().set(key, content, get_config()['TTL'])
+            self.rendered[media_type] = content
+            return content
+
+
+category_tree = CategoryTree()
@@ -0,0 +1,124 @@
+"""
+统计计数模块
+冗余计数字段（素材数、下载数、收藏数等）的原子更新与对账
+"""
+
+import logging
+from typing import Type
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Material, Favorite, DownloadHistory, DailyMaterialDownloads, DailyAuthorDownloads
+)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def bump_counter(model: Type[models.Model], pk: int, field: str, delta: int = 1) -> int:
+    """
+    原子更新计数字段
+
+    生成单条 ``UPDATE ... SET field = field + delta`` 语句，
+    不读取整行，也不会覆盖并发写入的其它字段。
+
+    Args:
+        model: 模型类
+        pk: 主键
+        field: 计数字段名
+        delta: 增量（可为负数）
+
+    Returns:
+        int: 受影响的行数
+    """
+    return model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def read_counter(model: Type[models.Model], pk: int, field: str) -> int:
+    """读取计数字段的当前值（只查询单列）"""
+    value = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    return value or 0
+
+
+def _count_subquery(queryset: models.QuerySet, group_field: str) -> Subquery:
+    """构造按 group_field 分组计数的关联子查询"""
+    return Subquery(
+        queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total')[:1],
+        output_field=models.IntegerField()
+    )
+
+
+def _archived_subquery(queryset: models.QuerySet, group_field: str) -> Subquery:
+    """构造已归档日汇总下载数的关联子查询（原始记录已删除的部分）"""
+    return Subquery(
+        queryset.filter(archived=True).order_by().values(group_field)
+        .annotate(total=Sum('downloads')).values('total')[:1],
+        output_field=models.IntegerField()
+    )
+
+
+def _pk_chunks(queryset: models.QuerySet, chunk_size: int):
+    """按主键区间切分查询集，避免一次性锁定/更新整张表"""
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    low = bounds['low']
+    while low <= bounds['high']:
+        yield queryset.filter(pk__gte=low, pk__lt=low + chunk_size)
+        low += chunk_size
+
+
+def reconcile_material_counters(chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    根据收藏表和下载记录重算素材的 favorite_count / download_count
+
+    每个主键区间只执行一条带关联子查询的 UPDATE 语句；
+    已归档（原始记录已删除）日期的下载数取自日汇总表。
+
+    Returns:
+        int: 更新的素材数量
+    """
+    favorites = _count_subquery(Favorite.objects.filter(material=OuterRef('pk')), 'material')
+    downloads = _count_subquery(DownloadHistory.objects.filter(material=OuterRef('pk')), 'material')
+    archived = _archived_subquery(DailyMaterialDownloads.objects.filter(material=OuterRef('pk')), 'material')
+
+    updated = 0
+    for chunk in _pk_chunks(Material.objects.all(), chunk_size):
+        updated += chunk.update(
+            favorite_count=Coalesce(favorites, 0),
+            download_count=Coalesce(downloads, 0) + Coalesce(archived, 0),
+        )
+    logger.info(f"Reconciled counters for {updated} materials")
+    return updated
+
+
+def reconcile_user_counters(chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    根据素材表和下载记录重算用户的 materials_count / downloads_count
+
+    downloads_count 表示该用户上传的素材被下载的总次数。
+
+    Returns:
+        int: 更新的用户数量
+    """
+    materials = _count_subquery(Material.objects.filter(author=OuterRef('pk')), 'author')
+    downloads = _count_subquery(
+        DownloadHistory.objects.filter(material__author=OuterRef('pk')), 'material__author'
+    )
+    archived = _archived_subquery(DailyAuthorDownloads.objects.filter(author=OuterRef('pk')), 'author')
+
+    updated = 0
+    for chunk in _pk_chunks(User.objects.all(), chunk_size):
+        updated += chunk.update(
+            materials_count=Coalesce(materials, 0),
+            downloads_count=Coalesce(downloads, 0) + Coalesce(archived, 0),
+        )
+    logger.info(f"Reconciled counters for {updated} users")
+    return updated
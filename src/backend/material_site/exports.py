@@ -0,0 +1,195 @@
+"""
+素材目录导出模块
+以 NDJSON 或 CSV 流式导出已发布素材（含作者、分类和标签名称），
+按块读取数据库并批量加载标签，内存占用与导出行数无关
+"""
+
+import csv
+import json
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Material
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+DEFAULT_CHUNK_SIZE = 2000
+OUTPUT_FORMATS = ('ndjson', 'csv')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# 导出列：(输出名, values() 列名)
+COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('slug', 'slug'),
+    ('material_type', 'material_type'),
+    ('license_type', 'license_type'),
+    ('price', 'price'),
+    ('file_size', 'file_size'),
+    ('dimensions', 'dimensions'),
+    ('view_count', 'view_count'),
+    ('download_count', 'download_count'),
+    ('favorite_count', 'favorite_count'),
+    ('author', 'author__username'),
+    ('category', 'category__name'),
+    ('category_slug', 'category__slug'),
+    ('created_at', 'created_at'),
+    ('published_at', 'published_at'),
+]
+FIELD_NAMES = [name for name, _ in COLUMNS] + ['tags']
+
+# CSV 中多个标签的分隔符
+TAG_SEPARATOR = '|'
+
+
+def export_queryset() -> QuerySet:
+    """默认导出范围：全部已发布素材"""
+    return Material.objects.filter(status='approved')
+
+
+def _tag_names(material_ids: List[int]) -> Dict[int, List[str]]:
+    """一批素材的标签名称"""
+    tags = defaultdict(list)
+    rows = (
+        Material.tags.through.objects.filter(material_id__in=material_ids)
+        .order_by('tag__name').values_list('material_id', 'tag__name')
+    )
+    for material_id, name in rows:
+        tags[material_id].append(name)
+    return tags
+
+
+def _normalize(row: dict) -> dict:
+    """转换为可直接编码的基础类型"""
+    record = {name: row[column] for name, column in COLUMNS}
+    record['price'] = str(record['price'])
+    for name in ('created_at', 'published_at'):
+        if record[name] is not None:
+            record[name] = timezone.localtime(record[name]).isoformat()
+    return record
+
+
+def iter_records(queryset: Optional[QuerySet] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    逐条产出导出记录
+
+    素材行通过 iterator(chunk_size) 读取（PostgreSQL 下使用服务端游标），
+    每攒满 chunk_size 行批量查询一次标签。
+
+    Args:
+        queryset: 素材查询集，默认为全部已发布素材
+        chunk_size: 每批行数
+
+    Yields:
+        dict: 导出记录
+    """
+    queryset = export_queryset() if queryset is None else queryset
+    rows = queryset.select_related(None).prefetch_related(None).order_by('pk').values(
+        *(column for _, column in COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield from _with_tags(batch)
+            batch = []
+    if batch:
+        yield from _with_tags(batch)
+
+
+def _with_tags(batch: List[dict]) -> Iterator[dict]:
+    tags = _tag_names([row['id'] for row in batch])
+    for row in batch:
+        record = _normalize(row)
+        record['tags'] = tags.get(row['id'], [])
+        yield record
+
+
+def _dumps(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def ndjson_lines(records: Iterable[dict]) -> Iterator[bytes]:
+    """每条记录一行 JSON"""
+    for record in records:
+        yield _dumps(record) + b'\n'
+
+
+class _Echo:
+    """csv.writer 的写入目标，直接返回写入的内容"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_lines(records: Iterable[dict]) -> Iterator[bytes]:
+    """带表头的 CSV（UTF-8 BOM 便于 Excel 识别），标签以 | 分隔"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'.encode('utf-8') + writer.writerow(FIELD_NAMES).encode('utf-8')
+    for record in records:
+        record['tags'] = TAG_SEPARATOR.join(record['tags'])
+        yield writer.writerow(['' if record[name] is None else record[name] for name in FIELD_NAMES]).encode('utf-8')
+
+
+def buffered(chunks: Iterable[bytes], buffer_size: int = 64 * 1024) -> Iterator[bytes]:
+    """把逐行产生的小块合并为约 buffer_size 的块，减少写出次数"""
+    pending = []
+    size = 0
+    for chunk in chunks:
+        if chunk:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= buffer_size:
+                yield b''.join(pending)
+                pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """即时 gzip 压缩"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.flush()
+
+
+def export_stream(output: str, queryset: Optional[QuerySet] = None, compress: bool = False,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    导出内容的字节流
+
+    Args:
+        output: ndjson 或 csv
+        queryset: 素材查询集，默认为全部已发布素材
+        compress: 是否 gzip 压缩
+        chunk_size: 每批读取的行数
+
+    Returns:
+        Iterator[bytes]: 字节块
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {output}")
+    records = iter_records(queryset, chunk_size)
+    stream = ndjson_lines(records) if output == 'ndjson' else csv_lines(records)
+    return buffered(gzip_stream(stream) if compress else stream)
+
+
+def export_filename(output: str, compress: bool = False) -> str:
+    """下载文件名，例如 materials-20240101.ndjson.gz"""
+    name = f"materials-{timezone.localdate():%Y%m%d}.{output}"
+    return f"{name}.gz" if compress else name
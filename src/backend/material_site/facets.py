@@ -0,0 +1,109 @@
+"""
+分面统计模块
+为素材筛选侧边栏一次性计算各筛选维度的数量
+"""
+
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.db.models import Count, QuerySet
+
+from .models import Material
+
+# 不影响筛选结果的查询参数
+IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'format', 'limit'}
+
+DEFAULT_CACHE_TTL = 60
+DEFAULT_TOP_TAGS = 30
+
+
+def facet_cache_key(params: Iterable[Tuple[str, list]]) -> str:
+    """
+    根据规范化后的筛选参数生成缓存键
+
+    参数名和多值参数的取值都排序，空值忽略，因此等价的查询命中同一缓存。
+
+    Args:
+        params: (参数名, 取值列表) 序列，例如 QueryDict.lists()
+    """
+    normalized = sorted(
+        (name, sorted(value for value in values if value))
+        for name, values in params
+        if name not in IGNORED_PARAMS and any(values)
+    )
+    digest = hashlib.md5(repr(normalized).encode('utf-8')).hexdigest()
+    return f'facets:{digest}'
+
+
+def get_cache_ttl() -> int:
+    """分面结果缓存时间（秒）"""
+    return getattr(settings, 'FACETS_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def compute_facets(queryset: QuerySet, top_tags: int = DEFAULT_TOP_TAGS) -> dict:
+    """
+    计算筛选结果的分面数量
+
+    素材类型、许可类型和分类在同一条 GROUP BY 查询中统计，
+    标签单独一条查询取前 top_tags 个。
+
+    Args:
+        queryset: 已应用筛选条件的素材查询集
+        top_tags: 返回的标签数量
+
+    Returns:
+        dict: 各维度的计数
+    """
+    # 标签/搜索筛选可能产生重复行，统一通过主键子查询去重
+    matched = Material.objects.filter(pk__in=queryset.order_by().values('pk'))
+
+    rows = (
+        matched.order_by()
+        .values('material_type', 'license_type', 'category_id', 'category__slug', 'category__name')
+        .annotate(count=Count('pk'))
+    )
+
+    total = 0
+    material_types: Dict[str, int] = defaultdict(int)
+    license_types: Dict[str, int] = defaultdict(int)
+    categories: Dict[int, dict] = {}
+    for row in rows:
+        total += row['count']
+        material_types[row['material_type']] += row['count']
+        license_types[row['license_type']] += row['count']
+        if row['category_id'] is not None:
+            category = categories.setdefault(row['category_id'], {
+                'id': row['category_id'],
+                'slug': row['category__slug'],
+                'name': row['category__name'],
+                'count': 0,
+            })
+            category['count'] += row['count']
+
+    tags = (
+        Material.tags.through.objects.filter(material__in=matched)
+        .values('tag_id', 'tag__slug', 'tag__name')
+        .annotate(count=Count('material_id'))
+        .order_by('-count', 'tag__name')[:top_tags]
+    )
+
+    type_labels = dict(Material.MATERIAL_TYPES)
+    license_labels = dict(Material.LICENSE_CHOICES)
+    return {
+        'total': total,
+        'material_type': [
+            {'value': value, 'label': type_labels.get(value, value), 'count': count}
+            for value, count in sorted(material_types.items(), key=lambda item: -item[1])
+        ],
+        'license_type': [
+            {'value': value, 'label': license_labels.get(value, value), 'count': count}
+            for value, count in sorted(license_types.items(), key=lambda item: -item[1])
+        ],
+        'category': sorted(categories.values(), key=lambda item: -item['count']),
+        'tags': [
+            {'id': tag['tag_id'], 'slug': tag['tag__slug'], 'name': tag['tag__name'], 'count': tag['count']}
+            for tag in tags
+        ],
+    }
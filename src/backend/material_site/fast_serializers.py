@@ -0,0 +1,296 @@
+"""
+快速列表序列化模块
+列表接口用 values() 只取需要的列，用预编译的字段提取函数直接构造输出字典，
+结果与 MaterialListSerializer / FavoriteSerializer 逐字节一致
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Count, QuerySet
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from users.serializers import UserSerializer
+from .models import Material, Category, Tag, Favorite, format_file_size
+from .serializers import (
+    CategorySerializer, TagSerializer, MaterialListSerializer, MaterialDetailSerializer, FavoriteSerializer
+)
+
+# (输出键, values() 列名, 转换函数)；转换函数签名为 (值, request)，值为 None 时不调用
+Extractor = Tuple[str, str, Optional[Callable]]
+
+_DATETIME = serializers.DateTimeField()
+
+
+def is_enabled() -> bool:
+    """是否启用快速列表序列化（settings.FAST_LIST_SERIALIZATION）"""
+    return getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+
+
+def _datetime(value, request):
+    return _DATETIME.to_representation(value)
+
+
+def _decimal(model_field: models.DecimalField) -> Callable:
+    field = serializers.DecimalField(max_digits=model_field.max_digits, decimal_places=model_field.decimal_places)
+    return lambda value, request: field.to_representation(value)
+
+
+def _file(model_field: models.FileField) -> Callable:
+    """与 DRF FileField/ImageField 相同：返回URL，有 request 时返回绝对地址"""
+    storage = model_field.storage
+
+    def convert(value, request):
+        if not value:
+            return None
+        if not api_settings.UPLOADED_FILES_USE_URL:
+            return value
+        url = storage.url(value)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def compile_fields(model, fields: Iterable[str], prefix: str = '') -> List[Extractor]:
+    """
+    按模型字段类型为 ModelSerializer 的普通字段生成提取函数
+
+    Args:
+        model: 模型类
+        fields: 字段名（外键输出主键）
+        prefix: values() 列名前缀（关联查询时使用，如 author__）
+    """
+    extractors = []
+    for name in fields:
+        field = model._meta.get_field(name)
+        if isinstance(field, models.DateTimeField):
+            convert = _datetime
+        elif isinstance(field, models.DecimalField):
+            convert = _decimal(field)
+        elif isinstance(field, models.FileField):
+            convert = _file(field)
+        else:
+            convert = None
+        extractors.append((name, prefix + name, convert))
+    return extractors
+
+
+def extract(row: dict, extractors: List[Extractor], request) -> dict:
+    """按提取函数从 values() 行构造输出字典"""
+    data = {}
+    for key, column, convert in extractors:
+        value = row[column]
+        data[key] = value if value is None or convert is None else convert(value, request)
+    return data
+
+
+# 嵌套序列化器的字段在导入时编译一次
+AUTHOR_FIELDS = compile_fields(Material._meta.get_field('author').related_model, UserSerializer.Meta.fields, 'author__')
+CATEGORY_FIELDS = compile_fields(
+    Category, [name for name in CategorySerializer.Meta.fields if name != 'material_count'], 'category__'
+)
+TAG_FIELDS = compile_fields(Tag, TagSerializer.Meta.fields, 'tag__')
+
+# 由查询/计算得到的字段，其余按模型字段编译
+COMPUTED_FIELDS = {'author', 'category', 'tags', 'file_size_display', 'is_favorited'}
+MATERIAL_FIELDS = compile_fields(
+    Material, [name for name in MaterialListSerializer.Meta.fields if name not in COMPUTED_FIELDS]
+)
+DETAIL_FIELDS = compile_fields(
+    Material, [name for name in MaterialDetailSerializer.Meta.fields if name not in COMPUTED_FIELDS]
+)
+
+MATERIAL_COLUMNS = sorted(
+    {column for _, column, _ in MATERIAL_FIELDS + AUTHOR_FIELDS + CATEGORY_FIELDS}
+    | {'category_id', 'file_size'}
+)
+
+
+class FastMaterialListSerializer:
+    """
+    素材列表快速序列化器
+
+    每页固定 4 条查询：素材（含作者、分类列）、标签、分类素材数、当前用户收藏，
+    不创建模型实例和 DRF 字段对象。上下文带有 field_selection 时只取所选字段需要的列，
+    并跳过不需要的标签、分类素材数和收藏查询。
+    serialize() 与 aserialize() 执行相同的查询，后者使用异步 ORM。
+
+    Attributes:
+        request: 当前请求（用于文件绝对地址和收藏状态）
+        fields: 输出字段
+        columns: values() 需要的列
+    """
+    serializer_class = MaterialListSerializer
+    extractors = MATERIAL_FIELDS
+
+    def __init__(self, context: Optional[dict] = None):
+        context = context or {}
+        self.request = context.get('request')
+        selection = context.get('field_selection')
+        all_fields = self.serializer_class.Meta.fields
+        if selection is None:
+            self.fields = list(all_fields)
+            self.expanded = {'author', 'category', 'tags'}
+        else:
+            self.fields = [name for name in all_fields if selection.includes(name)]
+            self.expanded = set(selection.expanded)
+        self.material_fields = [extractor for extractor in self.extractors if extractor[0] in self.fields]
+        self.columns = self._columns()
+
+    def _columns(self) -> List[str]:
+        columns = {'id'} | {column for _, column, _ in self.material_fields}
+        if 'author' in self.fields:
+            columns |= {column for _, column, _ in AUTHOR_FIELDS} if 'author' in self.expanded else {'author_id'}
+        if 'category' in self.fields:
+            columns.add('category_id')
+            if 'category' in self.expanded:
+                columns |= {column for _, column, _ in CATEGORY_FIELDS}
+        if 'file_size_display' in self.fields:
+            columns.add('file_size')
+        return sorted(columns)
+
+    @staticmethod
+    def prepare(queryset: QuerySet, columns: Optional[List[str]] = None) -> QuerySet:
+        """
+        将素材查询集转换为只取所需列的 values() 查询集（保留筛选和排序）
+
+        Args:
+            queryset: 素材查询集
+            columns: 需要的列，默认为完整输出所需的列（字段选择时传入 self.columns）
+        """
+        return queryset.select_related(None).prefetch_related(None).values(*(columns or MATERIAL_COLUMNS))
+
+    def _queries(self, rows: List[dict]) -> Dict[str, QuerySet]:
+        """
+        一页素材需要的附加查询（只包含所选字段用到的）
+
+        - tags: 标签，顺序与预取 tags 时一致（按标签名）；未展开时只取标签ID
+        - counts: 分类的素材数（与 CategorySerializer.material_count 相同，不区分状态）
+        - favorited: 当前用户收藏的素材ID
+        """
+        material_ids = [row['id'] for row in rows]
+        queries = {}
+        if 'tags' in self.fields:
+            tags = Material.tags.through.objects.filter(material_id__in=material_ids).order_by('tag__name')
+            if 'tags' in self.expanded:
+                queries['tags'] = tags.values('material_id', *(column for _, column, _ in TAG_FIELDS))
+            else:
+                queries['tags'] = tags.values('material_id', 'tag_id')
+        if 'category' in self.fields and 'category' in self.expanded:
+            category_ids = {row['category_id'] for row in rows if row['category_id'] is not None}
+            queries['counts'] = (
+                Material.objects.filter(category_id__in=category_ids).order_by()
+                .values('category_id').annotate(total=Count('pk'))
+            )
+        user = getattr(self.request, 'user', None)
+        if 'is_favorited' in self.fields and user is not None and user.is_authenticated:
+            queries['favorited'] = (
+                Favorite.objects.filter(user=user, material_id__in=material_ids).values('material_id')
+            )
+        return queries
+
+    def _category(self, row: dict, counts: Dict[int, int]):
+        if row['category_id'] is None or 'category' not in self.expanded:
+            return row['category_id']
+        category = extract(row, CATEGORY_FIELDS, self.request)
+        category['material_count'] = counts.get(row['category_id'], 0)
+        return {name: category[name] for name in CategorySerializer.Meta.fields}
+
+    def build(self, rows: List[dict], results: Dict[str, List[dict]]) -> List[dict]:
+        """
+        由素材行和附加查询结果构造输出
+
+        Args:
+            rows: values() 行
+            results: _queries() 各查询的结果行
+        """
+        tags = defaultdict(list)
+        for row in results.get('tags', ()):
+            if 'tags' in self.expanded:
+                tags[row['material_id']].append(extract(row, TAG_FIELDS, self.request))
+            else:
+                tags[row['material_id']].append(row['tag_id'])
+        counts = {row['category_id']: row['total'] for row in results.get('counts', ())}
+        favorited = {row['material_id'] for row in results.get('favorited', ())}
+
+        fields = self.fields
+        request = self.request
+        output = []
+        for row in rows:
+            data = extract(row, self.material_fields, request)
+            if 'author' in fields:
+                data['author'] = extract(row, AUTHOR_FIELDS, request) if 'author' in self.expanded else row['author_id']
+            if 'category' in fields:
+                data['category'] = self._category(row, counts)
+            if 'tags' in fields:
+                data['tags'] = tags.get(row['id'], [])
+            if 'file_size_display' in fields:
+                data['file_size_display'] = format_file_size(row['file_size'])
+            if 'is_favorited' in fields:
+                data['is_favorited'] = row['id'] in favorited
+            output.append({name: data[name] for name in fields})
+        return output
+
+    def serialize(self, rows: Iterable[dict]) -> List[dict]:
+        """
+        序列化 prepare() 得到的行
+
+        Args:
+            rows: values() 行（通常是分页后的一页）
+
+        Returns:
+            List[dict]: 与 MaterialListSerializer(many=True).data 相同的数据
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        return self.build(rows, {name: list(query) for name, query in self._queries(rows).items()})
+
+    async def aserialize(self, rows: List[dict]) -> List[dict]:
+        """serialize() 的异步版本，rows 为已取出的 values() 行"""
+        if not rows:
+            return []
+        results = {}
+        for name, query in self._queries(rows).items():
+            results[name] = [row async for row in query]
+        return self.build(rows, results)
+
+    def serialize_ids(self, material_ids: List[int]) -> Dict[int, dict]:
+        """按主键序列化素材，返回 {素材ID: 数据}"""
+        rows = list(self.prepare(Material.objects.filter(pk__in=material_ids), self.columns))
+        return dict(zip((row['id'] for row in rows), self.serialize(rows)))
+
+
+class FastMaterialDetailSerializer(FastMaterialListSerializer):
+    """素材详情快速序列化器，输出与 MaterialDetailSerializer 相同"""
+    serializer_class = MaterialDetailSerializer
+    extractors = DETAIL_FIELDS
+
+
+FAVORITE_FIELDS = compile_fields(Favorite, [name for name in FavoriteSerializer.Meta.fields if name != 'material'])
+
+
+class FastFavoriteListSerializer:
+    """收藏列表快速序列化器，嵌套素材由 FastMaterialListSerializer 批量序列化"""
+
+    def __init__(self, context: Optional[dict] = None):
+        self.context = context or {}
+
+    @staticmethod
+    def prepare(queryset: QuerySet) -> QuerySet:
+        return queryset.select_related(None).prefetch_related(None).values(
+            'material_id', *(column for _, column, _ in FAVORITE_FIELDS)
+        )
+
+    def serialize(self, rows: Iterable[dict]) -> List[dict]:
+        rows = list(rows)
+        materials = FastMaterialListSerializer(self.context).serialize_ids([row['material_id'] for row in rows])
+        request = self.context.get('request')
+        results = []
+        for row in rows:
+            favorite = extract(row, FAVORITE_FIELDS, request)
+            favorite['material'] = materials.get(row['material_id'])
+            results.append({name: favorite[name] for name in FavoriteSerializer.Meta.fields})
+        return results
@@ -0,0 +1,81 @@
+"""
+收藏模块
+收藏/取消收藏的短事务实现，收藏计数随收藏记录在同一事务内更新
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .counters import read_counter
+from .models import Material, Favorite
+
+logger = logging.getLogger(__name__)
+
+
+def add_favorite(user_id: int, material_id: int) -> Optional[Favorite]:
+    """
+    添加收藏并增加收藏计数
+
+    先执行带条件的计数 UPDATE（同时校验素材存在且已发布，并在
+    PostgreSQL 上锁定该行），再插入收藏记录。
+
+    Returns:
+        Optional[Favorite]: 新增的收藏记录，已收藏时返回 None；
+        素材不存在或未发布时抛出 Material.DoesNotExist
+    """
+    try:
+        with transaction.atomic():
+            updated = Material.objects.filter(pk=material_id, status='approved').update(
+                favorite_count=F('favorite_count') + 1
+            )
+            if not updated:
+                raise Material.DoesNotExist
+            return Favorite.objects.create(user_id=user_id, material_id=material_id)
+    except IntegrityError:
+        # 已存在相同的 (user, material)，计数更新随事务一起回滚
+        return None
+
+
+def remove_favorite(user_id: int, material_id: int) -> bool:
+    """
+    取消收藏并减少收藏计数
+
+    Returns:
+        bool: 是否删除了收藏记录
+    """
+    with transaction.atomic():
+        deleted, _ = Favorite.objects.filter(user_id=user_id, material_id=material_id).delete()
+        if deleted:
+            Material.objects.filter(pk=material_id, favorite_count__gt=0).update(
+                favorite_count=F('favorite_count') - 1
+            )
+    return bool(deleted)
+
+
+def toggle_favorite(user_id: int, material_id: int) -> Tuple[bool, int]:
+    """
+    切换收藏状态
+
+    利用 (user, material) 唯一约束执行"删除或插入"：删除命中则为取消收藏，
+    否则插入新收藏。计数使用条件 UPDATE，不加载素材对象。
+
+    Args:
+        user_id: 用户ID
+        material_id: 素材ID
+
+    Returns:
+        Tuple[bool, int]: (当前是否已收藏, 当前收藏数)
+    """
+    with transaction.atomic():
+        if remove_favorite(user_id, material_id):
+            favorited = False
+        else:
+            add_favorite(user_id, material_id)
+            favorited = True
+
+    count = read_counter(Material, material_id, 'favorite_count')
+    logger.info(f"User {user_id} {'favorited' if favorited else 'unfavorited'} material {material_id}")
+    return favorited, count
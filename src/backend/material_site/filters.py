@@ -6,6 +6,7 @@
 import django_filters
 from django.db.models import QuerySet
 from .models import Material
+from .tag_index import any_of, filter_by_tags, parse_expression
 
 
 class MaterialFilter(django_filters.FilterSet):
@@ -15,7 +16,8 @@ class MaterialFilter(django_filters.FilterSet):
 
     Attributes:
         category: 按分类筛选
-        tags: 按标签筛选
+        tags: 按标签筛选（任一标签）
+        tag_expr: 按标签表达式筛选（AND/OR/NOT）
         material_type: 按素材类型筛选
         license_type: 按许可类型筛选
         min_price: 最小价格筛选
@@ -33,13 +35,20 @@ class MaterialFilter(django_filters.FilterSet):
         help_text='按标签筛选，多个标签用逗号分隔'
     )
 
+    tag_expr = django_filters.CharFilter(
+        method='filter_tag_expr',
+        help_text='标签表达式，例如 nature AND (city OR night) AND NOT people'
+    )
+
     material_type = django_filters.MultipleChoiceFilter(
         choices=Material.MATERIAL_TYPES,
+        distinct=False,  # 本表字段筛选不会产生重复行，避免额外的 DISTINCT 排序
         help_text='按素材类型筛选'
     )
 
     license_type = django_filters.MultipleChoiceFilter(
         choices=Material.LICENSE_CHOICES,
+        distinct=False,
         help_text='按许可类型筛选'
     )
 
@@ -69,7 +78,7 @@ class MaterialFilter(django_filters.FilterSet):
     class Meta:
         model = Material
         fields = [
-            'category', 'tags', 'material_type', 'license_type',
+            'category', 'tags', 'tag_expr', 'material_type', 'license_type',
             'min_price', 'max_price', 'is_featured', 'search'
         ]
 
@@ -88,5 +97,21 @@ class MaterialFilter(django_filters.FilterSet):
         if value:
             tags = [tag.strip() for tag in value.split(',') if tag.strip()]
             if tags:
-                return queryset.filter(tags__slug__in=tags).distinct()
+                return filter_by_tags(queryset, any_of(tags))
+        return queryset
+
+    def filter_tag_expr(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+        """
+        按标签表达式筛选素材
+
+        Args:
+            queryset: 原始查询集
+            name: 字段名
+            value: 标签表达式
+
+        Returns:
+            QuerySet: 筛选后的查询集
+        """
+        if value and value.strip():
+            return filter_by_tags(queryset, parse_expression(value))
         return queryset
\ No newline at end of file
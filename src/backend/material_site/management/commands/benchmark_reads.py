@@ -0,0 +1,128 @@
+"""
+只读接口并发压测命令
+对一个或多个已启动的服务（如 gunicorn WSGI 与 uvicorn ASGI 部署）以相同并发请求热点读取接口，
+输出吞吐量和延迟分位数，用于比较单个 worker 能承载的并发。
+
+示例（两个服务各 1 个 worker）：
+    gunicorn backend.wsgi:application --bind 127.0.0.1:8000 --workers 1 --threads 8
+    ASYNC_READ_VIEWS=True uvicorn backend.asgi:application --port 8001 --workers 1
+    python manage.py benchmark_reads http://127.0.0.1:8000 http://127.0.0.1:8001 --concurrency 64
+"""
+
+import http.client
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    '/api/materials/',
+    '/api/materials/?fields=id,title,thumbnail',
+    '/api/materials/facets/',
+    '/api/categories/',
+    '/api/tags/',
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """已排序列表的分位数"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_load(target: str, paths: List[str], concurrency: int, duration: float, headers: Dict[str, str]) -> dict:
+    """
+    以固定并发在 duration 秒内循环请求 paths
+
+    每个线程保持一条 keep-alive 连接，出错后重新建立连接。
+
+    Returns:
+        dict: requests / errors / rps / 延迟分位数（毫秒）
+    """
+    parts = urlsplit(target)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset: int):
+        connection = connection_class(parts.hostname, parts.port, timeout=30)
+        local, failed, index = [], 0, offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                local.append((time.perf_counter() - started) * 1000)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connection_class(parts.hostname, parts.port, timeout=30)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = '以相同并发压测多个已启动服务的只读接口（用于对比 WSGI 与 ASGI 部署）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='服务地址，例如 http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='请求路径，可重复指定；默认素材列表、分面、分类和标签')
+        parser.add_argument('--concurrency', type=int, default=32, help='并发连接数')
+        parser.add_argument('--duration', type=float, default=10.0, help='每个服务的压测时长（秒）')
+        parser.add_argument('--warmup', type=float, default=2.0, help='正式压测前的预热时长（秒）')
+        parser.add_argument('--token', help='JWT access token，以登录用户身份请求')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency 必须大于 0')
+        paths = options['paths'] or DEFAULT_PATHS
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+
+        self.stdout.write(
+            f"并发 {options['concurrency']}，每个服务 {options['duration']:.0f}s，路径: {', '.join(paths)}"
+        )
+        self.stdout.write(f"{'服务':<32}{'请求数':>10}{'错误':>8}{'req/s':>10}"
+                          f"{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+        for target in options['targets']:
+            if options['warmup'] > 0:
+                run_load(target, paths, options['concurrency'], options['warmup'], headers)
+            result = run_load(target, paths, options['concurrency'], options['duration'], headers)
+            self.stdout.write(
+                f"{target:<32}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+                f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS('压测完成'))
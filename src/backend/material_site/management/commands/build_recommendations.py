@@ -0,0 +1,28 @@
+"""
+推荐计算命令
+基于收藏和下载记录离线计算素材推荐与用户推荐
+"""
+
+from django.core.management.base import BaseCommand
+
+from material_site.recommendations import build_recommendations, get_config
+
+
+class Command(BaseCommand):
+    help = '离线计算协同过滤推荐（建议每天执行一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--block-size', type=int, help='每块计算并写入数据库的素材/用户行数（素材相似度每次乘法的结果另受 MAX_PRODUCT_NNZ 限制）')
+        parser.add_argument('--active-days', type=int, help='只为最近 N 天活跃的用户生成推荐')
+
+    def handle(self, *args, **options):
+        config = get_config()
+        if options['block_size']:
+            config['BLOCK_SIZE'] = options['block_size']
+        if options['active_days']:
+            config['ACTIVE_USER_DAYS'] = options['active_days']
+
+        material_count, user_count = build_recommendations(config)
+        self.stdout.write(self.style.SUCCESS(
+            f'推荐计算完成: {material_count} 个素材, {user_count} 个用户'
+        ))
@@ -0,0 +1,16 @@
+"""
+热度计算命令
+按时间衰减更新素材热度分
+"""
+
+from django.core.management.base import BaseCommand
+
+from material_site.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = '增量更新素材热度分（建议每10-15分钟执行一次）'
+
+    def handle(self, *args, **options):
+        count = compute_trending()
+        self.stdout.write(self.style.SUCCESS(f'热度计算完成: {count} 个素材有新增热度'))
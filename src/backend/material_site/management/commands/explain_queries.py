@@ -0,0 +1,66 @@
+"""
+查询计划分析命令
+对素材/收藏接口的典型查询执行 EXPLAIN，标记全表扫描和额外排序，
+并检查执行计划是否使用了场景登记的索引
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from material_site.query_plans import SCENARIOS, explain_scenarios
+
+
+class Command(BaseCommand):
+    help = '分析热点查询的执行计划（SQLite/PostgreSQL），需在有代表性数据的库上执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='只分析指定查询，可选: ' + ', '.join(s['name'] for s in SCENARIOS))
+        parser.add_argument('--user', type=int, help='作为当前用户的用户ID（我的素材/收藏查询）')
+        parser.add_argument('--analyze', action='store_true', help='PostgreSQL 下执行 EXPLAIN ANALYZE')
+        parser.add_argument('--sql', action='store_true', help='输出 SQL')
+        parser.add_argument('--plan', action='store_true', help='输出完整执行计划（有问题的查询总是输出）')
+
+    def handle(self, *args, **options):
+        known = {scenario['name'] for scenario in SCENARIOS}
+        unknown = set(options['names']) - known
+        if unknown:
+            raise CommandError(f'未知查询: {", ".join(sorted(unknown))}')
+
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(pk=options['user']).first()
+            if user is None:
+                raise CommandError(f'用户不存在: {options["user"]}')
+
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(f'{connection.vendor} 只输出执行计划，不做分析'))
+
+        results = explain_scenarios(options['names'], user=user, analyze=options['analyze'])
+        flagged = 0
+        for result in results:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{result['name']}: {result['description']}"))
+            if result['empty']:
+                self.stdout.write('  结果为空，查询未发往数据库')
+                continue
+            if options['sql']:
+                self.stdout.write(result['sql'])
+            if options['plan'] or result['issues']:
+                self.stdout.write(result['plan'])
+
+            if result['issues']:
+                flagged += 1
+                for issue in result['issues']:
+                    self.stdout.write(self.style.WARNING(f'  ! {issue}'))
+            else:
+                self.stdout.write(self.style.SUCCESS('  未发现全表扫描或额外排序'))
+
+            index = result['index']
+            if index and index['used']:
+                self.stdout.write(f"  使用索引 {index['name']}")
+            elif index and result['issues']:
+                condition = f" WHERE {index['condition']}" if index['condition'] else ''
+                state = '已创建但未被使用' if index['applied'] else ('已定义，未迁移' if index['defined'] else '未定义')
+                self.stdout.write(f"  建议索引 {index['name']} ({', '.join(index['fields'])}){condition}: {state}")
+
+        self.stdout.write(self.style.SUCCESS(f'分析完成: {len(results)} 个查询，{flagged} 个存在问题'))
@@ -0,0 +1,48 @@
+"""
+素材目录导出命令
+以 NDJSON 或 CSV 流式导出全部已发布素材，可选 gzip 压缩
+"""
+
+import codecs
+import sys
+
+from django.core.management.base import BaseCommand
+
+from material_site.exports import DEFAULT_CHUNK_SIZE, OUTPUT_FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = '导出全部已发布素材（含作者、分类和标签名称）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=OUTPUT_FORMATS, default='ndjson', help='导出格式')
+        parser.add_argument('--file', help='输出文件路径，默认写到标准输出')
+        parser.add_argument('--gzip', action='store_true', help='gzip 压缩（未指定 --file 时写到进程的标准输出）')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='每批读取的行数')
+
+    def handle(self, *args, **options):
+        stream = export_stream(options['output'], compress=options['gzip'], chunk_size=options['chunk_size'])
+
+        if not options['file'] and options['gzip']:
+            # 压缩内容是二进制，直接写到进程标准输出的字节缓冲区（用于管道重定向）
+            for chunk in stream:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        if not options['file']:
+            # 文本内容写入命令的输出流，call_command 可通过 stdout 参数捕获；
+            # 增量解码避免字节块在多字节字符中间截断
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for chunk in stream:
+                self.stdout.write(decoder.decode(chunk), ending='')
+            self.stdout.write(decoder.decode(b'', final=True), ending='')
+            self.stdout.flush()
+            return
+
+        size = 0
+        with open(options['file'], 'wb') as target:
+            for chunk in stream:
+                target.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'导出完成: {options["file"]} ({size} 字节)'))
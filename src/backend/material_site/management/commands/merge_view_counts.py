@@ -0,0 +1,24 @@
+"""
+浏览统计合并命令
+将共享缓存中的 HyperLogLog 草图合并到每日统计表和素材浏览数
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from material_site.view_tracking import merge_view_counts
+
+
+class Command(BaseCommand):
+    help = '合并浏览草图到 material_daily_views 和 materials.view_count（建议每几分钟执行一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='回溯天数')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批处理的日统计行数')
+
+    def handle(self, *args, **options):
+        try:
+            count = merge_view_counts(days=options['days'], batch_size=options['batch_size'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'浏览统计合并完成: {count} 条日统计'))
@@ -0,0 +1,19 @@
+"""
+相似素材重建命令
+增量（默认）或全量重算相似素材 Top-N 列表
+"""
+
+from django.core.management.base import BaseCommand
+
+from material_site.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = '重算相似素材列表（默认只处理上次构建后发生变化的素材）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='全量重建')
+
+    def handle(self, *args, **options):
+        count = rebuild_similar(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'相似素材重建完成: {count} 个素材'))
@@ -0,0 +1,18 @@
+"""
+标签位图索引重建命令
+从数据库全量构建新一代索引并切换；建议定期执行，兜底绕过信号的批量修改
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from material_site.tag_index import tag_index
+
+
+class Command(BaseCommand):
+    help = '全量重建标签位图索引（写入共享缓存）'
+
+    def handle(self, *args, **options):
+        if not tag_index.enabled():
+            raise CommandError('标签位图索引未启用或 TAG_INDEX 的 CACHE_ALIAS 不是共享缓存')
+        count = tag_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'标签位图索引重建完成: {count} 个标签'))
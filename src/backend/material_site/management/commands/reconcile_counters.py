@@ -0,0 +1,39 @@
+"""
+统计计数对账命令
+根据收藏表、下载记录和素材表重算冗余计数字段
+"""
+
+from django.core.management.base import BaseCommand
+
+from material_site.counters import (
+    DEFAULT_CHUNK_SIZE, reconcile_material_counters, reconcile_user_counters
+)
+
+
+class Command(BaseCommand):
+    help = '重算素材和用户的冗余统计字段（收藏数、下载数、素材数、被下载次数）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='每条 UPDATE 语句覆盖的主键区间大小'
+        )
+        parser.add_argument(
+            '--only',
+            choices=['materials', 'users'],
+            help='只对账指定对象'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        only = options['only']
+
+        if only in (None, 'materials'):
+            count = reconcile_material_counters(chunk_size=chunk_size)
+            self.stdout.write(self.style.SUCCESS(f'素材计数对账完成: {count} 条'))
+
+        if only in (None, 'users'):
+            count = reconcile_user_counters(chunk_size=chunk_size)
+            self.stdout.write(self.style.SUCCESS(f'用户计数对账完成: {count} 条'))
@@ -0,0 +1,34 @@
+"""
+统计汇总命令
+按天汇总下载记录和新增收藏，可选归档超过保留期的原始下载记录
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from material_site.rollups import archive_downloads, get_config, rollup_downloads, rollup_favorites
+
+
+class Command(BaseCommand):
+    help = '按天汇总下载和收藏（建议每小时执行一次），--archive 时归档并删除过期原始下载记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='从指定日期（YYYY-MM-DD）开始重新汇总')
+        parser.add_argument('--archive', action='store_true', help='归档超过保留期的原始下载记录')
+        parser.add_argument('--retention-days', type=int, help='原始记录保留天数')
+        parser.add_argument('--archive-dir', help='归档文件目录')
+
+    def handle(self, *args, **options):
+        rows = rollup_downloads(since=options['since'])
+        self.stdout.write(self.style.SUCCESS(f'下载汇总完成: {rows} 条素材日汇总'))
+
+        rows = rollup_favorites(since=options['since'])
+        self.stdout.write(self.style.SUCCESS(f'收藏汇总完成: {rows} 条素材日汇总'))
+
+        if options['archive']:
+            deleted = archive_downloads(
+                retention_days=options['retention_days'],
+                archive_dir=options['archive_dir'] or get_config()['ARCHIVE_DIR'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'归档完成: 删除 {deleted} 条原始下载记录'))
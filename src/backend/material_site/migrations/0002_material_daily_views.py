@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('unique_views', models.IntegerField(default=0, verbose_name='独立访客数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='material_site.material')),
+            ],
+            options={
+                'verbose_name': '每日浏览统计',
+                'verbose_name_plural': '每日浏览统计',
+                'db_table': 'material_daily_views',
+                'indexes': [models.Index(fields=['date'], name='material_da_date_8b47fe_idx')],
+                'unique_together': {('material', 'date')},
+            },
+        ),
+    ]
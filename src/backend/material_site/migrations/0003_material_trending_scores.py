@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0002_material_daily_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialTrendingScore',
+            fields=[
+                ('material', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='material_site.material', verbose_name='素材')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='热度分')),
+                ('like_snapshot', models.IntegerField(default=0, verbose_name='上次计算时的点赞数')),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='计算时间')),
+            ],
+            options={
+                'verbose_name': '素材热度',
+                'verbose_name_plural': '素材热度',
+                'db_table': 'material_trending_scores',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0003_material_trending_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='相似度')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('computed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='计算时间')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_items', to='material_site.material')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='material_site.material')),
+            ],
+            options={
+                'verbose_name': '相似素材',
+                'verbose_name_plural': '相似素材',
+                'db_table': 'similar_materials',
+                'ordering': ['material', 'rank'],
+                'indexes': [models.Index(fields=['material', 'rank'], name='similar_mat_materia_a41fbf_idx')],
+                'unique_together': {('material', 'similar')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0004_similar_materials'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='推荐分')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('computed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='计算时间')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='material_site.material')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='material_site.material')),
+            ],
+            options={
+                'verbose_name': '素材推荐',
+                'verbose_name_plural': '素材推荐',
+                'db_table': 'material_recommendations',
+                'ordering': ['material', 'rank'],
+                'indexes': [models.Index(fields=['material', 'rank'], name='material_re_materia_6d2eaf_idx')],
+                'unique_together': {('material', 'recommended')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='推荐分')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('computed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='计算时间')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='material_site.material')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '用户推荐',
+                'verbose_name_plural': '用户推荐',
+                'db_table': 'user_recommendations',
+                'ordering': ['user', 'rank'],
+                'indexes': [models.Index(fields=['user', 'rank'], name='user_recomm_user_id_9889cf_idx')],
+                'unique_together': {('user', 'material')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0005_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAuthorDownloads',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('downloads', models.IntegerField(default=0, verbose_name='被下载次数')),
+                ('archived', models.BooleanField(default=False, verbose_name='原始记录已归档')),
+            ],
+            options={
+                'verbose_name': '作者每日下载',
+                'verbose_name_plural': '作者每日下载',
+                'db_table': 'daily_author_downloads',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMaterialDownloads',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('downloads', models.IntegerField(default=0, verbose_name='下载次数')),
+                ('archived', models.BooleanField(default=False, verbose_name='原始记录已归档')),
+            ],
+            options={
+                'verbose_name': '素材每日下载',
+                'verbose_name_plural': '素材每日下载',
+                'db_table': 'daily_material_downloads',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='downloadhistory',
+            index=models.Index(fields=['downloaded_at'], name='download_hi_downloa_e1b40e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='downloadhistory',
+            index=models.Index(fields=['material', 'downloaded_at'], name='download_hi_materia_513262_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyauthordownloads',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_downloads', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='dailymaterialdownloads',
+            name='material',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_downloads', to='material_site.material'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyauthordownloads',
+            index=models.Index(fields=['date'], name='daily_autho_date_7f0be1_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyauthordownloads',
+            unique_together={('author', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='dailymaterialdownloads',
+            index=models.Index(fields=['date'], name='daily_mater_date_d01703_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailymaterialdownloads',
+            unique_together={('material', 'date')},
+        ),
+    ]
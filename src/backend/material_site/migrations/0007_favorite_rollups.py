@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0006_download_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAuthorFavorites',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('favorites', models.IntegerField(default=0, verbose_name='新增收藏数')),
+            ],
+            options={
+                'verbose_name': '作者每日收藏',
+                'verbose_name_plural': '作者每日收藏',
+                'db_table': 'daily_author_favorites',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMaterialFavorites',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('favorites', models.IntegerField(default=0, verbose_name='新增收藏数')),
+            ],
+            options={
+                'verbose_name': '素材每日收藏',
+                'verbose_name_plural': '素材每日收藏',
+                'db_table': 'daily_material_favorites',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['created_at'], name='favorites_created_b09698_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyauthorfavorites',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_favorites', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='dailymaterialfavorites',
+            name='material',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_favorites', to='material_site.material'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyauthorfavorites',
+            index=models.Index(fields=['date'], name='daily_autho_date_fec717_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyauthorfavorites',
+            unique_together={('author', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='dailymaterialfavorites',
+            index=models.Index(fields=['date'], name='daily_mater_date_11df3c_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailymaterialfavorites',
+            unique_together={('material', 'date')},
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0007_favorite_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-created_at'], name='material_approved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['category', '-created_at'], name='material_approved_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['price'], name='material_approved_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-download_count'], name='material_approved_dl_idx'),
+        ),
+    ]
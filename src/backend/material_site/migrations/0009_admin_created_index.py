@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0008_approved_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['created_at'], name='material_created_idx'),
+        ),
+    ]
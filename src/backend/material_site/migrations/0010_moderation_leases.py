@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('material_site', '0009_admin_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationLease',
+            fields=[
+                ('material', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='moderation_lease', serialize=False, to='material_site.material', verbose_name='素材')),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='领取时间')),
+                ('expires_at', models.DateTimeField(verbose_name='到期时间')),
+            ],
+            options={
+                'verbose_name': '审核租约',
+                'verbose_name_plural': '审核租约',
+                'db_table': 'moderation_leases',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='material_pending_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='moderationlease',
+            name='moderator',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_leases', to=settings.AUTH_USER_MODEL, verbose_name='审核员'),
+        ),
+        migrations.AddIndex(
+            model_name='moderationlease',
+            index=models.Index(fields=['moderator', 'expires_at'], name='moderation__moderat_8eae08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moderationlease',
+            index=models.Index(fields=['expires_at'], name='moderation__expires_427131_idx'),
+        ),
+    ]
@@ -1,9 +1,23 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 
 
+def format_file_size(file_size: int) -> str:
+    """人类可读的文件大小"""
+    if file_size == 0:
+        return "0 B"
+    size_names = ["B", "KB", "MB", "GB"]
+    i = 0
+    size = file_size
+    while size >= 1024 and i < len(size_names) - 1:
+        size /= 1024.0
+        i += 1
+    return f"{size:.2f} {size_names[i]}"
+
+
 class Category(models.Model):
     """素材分类"""
     name = models.CharField(max_length=50, unique=True, verbose_name='分类名称')
@@ -191,6 +205,20 @@ class Material(models.Model):
             models.Index(fields=['status', 'material_type']),
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['view_count', 'download_count']),
+            # 后台按创建时间排序和日期层级导航（Min/Max 取索引两端）
+            models.Index(fields=['created_at'], name='material_created_idx'),
+            # 审核队列按提交时间领取待审核素材
+            models.Index(fields=['created_at'], condition=Q(status='pending'),
+                         name='material_pending_created_idx'),
+            # 列表接口只查询已发布素材，部分索引同时覆盖筛选和排序（见 explain_queries 命令）
+            models.Index(fields=['-created_at'], condition=Q(status='approved'),
+                         name='material_approved_created_idx'),
+            models.Index(fields=['category', '-created_at'], condition=Q(status='approved'),
+                         name='material_approved_cat_idx'),
+            models.Index(fields=['price'], condition=Q(status='approved'),
+                         name='material_approved_price_idx'),
+            models.Index(fields=['-download_count'], condition=Q(status='approved'),
+                         name='material_approved_dl_idx'),
         ]
 
     def __str__(self):
@@ -225,15 +253,7 @@ class Material(models.Model):
     @property
     def file_size_display(self):
         """人类可读的文件大小"""
-        if self.file_size == 0:
-            return "0 B"
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        size = self.file_size
-        while size >= 1024 and i < len(size_names) - 1:
-            size /= 1024.0
-            i += 1
-        return f"{size:.2f} {size_names[i]}"
+        return format_file_size(self.file_size)
 
 
 class Favorite(models.Model):
@@ -247,6 +267,30 @@ class Favorite(models.Model):
         unique_together = ['user', 'material']  # 防止重复收藏
         verbose_name = '收藏'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+
+class ModerationLease(models.Model):
+    """审核队列租约：审核员领取的待审核素材，到期前其他审核员不会领取"""
+    material = models.OneToOneField(
+        Material, on_delete=models.CASCADE, primary_key=True, related_name='moderation_lease', verbose_name='素材'
+    )
+    moderator = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='moderation_leases', verbose_name='审核员'
+    )
+    claimed_at = models.DateTimeField(default=timezone.now, verbose_name='领取时间')
+    expires_at = models.DateTimeField(verbose_name='到期时间')
+
+    class Meta:
+        db_table = 'moderation_leases'
+        verbose_name = '审核租约'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['moderator', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
 
 
 class DownloadHistory(models.Model):
@@ -260,3 +304,166 @@ class DownloadHistory(models.Model):
         db_table = 'download_history'
         verbose_name = '下载记录'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['downloaded_at']),
+            models.Index(fields=['material', 'downloaded_at']),
+        ]
+
+
+class MaterialDailyViews(models.Model):
+    """素材每日独立访客数（由 HyperLogLog 草图估计）"""
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField(verbose_name='日期')
+    unique_views = models.IntegerField(default=0, verbose_name='独立访客数')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'material_daily_views'
+        unique_together = ['material', 'date']
+        verbose_name = '每日浏览统计'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class MaterialTrendingScore(models.Model):
+    """素材热度分（按时间衰减，由 compute_trending 定期更新）"""
+    material = models.OneToOneField(
+        Material,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='素材'
+    )
+    score = models.FloatField(default=0, db_index=True, verbose_name='热度分')
+    like_snapshot = models.IntegerField(default=0, verbose_name='上次计算时的点赞数')
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='计算时间')
+
+    class Meta:
+        db_table = 'material_trending_scores'
+        verbose_name = '素材热度'
+        verbose_name_plural = verbose_name
+
+
+class SimilarMaterial(models.Model):
+    """相似素材（按标签/分类重合度预先计算的 Top-N 列表）"""
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='similar_items')
+    similar = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(verbose_name='相似度')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='计算时间')
+
+    class Meta:
+        db_table = 'similar_materials'
+        unique_together = ['material', 'similar']
+        ordering = ['material', 'rank']
+        verbose_name = '相似素材'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['material', 'rank']),
+        ]
+
+
+class MaterialRecommendation(models.Model):
+    """素材协同过滤推荐（下载/收藏过该素材的用户还下载/收藏了...）"""
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(verbose_name='推荐分')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='计算时间')
+
+    class Meta:
+        db_table = 'material_recommendations'
+        unique_together = ['material', 'recommended']
+        ordering = ['material', 'rank']
+        verbose_name = '素材推荐'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['material', 'rank']),
+        ]
+
+
+class UserRecommendation(models.Model):
+    """用户个性化推荐"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recommendations')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(verbose_name='推荐分')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='计算时间')
+
+    class Meta:
+        db_table = 'user_recommendations'
+        unique_together = ['user', 'material']
+        ordering = ['user', 'rank']
+        verbose_name = '用户推荐'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['user', 'rank']),
+        ]
+
+
+class DailyMaterialDownloads(models.Model):
+    """素材每日下载汇总"""
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='daily_downloads')
+    date = models.DateField(verbose_name='日期')
+    downloads = models.IntegerField(default=0, verbose_name='下载次数')
+    archived = models.BooleanField(default=False, verbose_name='原始记录已归档')
+
+    class Meta:
+        db_table = 'daily_material_downloads'
+        unique_together = ['material', 'date']
+        verbose_name = '素材每日下载'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class DailyAuthorDownloads(models.Model):
+    """作者每日被下载汇总"""
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_downloads')
+    date = models.DateField(verbose_name='日期')
+    downloads = models.IntegerField(default=0, verbose_name='被下载次数')
+    archived = models.BooleanField(default=False, verbose_name='原始记录已归档')
+
+    class Meta:
+        db_table = 'daily_author_downloads'
+        unique_together = ['author', 'date']
+        verbose_name = '作者每日下载'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class DailyMaterialFavorites(models.Model):
+    """素材每日新增收藏汇总"""
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='daily_favorites')
+    date = models.DateField(verbose_name='日期')
+    favorites = models.IntegerField(default=0, verbose_name='新增收藏数')
+
+    class Meta:
+        db_table = 'daily_material_favorites'
+        unique_together = ['material', 'date']
+        verbose_name = '素材每日收藏'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class DailyAuthorFavorites(models.Model):
+    """作者每日被收藏汇总"""
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_favorites')
+    date = models.DateField(verbose_name='日期')
+    favorites = models.IntegerField(default=0, verbose_name='新增收藏数')
+
+    class Meta:
+        db_table = 'daily_author_favorites'
+        unique_together = ['author', 'date']
+        verbose_name = '作者每日收藏'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['date']),
+        ]
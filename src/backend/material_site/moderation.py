@@ -0,0 +1,220 @@
+"""
+批量审核模块
+以单条 UPDATE 批量发布、拒绝、推荐素材，不逐行执行 Material.save()；
+更新后发送一次 materials_moderated 信号，由接收方批量刷新索引和缓存。
+
+审核队列：审核员按批领取待审核素材并获得租约，租约期内其他审核员领取不到这些素材；
+租约到期或主动释放后素材回到队列
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from src.backend.exceptions import ValidationError
+from .models import Material, ModerationLease
+
+logger = logging.getLogger(__name__)
+
+# 单次 API 请求最多处理的素材数
+MAX_BATCH_SIZE = 10000
+
+DEFAULTS = {
+    'LEASE_SECONDS': 300,   # 租约时长，审核员可在到期前续期
+    'CLAIM_SIZE': 10,       # 默认每次领取的数量
+    'MAX_CLAIM_SIZE': 50,   # 每次最多领取的数量
+}
+
+# 审核动作 -> 要更新的字段值
+ACTIONS: Dict[str, dict] = {
+    'approve': {'status': 'approved'},
+    'reject': {'status': 'rejected'},
+    'feature': {'is_featured': True},
+    'unfeature': {'is_featured': False},
+}
+
+# 批量审核完成（事务提交前）后发送；参数 action、material_ids（实际发生变化的素材）
+materials_moderated = Signal()
+
+
+def get_config() -> dict:
+    """读取 settings.MODERATION_QUEUE 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'MODERATION_QUEUE', {})}
+
+
+def moderate(materials: Union[QuerySet, Iterable[int]], action: str) -> List[int]:
+    """
+    批量审核素材
+
+    只更新字段值确实会变化的素材；发布时 published_at 为空的设为当前时间，
+    已有发布时间的保留。同时刷新 updated_at，供增量任务识别变化。
+
+    Args:
+        materials: 素材查询集或素材ID列表
+        action: approve / reject / feature / unfeature
+
+    Returns:
+        List[int]: 实际更新的素材ID
+
+    Raises:
+        ValidationError: 未知的审核动作
+    """
+    if action not in ACTIONS:
+        raise ValidationError(f"未知的审核动作: {action}")
+    values = ACTIONS[action]
+    queryset = materials if isinstance(materials, QuerySet) else Material.objects.filter(pk__in=list(materials))
+
+    changed = Q()
+    for field, value in values.items():
+        changed |= ~Q(**{field: value})
+    now = timezone.now()
+    updates = {**values, 'updated_at': now}
+    if values.get('status') == 'approved':
+        updates['published_at'] = Coalesce('published_at', Value(now))
+
+    with transaction.atomic():
+        material_ids = list(
+            queryset.filter(changed).order_by('pk').select_for_update().values_list('pk', flat=True)
+        )
+        if material_ids:
+            Material.objects.filter(pk__in=material_ids).update(**updates)
+            materials_moderated.send(sender=Material, action=action, material_ids=material_ids)
+
+    logger.info(f"Bulk moderation {action}: {len(material_ids)} materials updated")
+    return material_ids
+
+
+# ========== 审核队列 ==========
+
+def queue_queryset(now: datetime) -> QuerySet:
+    """
+    可领取的待审核素材（没有租约或租约已到期），按提交时间排序
+
+    以 NOT EXISTS 子查询排除持有有效租约的素材，不关联租约表：
+    PostgreSQL 不允许对外连接中可为空的一侧加 FOR UPDATE
+    """
+    active_lease = ModerationLease.objects.filter(material=OuterRef('pk'), expires_at__gt=now)
+    return (
+        Material.objects.filter(status='pending')
+        .filter(~Exists(active_lease))
+        .order_by('created_at', 'pk')
+    )
+
+
+def claim(moderator, size: Optional[int] = None) -> List[ModerationLease]:
+    """
+    领取一批待审核素材
+
+    支持 SKIP LOCKED 的数据库（PostgreSQL、MySQL 8）锁定候选素材行并跳过其他审核员正在领取的行，
+    再以 upsert 写入租约（覆盖已到期的租约）；
+    其他数据库先删除到期租约，再以 ignore_conflicts 插入，读回实际写入成功的租约，
+    并发领取时冲突的素材留给先写入的审核员。
+
+    Args:
+        moderator: 审核员
+        size: 领取数量，默认 CLAIM_SIZE，最多 MAX_CLAIM_SIZE
+
+    Returns:
+        List[ModerationLease]: 领取到的租约（可能少于 size）
+    """
+    config = get_config()
+    size = min(max(size or config['CLAIM_SIZE'], 1), config['MAX_CLAIM_SIZE'])
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=config['LEASE_SECONDS'])
+    connection = connections[Material.objects.db]
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            material_ids = list(
+                queue_queryset(now).select_for_update(skip_locked=True).values_list('pk', flat=True)[:size]
+            )
+            ModerationLease.objects.bulk_create(
+                [ModerationLease(material_id=pk, moderator=moderator, claimed_at=now, expires_at=expires_at)
+                 for pk in material_ids],
+                update_conflicts=True, unique_fields=['material'],
+                update_fields=['moderator', 'claimed_at', 'expires_at']
+            )
+        else:
+            material_ids = list(queue_queryset(now).values_list('pk', flat=True)[:size])
+            ModerationLease.objects.filter(material_id__in=material_ids, expires_at__lte=now).delete()
+            ModerationLease.objects.bulk_create(
+                [ModerationLease(material_id=pk, moderator=moderator, claimed_at=now, expires_at=expires_at)
+                 for pk in material_ids],
+                ignore_conflicts=True
+            )
+        leases = list(
+            ModerationLease.objects.filter(material_id__in=material_ids, moderator=moderator, claimed_at=now)
+            .select_related('material').order_by('material__created_at', 'material_id')
+        )
+
+    logger.info(f"Moderator {moderator.pk} claimed {len(leases)} materials")
+    return leases
+
+
+def active_leases(moderator) -> QuerySet:
+    """审核员当前持有的未到期租约"""
+    return ModerationLease.objects.filter(moderator=moderator, expires_at__gt=timezone.now())
+
+
+def renew(moderator, material_ids: Iterable[int]) -> int:
+    """
+    续期审核员持有的未到期租约
+
+    Returns:
+        int: 续期的租约数（已到期或被他人领取的不会续期）
+    """
+    expires_at = timezone.now() + timedelta(seconds=get_config()['LEASE_SECONDS'])
+    return active_leases(moderator).filter(material_id__in=list(material_ids)).update(expires_at=expires_at)
+
+
+def release(moderator, material_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    释放租约，素材立即回到队列
+
+    Args:
+        moderator: 审核员
+        material_ids: 要释放的素材，None 表示全部
+
+    Returns:
+        int: 释放的租约数
+    """
+    leases = ModerationLease.objects.filter(moderator=moderator)
+    if material_ids is not None:
+        leases = leases.filter(material_id__in=list(material_ids))
+    deleted, _ = leases.delete()
+    return deleted
+
+
+def decide(moderator, material_ids: Iterable[int], action: str) -> Dict[str, List[int]]:
+    """
+    对持有租约的素材执行审核并结束租约
+
+    Args:
+        moderator: 审核员
+        material_ids: 素材ID
+        action: approve / reject
+
+    Returns:
+        Dict[str, List[int]]: updated 为已审核的素材，skipped 为未持有有效租约的素材
+
+    Raises:
+        ValidationError: 审核动作不是 approve / reject
+    """
+    if action not in ('approve', 'reject'):
+        raise ValidationError("审核队列只支持 approve / reject")
+    material_ids = list(material_ids)
+    with transaction.atomic():
+        owned = list(
+            active_leases(moderator).filter(material_id__in=material_ids)
+            .select_for_update().values_list('material_id', flat=True)
+        )
+        updated = moderate(Material.objects.filter(pk__in=owned, status='pending'), action)
+        ModerationLease.objects.filter(material_id__in=owned).delete()
+    return {'updated': updated, 'skipped': sorted(set(material_ids) - set(owned))}
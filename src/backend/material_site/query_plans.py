@@ -0,0 +1,203 @@
+"""
+查询计划分析模块
+对 MaterialViewSet / MaterialFilter / FavoriteViewSet 的典型查询执行 EXPLAIN，
+标记全表扫描和额外排序；场景登记了 Material.Meta.indexes 中的索引时，
+检查执行计划是否使用了该索引，未使用且存在问题时给出建议
+"""
+
+import re
+from typing import List, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, models
+from django.db.models import QuerySet
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from .models import Material
+
+User = get_user_model()
+
+DEFAULT_PAGE_SIZE = 20
+
+# 典型查询：视图集、action、查询参数，以及 Material.Meta.indexes 中能消除扫描/排序的索引名
+SCENARIOS = [
+    {
+        'name': 'material_list',
+        'description': '素材列表（默认按创建时间倒序）',
+        'viewset': 'material', 'action': 'list', 'params': {},
+        'index': 'material_approved_created_idx',
+    },
+    {
+        'name': 'material_list_category',
+        'description': '素材列表按分类筛选',
+        'viewset': 'material', 'action': 'list', 'params': {'category': 'photos'},
+        'index': 'material_approved_cat_idx',
+    },
+    {
+        'name': 'material_list_price',
+        'description': '素材列表按价格区间筛选',
+        'viewset': 'material', 'action': 'list', 'params': {'min_price': '10', 'max_price': '50'},
+        'index': 'material_approved_price_idx',
+    },
+    {
+        'name': 'material_list_type',
+        'description': '素材列表按类型筛选',
+        'viewset': 'material', 'action': 'list', 'params': {'material_type': 'image'},
+        'index': None,
+    },
+    {
+        'name': 'material_list_popular',
+        'description': '素材列表按下载量排序',
+        'viewset': 'material', 'action': 'list', 'params': {'ordering': '-download_count'},
+        'index': 'material_approved_dl_idx',
+    },
+    {
+        'name': 'material_list_tags',
+        'description': '素材列表按标签筛选',
+        'viewset': 'material', 'action': 'list', 'params': {'tags': 'nature,city'},
+        'index': None,
+    },
+    {
+        'name': 'my_materials',
+        'description': '当前用户的素材',
+        'viewset': 'material', 'action': 'my_materials', 'params': {},
+        'index': None,
+    },
+    {
+        'name': 'favorite_list',
+        'description': '当前用户的收藏',
+        'viewset': 'favorite', 'action': 'list', 'params': {},
+        'index': None,
+    },
+]
+
+
+def _viewset_class(key: str):
+    """延迟导入视图集，避免与 views 模块循环导入"""
+    from .views import FavoriteViewSet, MaterialViewSet
+    return {'material': MaterialViewSet, 'favorite': FavoriteViewSet}[key]
+
+
+def build_queryset(scenario: dict, user) -> QuerySet:
+    """
+    按视图集的实际逻辑构造查询集（get_queryset + filter_queryset + 分页切片）
+
+    Args:
+        scenario: 典型查询定义
+        user: 作为 request.user 的用户
+
+    Returns:
+        QuerySet: 第一页的查询集
+    """
+    request = Request(RequestFactory().get('/', scenario['params']))
+    request.user = user
+    view = _viewset_class(scenario['viewset'])(
+        action=scenario['action'], request=request, format_kwarg=None, args=(), kwargs={}
+    )
+    queryset = view.filter_queryset(view.get_queryset())
+    page_size = view.paginator.get_page_size(request) if view.paginator else None
+    return queryset[:page_size or DEFAULT_PAGE_SIZE]
+
+
+def analyze_plan(plan: str, vendor: Optional[str] = None) -> List[str]:
+    """
+    从 EXPLAIN 输出中找出全表扫描和额外排序
+
+    支持 SQLite（EXPLAIN QUERY PLAN）和 PostgreSQL（EXPLAIN 文本格式），
+    其它数据库返回空列表。
+
+    Args:
+        plan: QuerySet.explain() 的输出
+        vendor: 数据库类型，默认取当前连接
+
+    Returns:
+        List[str]: 问题描述
+    """
+    vendor = vendor or connection.vendor
+    issues = []
+    for line in plan.splitlines():
+        if vendor == 'sqlite':
+            scan = re.search(r'\bSCAN (\w+)(.*)$', line)
+            if scan and scan.group(1) != 'CONSTANT' and 'INDEX' not in scan.group(2):
+                issues.append(f'全表扫描: {scan.group(1)}')
+            if 'USE TEMP B-TREE' in line:
+                issues.append(f'额外排序: {line.split("USE TEMP B-TREE", 1)[1].strip()}')
+        elif vendor == 'postgresql':
+            scan = re.search(r'Seq Scan on (\w+)', line)
+            if scan:
+                issues.append(f'全表扫描: {scan.group(1)}')
+            if re.match(r'\s*(->\s*)?(Incremental )?Sort\b', line):
+                issues.append('额外排序')
+    return list(dict.fromkeys(issues))
+
+
+def get_index(name: str) -> Optional[models.Index]:
+    """Material.Meta.indexes 中的同名索引"""
+    return next((index for index in Material._meta.indexes if index.name == name), None)
+
+
+def index_status(name: str, plan: str) -> dict:
+    """
+    场景登记的索引的状态
+
+    Args:
+        name: 索引名
+        plan: 该场景的执行计划
+
+    Returns:
+        dict: defined 表示已在模型 Meta 中定义，applied 表示数据库中已存在，
+            used 表示执行计划使用了该索引
+    """
+    index = get_index(name)
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, Material._meta.db_table)
+    return {
+        'name': name,
+        'fields': list(index.fields) if index else [],
+        'condition': ' AND '.join(f"{field} = '{value}'" for field, value in index.condition.children)
+        if index and index.condition else None,
+        'defined': index is not None,
+        'applied': name in constraints,
+        'used': re.search(rf'\b{re.escape(name)}\b', plan) is not None,
+    }
+
+
+def explain_scenarios(names: Optional[List[str]] = None, user=None, analyze: bool = False) -> List[dict]:
+    """
+    对典型查询执行 EXPLAIN 并给出建议
+
+    Args:
+        names: 只分析指定名称的查询
+        user: 作为 request.user 的用户，默认取第一个用户
+        analyze: 是否执行 EXPLAIN ANALYZE（仅 PostgreSQL，会真正执行查询）
+
+    Returns:
+        List[dict]: 每个查询的 SQL、执行计划、问题和登记索引的状态；
+            条件在编译时即可判定为空（如标签索引中没有匹配的素材）的查询不会发往数据库，
+            empty 为 True，sql 和 plan 为 None
+    """
+    user = user or User.objects.order_by('pk').first() or User(pk=0)
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+
+    results = []
+    for scenario in SCENARIOS:
+        if names and scenario['name'] not in names:
+            continue
+        queryset = build_queryset(scenario, user)
+        try:
+            sql = str(queryset.query)
+            plan = queryset.explain(**options)
+        except EmptyResultSet:
+            sql = plan = None
+        results.append({
+            'name': scenario['name'],
+            'description': scenario['description'],
+            'empty': plan is None,
+            'sql': sql,
+            'plan': plan,
+            'issues': analyze_plan(plan) if plan is not None else [],
+            'index': index_status(scenario['index'], plan) if scenario['index'] and plan is not None else None,
+        })
+    return results
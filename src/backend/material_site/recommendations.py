@@ -0,0 +1,281 @@
+"""
+协同过滤推荐模块
+基于收藏和下载记录构建"用户 × 素材"稀疏交互矩阵，离线计算：
+1. 素材之间的余弦相似度 Top-N（下载/收藏过该素材的用户还喜欢...）
+2. 活跃用户的个性化推荐 Top-N
+"""
+
+import logging
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import (
+    Material, Favorite, DownloadHistory, MaterialRecommendation, UserRecommendation
+)
+from .similarity import top_k
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TOP_N': 20,                # 每个素材保留的推荐数量
+    'USER_TOP_N': 20,           # 每个用户保留的推荐数量
+    'DOWNLOAD_WEIGHT': 1.0,
+    'FAVORITE_WEIGHT': 2.0,
+    'MAX_USER_ITEMS': 5000,     # 交互素材过多的用户（爬虫、批量下载）不参与计算
+    'ACTIVE_USER_DAYS': 90,     # 只为最近活跃的用户生成个性化推荐
+    'LOAD_CHUNK_SIZE': 100000,  # 每次从数据库读取的交互记录数
+    'BLOCK_SIZE': 1000,         # 每次写入数据库的素材/用户数
+    'MAX_PRODUCT_NNZ': 5000000, # 素材相似度每次矩阵乘法结果的非零元素上限
+}
+
+
+def get_config() -> dict:
+    """读取 settings.RECOMMENDATIONS 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'RECOMMENDATIONS', {})}
+
+
+def _load_pairs(queryset: QuerySet, chunk_size: int) -> np.ndarray:
+    """按主键分批读取 (user_id, material_id)，返回 N×2 数组"""
+    chunks: List[np.ndarray] = []
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'user_id', 'material_id')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        chunks.append(np.array(rows, dtype=np.int64)[:, 1:])
+    if not chunks:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+class InteractionMatrix:
+    """
+    用户-素材交互矩阵
+
+    Attributes:
+        user_ids: 行对应的用户ID（升序）
+        item_ids: 列对应的素材ID（升序）
+        interactions: 原始加权交互矩阵（用户 × 素材，CSR）
+        item_vectors: 按列归一化后的转置矩阵（素材 × 用户，CSR）
+    """
+
+    def __init__(self, user_ids: np.ndarray, item_ids: np.ndarray, interactions: sparse.csr_matrix):
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.interactions = interactions
+
+        norms = np.sqrt(np.asarray(interactions.multiply(interactions).sum(axis=0)).ravel())
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.item_vectors = (interactions @ sparse.diags(inverse)).T.tocsr()
+
+    @classmethod
+    def build(cls, config: dict) -> 'InteractionMatrix':
+        """从下载记录和收藏表加载交互数据"""
+        downloads = _load_pairs(DownloadHistory.objects.all(), config['LOAD_CHUNK_SIZE'])
+        favorites = _load_pairs(Favorite.objects.all(), config['LOAD_CHUNK_SIZE'])
+
+        pairs = np.concatenate([downloads, favorites])
+        weights = np.concatenate([
+            np.full(len(downloads), config['DOWNLOAD_WEIGHT'], dtype=np.float32),
+            np.full(len(favorites), config['FAVORITE_WEIGHT'], dtype=np.float32),
+        ])
+        del downloads, favorites
+
+        if not len(pairs):
+            empty = np.array([], dtype=np.int64)
+            return cls(empty, empty, sparse.csr_matrix((0, 0), dtype=np.float32))
+
+        user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        item_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+        del pairs
+
+        matrix = sparse.csr_matrix(
+            (weights, (rows, columns)), shape=(len(user_ids), len(item_ids)), dtype=np.float32
+        )
+        matrix.sum_duplicates()
+        # 重复下载的边际贡献递减
+        matrix.data = np.log1p(matrix.data)
+
+        heavy = np.diff(matrix.indptr) > config['MAX_USER_ITEMS']
+        if heavy.any():
+            matrix = (sparse.diags((~heavy).astype(np.float32)) @ matrix).tocsr()
+            matrix.eliminate_zeros()
+
+        return cls(user_ids, item_ids, matrix)
+
+    def rows_of_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """将用户ID转换为行号，忽略没有交互记录的用户"""
+        if not len(user_ids) or not len(self.user_ids):
+            return np.array([], dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.user_ids, user_ids), len(self.user_ids) - 1)
+        return np.unique(positions[self.user_ids[positions] == user_ids])
+
+    def _split_by_product_size(self, rows: np.ndarray, max_nnz: int):
+        """
+        按相似度乘积的非零元素数上界把行切分成小块
+
+        一个素材的候选相似素材不超过其所有交互用户的交互素材数之和（也不超过素材总数）；
+        单个素材的上界超过 max_nnz 时单独成块。
+        """
+        user_degrees = np.diff(self.interactions.indptr)
+        users = self.item_vectors[rows]
+        users.data = np.ones_like(users.data)
+        bounds = np.minimum(users @ user_degrees, len(self.item_ids))
+        cumulative = np.cumsum(bounds)
+        start = 0
+        while start < len(rows):
+            offset = cumulative[start - 1] if start else 0
+            end = max(int(np.searchsorted(cumulative, offset + max_nnz, side='right')), start + 1)
+            yield rows[start:end]
+            start = end
+
+    def similar_items(self, rows: np.ndarray, allowed: np.ndarray, top_n: int, max_nnz: int):
+        """
+        计算一组素材的 Top-N 相似素材
+
+        每次矩阵乘法的结果不超过 max_nnz 个非零元素，逐块取 Top-N 后即释放。
+
+        Args:
+            rows: 素材列号
+            allowed: 可被推荐的素材掩码（已发布）
+            top_n: 保留数量
+            max_nnz: 每次矩阵乘法结果的非零元素上限
+
+        Yields:
+            (列号, 相似列号数组, 相似度数组)
+        """
+        for chunk in self._split_by_product_size(rows, max_nnz):
+            products = (self.item_vectors[chunk] @ self.item_vectors.T).tocsr()
+            for i, row in enumerate(chunk):
+                start, end = products.indptr[i], products.indptr[i + 1]
+                columns = products.indices[start:end]
+                scores = products.data[start:end]
+                mask = (columns != row) & allowed[columns]
+                columns, scores = top_k(columns[mask], scores[mask], top_n)
+                yield row, columns, scores
+
+    def recommend_for_users(self, rows: np.ndarray, item_similarity: sparse.csr_matrix, top_n: int):
+        """
+        基于素材相似度为一组用户打分
+
+        Yields:
+            (行号, 推荐列号数组, 推荐分数组)
+        """
+        history = self.interactions[rows]
+        products = (history @ item_similarity).tocsr()
+        for i, row in enumerate(rows):
+            start, end = products.indptr[i], products.indptr[i + 1]
+            columns = products.indices[start:end]
+            scores = products.data[start:end]
+            seen = history.indices[history.indptr[i]:history.indptr[i + 1]]
+            mask = ~np.isin(columns, seen)
+            columns, scores = top_k(columns[mask], scores[mask], top_n)
+            yield row, columns, scores
+
+
+def _replace_rows(model, owner_field: str, target_field: str, owner_ids: List[int],
+                  results: List[Tuple[int, np.ndarray, np.ndarray]], computed_at) -> None:
+    """覆盖写入一批推荐列表"""
+    objects = [
+        model(**{
+            f'{owner_field}_id': owner_id,
+            f'{target_field}_id': int(target_id),
+            'score': float(score),
+            'rank': rank,
+            'computed_at': computed_at,
+        })
+        for owner_id, target_ids, scores in results
+        for rank, (target_id, score) in enumerate(zip(target_ids, scores), start=1)
+    ]
+    with transaction.atomic():
+        model.objects.filter(**{f'{owner_field}_id__in': owner_ids}).delete()
+        model.objects.bulk_create(objects, batch_size=1000)
+
+
+def _active_user_ids(days: int) -> np.ndarray:
+    """最近 days 天内有下载或收藏的用户"""
+    since = timezone.now() - timedelta(days=days)
+    user_ids = set(DownloadHistory.objects.filter(downloaded_at__gte=since).values_list('user_id', flat=True).distinct())
+    user_ids.update(Favorite.objects.filter(created_at__gte=since).values_list('user_id', flat=True).distinct())
+    return np.array(sorted(user_ids), dtype=np.int64)
+
+
+def build_recommendations(config: Optional[dict] = None) -> Tuple[int, int]:
+    """
+    重新计算素材推荐和用户推荐
+
+    内存占用：交互矩阵与交互记录数线性相关；素材相似度按乘积大小分块，
+    每块结果不超过 MAX_PRODUCT_NNZ 个非零元素（单个素材超过时为素材总数），
+    只保留 Top-N；用户推荐只与 Top-N 相似度矩阵相乘，每个用户的结果不超过
+    MAX_USER_ITEMS × TOP_N 个元素。
+
+    Returns:
+        Tuple[int, int]: (生成推荐的素材数, 生成推荐的用户数)
+    """
+    config = config or get_config()
+    started_at = timezone.now()
+    block_size = config['BLOCK_SIZE']
+
+    matrix = InteractionMatrix.build(config)
+    approved_ids = np.fromiter(
+        Material.objects.filter(status='approved').values_list('pk', flat=True).iterator(chunk_size=10000),
+        dtype=np.int64
+    )
+    allowed = np.isin(matrix.item_ids, approved_ids)
+
+    # 素材推荐，同时收集 Top-N 相似度矩阵供用户推荐使用
+    sim_rows, sim_columns, sim_scores = [], [], []
+    material_count = 0
+    for start in range(0, len(matrix.item_ids), block_size):
+        block = np.arange(start, min(start + block_size, len(matrix.item_ids)))
+        results = list(matrix.similar_items(block, allowed, config['TOP_N'], config['MAX_PRODUCT_NNZ']))
+        for row, columns, scores in results:
+            sim_rows.append(np.full(len(columns), row, dtype=np.int64))
+            sim_columns.append(columns)
+            sim_scores.append(scores)
+
+        results = [(int(matrix.item_ids[row]), matrix.item_ids[columns], scores)
+                   for row, columns, scores in results if allowed[row]]
+        _replace_rows(MaterialRecommendation, 'material', 'recommended',
+                      [owner for owner, _, _ in results], results, started_at)
+        material_count += len(results)
+
+    size = len(matrix.item_ids)
+    item_similarity = sparse.csr_matrix(
+        (np.concatenate(sim_scores) if sim_scores else np.array([], dtype=np.float32),
+         (np.concatenate(sim_rows) if sim_rows else np.array([], dtype=np.int64),
+          np.concatenate(sim_columns) if sim_columns else np.array([], dtype=np.int64))),
+        shape=(size, size), dtype=np.float32
+    )
+    del sim_rows, sim_columns, sim_scores
+
+    # 用户推荐
+    user_rows = matrix.rows_of_users(_active_user_ids(config['ACTIVE_USER_DAYS']))
+    user_count = 0
+    for start in range(0, len(user_rows), block_size):
+        block = user_rows[start:start + block_size]
+        results = [
+            (int(matrix.user_ids[row]), matrix.item_ids[columns], scores)
+            for row, columns, scores in matrix.recommend_for_users(block, item_similarity, config['USER_TOP_N'])
+        ]
+        _replace_rows(UserRecommendation, 'user', 'material',
+                      [owner for owner, _, _ in results], results, started_at)
+        user_count += len(results)
+
+    # 清理本次未覆盖到的旧推荐
+    MaterialRecommendation.objects.filter(computed_at__lt=started_at).delete()
+    UserRecommendation.objects.filter(computed_at__lt=started_at).delete()
+
+    logger.info(f"Recommendations rebuilt: {material_count} materials, {user_count} users")
+    return material_count, user_count
@@ -0,0 +1,395 @@
+"""
+统计汇总模块
+1. 按天汇总下载记录到 DailyMaterialDownloads / DailyAuthorDownloads
+2. 按天汇总新增收藏到 DailyMaterialFavorites / DailyAuthorFavorites
+3. 超过保留期的原始下载记录压缩归档到本地文件后分批删除
+4. 基于汇总表的统计查询
+"""
+
+import csv
+import gzip
+import logging
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.utils import timezone
+
+from .models import (
+    Material, Favorite, DownloadHistory, DailyMaterialDownloads, DailyAuthorDownloads,
+    DailyMaterialFavorites, DailyAuthorFavorites
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'RETENTION_DAYS': 180,                          # 原始下载记录保留天数
+    'ARCHIVE_DIR': Path(settings.BASE_DIR) / 'archive',
+    'CHUNK_SIZE': 5000,                             # 归档/删除每批处理的行数
+}
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'material_id', 'downloaded_at', 'ip_address']
+
+
+def get_config() -> dict:
+    """读取 settings.DOWNLOAD_HISTORY 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'DOWNLOAD_HISTORY', {})}
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """本地时区下某一天的起止时间"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _rollup_day(day: date) -> int:
+    """重新汇总某一天（已归档的日期跳过）"""
+    start, end = day_bounds(day)
+    raw = DownloadHistory.objects.filter(downloaded_at__gte=start, downloaded_at__lt=end).order_by()
+
+    by_material = raw.values('material_id').annotate(total=Count('pk'))
+    by_author = raw.values('material__author_id').annotate(total=Count('pk'))
+
+    with transaction.atomic():
+        archived = DailyMaterialDownloads.objects.filter(date=day, archived=True).exists()
+        if archived:
+            return 0
+        DailyMaterialDownloads.objects.filter(date=day).delete()
+        DailyAuthorDownloads.objects.filter(date=day).delete()
+        materials = DailyMaterialDownloads.objects.bulk_create(
+            [DailyMaterialDownloads(material_id=row['material_id'], date=day, downloads=row['total'])
+             for row in by_material],
+            batch_size=1000
+        )
+        DailyAuthorDownloads.objects.bulk_create(
+            [DailyAuthorDownloads(author_id=row['material__author_id'], date=day, downloads=row['total'])
+             for row in by_author],
+            batch_size=1000
+        )
+    return len(materials)
+
+
+def _add_to_rollup(day: date, raw) -> None:
+    """
+    将已归档日期新出现的原始记录累加到该日汇总（在调用方的事务中执行）
+
+    已归档日期的原始记录已删除，不能重算，只能在原有汇总上增加。
+    """
+    raw = raw.order_by()
+    targets = [
+        (DailyMaterialDownloads, 'material_id', raw.values_list('material_id').annotate(total=Count('pk'))),
+        (DailyAuthorDownloads, 'author_id', raw.values_list('material__author_id').annotate(total=Count('pk'))),
+    ]
+    for model, field, counts in targets:
+        counts = dict(counts)
+        existing = model.objects.filter(date=day, **{f'{field}__in': list(counts)}).values_list(field, flat=True)
+        for owner_id in existing:
+            model.objects.filter(date=day, **{field: owner_id}).update(downloads=F('downloads') + counts.pop(owner_id))
+        model.objects.bulk_create(
+            [model(**{field: owner_id}, date=day, downloads=total, archived=True) for owner_id, total in counts.items()],
+            batch_size=1000
+        )
+
+
+def rollup_downloads(since: Optional[date] = None) -> int:
+    """
+    汇总下载记录
+
+    默认从最近一次汇总的日期（该日可能不完整，需要重算）开始，
+    逐日汇总到今天；首次执行从最早的下载记录开始。
+
+    Args:
+        since: 起始日期
+
+    Returns:
+        int: 写入的素材日汇总行数
+    """
+    today = timezone.localdate()
+    if since is None:
+        last = DailyMaterialDownloads.objects.filter(archived=False).order_by('-date').values_list('date', flat=True).first()
+        if last is None:
+            first = DownloadHistory.objects.aggregate(first=Min('downloaded_at'))['first']
+            if first is None:
+                return 0
+            last = timezone.localtime(first).date()
+        since = last
+
+    rows = 0
+    day = since
+    while day <= today:
+        rows += _rollup_day(day)
+        day += timedelta(days=1)
+
+    logger.info(f"Rolled up downloads from {since} to {today}: {rows} rows")
+    return rows
+
+
+def _rollup_favorites_day(day: date) -> int:
+    """重新汇总某一天的新增收藏"""
+    start, end = day_bounds(day)
+    raw = Favorite.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+
+    by_material = raw.values('material_id').annotate(total=Count('pk'))
+    by_author = raw.values('material__author_id').annotate(total=Count('pk'))
+
+    with transaction.atomic():
+        DailyMaterialFavorites.objects.filter(date=day).delete()
+        DailyAuthorFavorites.objects.filter(date=day).delete()
+        materials = DailyMaterialFavorites.objects.bulk_create(
+            [DailyMaterialFavorites(material_id=row['material_id'], date=day, favorites=row['total'])
+             for row in by_material],
+            batch_size=1000
+        )
+        DailyAuthorFavorites.objects.bulk_create(
+            [DailyAuthorFavorites(author_id=row['material__author_id'], date=day, favorites=row['total'])
+             for row in by_author],
+            batch_size=1000
+        )
+    return len(materials)
+
+
+def rollup_favorites(since: Optional[date] = None) -> int:
+    """
+    汇总新增收藏
+
+    与 rollup_downloads 相同，从最近一次汇总的日期开始逐日重算到今天。
+    取消收藏会删除原始记录，因此已汇总的历史日期不再回溯修改。
+
+    Args:
+        since: 起始日期
+
+    Returns:
+        int: 写入的素材日汇总行数
+    """
+    today = timezone.localdate()
+    if since is None:
+        since = DailyMaterialFavorites.objects.order_by('-date').values_list('date', flat=True).first()
+        if since is None:
+            first = Favorite.objects.aggregate(first=Min('created_at'))['first']
+            if first is None:
+                return 0
+            since = timezone.localtime(first).date()
+
+    rows = 0
+    day = since
+    while day <= today:
+        rows += _rollup_favorites_day(day)
+        day += timedelta(days=1)
+
+    logger.info(f"Rolled up favorites from {since} to {today}: {rows} rows")
+    return rows
+
+
+def _archive_path(archive_dir: Path, day: date) -> Path:
+    """按日期分区的归档文件路径；同一天多次归档时用时间戳区分"""
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return Path(archive_dir) / 'download_history' / f'{day:%Y}' / f'{day:%m}' / f'{day.isoformat()}-{stamp}.csv.gz'
+
+
+def archive_downloads(retention_days: Optional[int] = None, archive_dir: Optional[Path] = None,
+                      chunk_size: Optional[int] = None) -> int:
+    """
+    归档并删除超过保留期的原始下载记录
+
+    逐日处理：先把原始记录按主键顺序写入 gzip 压缩的 CSV 文件，
+    再在同一个事务中重算该日汇总、标记为已归档并删除原始记录。
+    对账和汇总在任何时刻都只会看到"原始记录"或"已归档汇总"其中之一，不会重复计数。
+
+    Returns:
+        int: 删除的原始记录数
+    """
+    config = get_config()
+    retention_days = retention_days if retention_days is not None else config['RETENTION_DAYS']
+    archive_dir = archive_dir or config['ARCHIVE_DIR']
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+
+    cutoff = timezone.localdate() - timedelta(days=retention_days)
+    first = DownloadHistory.objects.aggregate(first=Min('downloaded_at'))['first']
+    if first is None:
+        return 0
+
+    deleted = 0
+    day = timezone.localtime(first).date()
+    while day < cutoff:
+        start, end = day_bounds(day)
+        raw = DownloadHistory.objects.filter(downloaded_at__gte=start, downloaded_at__lt=end).order_by('pk')
+        if raw.exists():
+            path = _archive_path(archive_dir, day)
+            last_pk = _write_archive(raw, path, chunk_size)
+            deleted += _finish_archive(day, raw, last_pk, path, chunk_size)
+        day += timedelta(days=1)
+
+    logger.info(f"Archived {deleted} download records older than {cutoff}")
+    return deleted
+
+
+def _write_archive(raw, path: Path, chunk_size: int) -> int:
+    """
+    将一天的原始记录写入压缩文件
+
+    Returns:
+        int: 已写入的最大主键
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    last_pk = 0
+    with gzip.open(path, 'wt', newline='', encoding='utf-8') as archive:
+        writer = csv.writer(archive)
+        writer.writerow(ARCHIVE_FIELDS)
+        while True:
+            rows = list(raw.filter(pk__gt=last_pk).values_list(*ARCHIVE_FIELDS)[:chunk_size])
+            if not rows:
+                break
+            writer.writerows(
+                (pk, user_id, material_id, downloaded_at.isoformat(), ip or '')
+                for pk, user_id, material_id, downloaded_at, ip in rows
+            )
+            last_pk = rows[-1][0]
+    return last_pk
+
+
+def _finish_archive(day: date, raw, last_pk: int, path: Path, chunk_size: int) -> int:
+    """
+    在一个事务中重算该日汇总、标记已归档并分批删除已写入文件的原始记录
+
+    该日此前已归档时（归档后又写入了迟到的记录），汇总无法重算，
+    改为把本次写入文件的记录累加到已有汇总上。
+    写文件后该日又出现新记录（未写入文件）时回滚并删除文件，下次执行重新归档。
+
+    Returns:
+        int: 删除的原始记录数
+    """
+    deleted = 0
+    with transaction.atomic():
+        archived = raw.filter(pk__lte=last_pk)
+        if DailyMaterialDownloads.objects.filter(date=day, archived=True).exists():
+            _add_to_rollup(day, archived)
+        else:
+            _rollup_day(day)
+            DailyMaterialDownloads.objects.filter(date=day).update(archived=True)
+            DailyAuthorDownloads.objects.filter(date=day).update(archived=True)
+        while True:
+            pks = list(archived.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            count, _ = DownloadHistory.objects.filter(pk__in=pks).delete()
+            deleted += count
+        if raw.exists():
+            transaction.set_rollback(True)
+    if raw.exists():
+        path.unlink(missing_ok=True)
+        logger.warning(f"New download records appeared for {day} while archiving, will retry")
+        return 0
+    return deleted
+
+
+# ========== 基于汇总表的统计查询 ==========
+
+def material_download_series(material_ids: Iterable[int], start: date, end: date) -> Dict[int, List[dict]]:
+    """
+    素材在日期区间内的每日下载数
+
+    Returns:
+        dict: {素材ID: [{'date': 日期, 'downloads': 次数}, ...]}
+    """
+    series: Dict[int, List[dict]] = {}
+    rows = (
+        DailyMaterialDownloads.objects.filter(material_id__in=list(material_ids), date__gte=start, date__lte=end)
+        .order_by('material_id', 'date')
+        .values_list('material_id', 'date', 'downloads')
+    )
+    for material_id, day, downloads in rows:
+        series.setdefault(material_id, []).append({'date': day, 'downloads': downloads})
+    return series
+
+
+def author_download_series(author_id: int, start: date, end: date) -> List[dict]:
+    """作者在日期区间内的每日被下载次数"""
+    return list(
+        DailyAuthorDownloads.objects.filter(author_id=author_id, date__gte=start, date__lte=end)
+        .order_by('date')
+        .values('date', 'downloads')
+    )
+
+
+def author_download_total(author_id: int, start: date, end: date) -> int:
+    """作者在日期区间内的被下载总次数"""
+    return DailyAuthorDownloads.objects.filter(
+        author_id=author_id, date__gte=start, date__lte=end
+    ).aggregate(total=Sum('downloads'))['total'] or 0
+
+
+def author_stats(author_id: int, start: date, end: date, limit: int) -> dict:
+    """
+    作者统计：整体累计值、区间内每日趋势，以及下载最多的 limit 个素材的每日趋势
+
+    只读取素材表的计数字段和日汇总表，查询量与区间天数、素材数量相关，
+    与下载/收藏原始记录的规模无关。
+
+    Args:
+        author_id: 作者ID
+        start: 起始日期（含）
+        end: 结束日期（含）
+        limit: 返回趋势的素材数量
+
+    Returns:
+        dict: 统计数据
+    """
+    authored = Material.objects.filter(author_id=author_id)
+    totals = authored.aggregate(
+        materials=Count('pk'),
+        downloads=Sum('download_count'),
+        favorites=Sum('favorite_count'),
+        views=Sum('view_count'),
+    )
+
+    daily: Dict[date, dict] = {}
+    for row in author_download_series(author_id, start, end):
+        daily.setdefault(row['date'], {'date': row['date'], 'downloads': 0, 'favorites': 0})['downloads'] = row['downloads']
+    favorite_rows = (
+        DailyAuthorFavorites.objects.filter(author_id=author_id, date__gte=start, date__lte=end)
+        .values_list('date', 'favorites')
+    )
+    for day, favorites in favorite_rows:
+        daily.setdefault(day, {'date': day, 'downloads': 0, 'favorites': 0})['favorites'] = favorites
+
+    top_materials = list(
+        authored.order_by('-download_count', '-pk')
+        .values('id', 'title', 'download_count', 'favorite_count', 'view_count')[:limit]
+    )
+    material_ids = [material['id'] for material in top_materials]
+    download_series = material_download_series(material_ids, start, end)
+    favorite_series: Dict[int, Dict[date, int]] = {}
+    favorite_rows = (
+        DailyMaterialFavorites.objects.filter(material_id__in=material_ids, date__gte=start, date__lte=end)
+        .values_list('material_id', 'date', 'favorites')
+    )
+    for material_id, day, favorites in favorite_rows:
+        favorite_series.setdefault(material_id, {})[day] = favorites
+
+    materials = []
+    for material in top_materials:
+        series: Dict[date, dict] = {}
+        for row in download_series.get(material['id'], []):
+            series[row['date']] = {'date': row['date'], 'downloads': row['downloads'], 'favorites': 0}
+        for day, favorites in favorite_series.get(material['id'], {}).items():
+            series.setdefault(day, {'date': day, 'downloads': 0, 'favorites': 0})['favorites'] = favorites
+        materials.append({**material, 'series': [series[day] for day in sorted(series)]})
+
+    series_list = [daily[day] for day in sorted(daily)]
+    return {
+        'start': start,
+        'end': end,
+        'totals': {
+            'materials': totals['materials'],
+            'downloads': totals['downloads'] or 0,
+            'favorites': totals['favorites'] or 0,
+            'views': totals['views'] or 0,
+            'period_downloads': sum(row['downloads'] for row in series_list),
+            'period_favorites': sum(row['favorites'] for row in series_list),
+        },
+        'daily': series_list,
+        'materials': materials,
+    }
@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from .models import Material, Category, Tag, Favorite
+from .models import Material, Category, Tag, Favorite, ModerationLease
 from users.serializers import UserSerializer
 from src.backend.exceptions import ValidationError
+from .moderation import ACTIONS, MAX_BATCH_SIZE
+from .sparse_fields import RELATIONS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,28 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'color', 'created_at']
 
 
-class MaterialListSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    按 context['field_selection'] 裁剪字段
+
+    字段在首次访问时构建，此时嵌套使用的序列化器也能从根序列化器取到上下文；
+    未展开的关联替换为只输出主键的字段。
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.context.get('field_selection')
+        if selection is None:
+            return fields
+        for name in list(fields):
+            if not selection.includes(name):
+                del fields[name]
+            elif name in RELATIONS and not selection.is_expanded(name):
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=name == 'tags')
+        return fields
+
+
+class MaterialListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     素材列表序列化器
     用于素材列表展示，包含基本信息
@@ -191,6 +214,29 @@ class MaterialCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class MaterialIdsSerializer(serializers.Serializer):
+    """素材ID列表请求"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+
+
+class MaterialModerationSerializer(MaterialIdsSerializer):
+    """批量审核请求"""
+    action = serializers.ChoiceField(choices=list(ACTIONS))
+
+
+class ModerationLeaseSerializer(serializers.ModelSerializer):
+    """审核队列租约"""
+    material = MaterialListSerializer(read_only=True)
+
+    class Meta:
+        model = ModerationLease
+        fields = ['material', 'claimed_at', 'expires_at']
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     """收藏序列化器"""
     material = MaterialListSerializer(read_only=True)
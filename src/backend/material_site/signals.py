@@ -1,25 +1,137 @@
-from django.db.models.signals import post_save, post_delete
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Material, Favorite
+from django.utils import timezone
+from .category_tree import MATERIAL_FIELDS, category_tree
+from .counters import bump_counter
+from .models import Category, Material, Tag, DownloadHistory
+from .moderation import ACTIONS, materials_moderated
+from .tag_index import tag_index
+
+User = get_user_model()
+
 
 @receiver(post_save, sender=Material)
 def update_user_materials_count(sender, instance, created, **kwargs):
     """更新用户的素材数量统计"""
     if created:
-        instance.author.materials_count += 1
-        instance.author.save()
+        bump_counter(User, instance.author_id, 'materials_count', 1)
+
 
 @receiver(post_delete, sender=Material)
 def decrease_user_materials_count(sender, instance, **kwargs):
     """减少用户的素材数量统计"""
-    instance.author.materials_count -= 1
-    instance.author.save()
+    bump_counter(User, instance.author_id, 'materials_count', -1)
+
 
-@receiver(post_save, sender=Favorite)
-def update_material_favorite_count(sender, instance, created, **kwargs):
-    """更新素材的收藏计数"""
+@receiver(post_save, sender=DownloadHistory)
+def update_download_counts(sender, instance, created, **kwargs):
+    """更新素材下载数和作者的被下载次数"""
     if created:
-        instance.material.favorite_count += 1
+        bump_counter(Material, instance.material_id, 'download_count', 1)
+        bump_counter(User, instance.material.author_id, 'downloads_count', 1)
+
+
+@receiver(m2m_changed, sender=Material.tags.through)
+def touch_material_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """标签关联变化时刷新素材的 updated_at，供相似素材等增量任务识别变化"""
+    now = timezone.now()
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Material.objects.filter(pk=instance.pk).update(updated_at=now)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Material.objects.filter(pk__in=pk_set).update(updated_at=now)
+    elif action == 'pre_clear':
+        Material.objects.filter(tags=instance).update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Material.tags.through)
+def sync_tag_index_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """标签关联变化后同步标签位图索引（只更新受影响的标签）"""
+    if not tag_index.enabled():
+        return
+    pk_set = tuple(pk_set or ())
+
+    if not reverse:
+        material_id = instance.pk
+        if action == 'pre_clear':
+            # 清空前记录原有标签，提交后逐个移除
+            tag_ids = tuple(instance.tags.values_list('pk', flat=True))
+            transaction.on_commit(lambda: tag_index.set_material_tags(material_id, remove=tag_ids))
+        elif action == 'post_add':
+            transaction.on_commit(lambda: tag_index.set_material_tags(material_id, add=pk_set))
+        elif action == 'post_remove':
+            transaction.on_commit(lambda: tag_index.set_material_tags(material_id, remove=pk_set))
+    elif action in ('post_add', 'post_remove'):
+        key = 'add' if action == 'post_add' else 'remove'
+        transaction.on_commit(lambda: tag_index.set_tag_materials(instance.pk, **{key: pk_set}))
+    elif action == 'post_clear':
+        transaction.on_commit(lambda: tag_index.set_tag_materials(instance.pk, clear=True))
+
+
+@receiver(post_save, sender=Material)
+def sync_tag_index_on_material_saved(sender, instance, created, update_fields=None, **kwargs):
+    """素材发布/下线后同步标签位图索引"""
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    material_id = instance.pk
+    if instance.status == 'approved':
+        transaction.on_commit(lambda: tag_index.set_published(add=(material_id,)))
+    elif not created:
+        transaction.on_commit(lambda: tag_index.set_published(remove=(material_id,)))
+
+
+@receiver(post_delete, sender=Material)
+def sync_tag_index_on_material_deleted(sender, instance, **kwargs):
+    """素材删除后从已发布集合中移除（标签位图中的残留ID不会出现在查询结果中）"""
+    if instance.status == 'approved':
+        material_id = instance.pk
+        transaction.on_commit(lambda: tag_index.set_published(remove=(material_id,)))
+
+
+@receiver(post_save, sender=Tag)
+def sync_tag_index_on_tag_saved(sender, instance, **kwargs):
+    """标签新建/改名后同步标签位图索引"""
+    transaction.on_commit(lambda: tag_index.set_tag(instance.pk, instance.slug))
+
+
+@receiver(post_delete, sender=Tag)
+def sync_tag_index_on_tag_deleted(sender, instance, **kwargs):
+    """标签删除后从标签位图索引中移除"""
+    tag_id = instance.pk
+    transaction.on_commit(lambda: tag_index.set_tag(tag_id, None))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_on_category_changed(sender, instance, **kwargs):
+    """分类变化后使分类树快照失效"""
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_save, sender=Material)
+def invalidate_category_tree_on_material_saved(sender, instance, created, update_fields=None, **kwargs):
+    """素材新建、发布状态或分类变化后使分类树快照失效"""
+    if not created and update_fields is not None and not MATERIAL_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_delete, sender=Material)
+def invalidate_category_tree_on_material_deleted(sender, instance, **kwargs):
+    """素材删除后使分类树快照失效"""
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(materials_moderated, sender=Material)
+def refresh_indexes_on_materials_moderated(sender, action, material_ids, **kwargs):
+    """批量发布/拒绝后一次性更新已发布集合，并使分类树失效"""
+    if 'status' not in ACTIONS[action]:
+        return
+    material_ids = tuple(material_ids)
+    if ACTIONS[action]['status'] == 'approved':
+        transaction.on_commit(lambda: tag_index.set_published(add=material_ids))
     else:
-        instance.material.favorite_count -= 1
-    instance.material.save()
\ No newline at end of file
+        transaction.on_commit(lambda: tag_index.set_published(remove=material_ids))
+    transaction.on_commit(category_tree.invalidate)
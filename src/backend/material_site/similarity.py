@@ -0,0 +1,263 @@
+"""
+相似素材模块
+基于"素材 × 标签"稀疏矩阵（NumPy/SciPy）计算余弦相似度，叠加分类重合加权，
+为每个已发布素材预先计算 Top-N 相似素材并写入 SimilarMaterial；
+没有共同标签的同分类素材也可作为相似素材
+"""
+
+import logging
+from itertools import islice
+from typing import Iterable, Optional, Set
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Material, SimilarMaterial
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TOP_N': 20,                    # 每个素材保留的相似素材数量
+    'CATEGORY_WEIGHT': 0.2,         # 同一分类的加分
+    'ROOT_CATEGORY_WEIGHT': 0.1,    # 同一顶级分类的加分
+    'MAX_TAG_MATERIALS': 20000,     # 关联素材超过该数量的标签区分度太低，不参与计算
+    'BLOCK_SIZE': 500,              # 每次矩阵乘法处理的行数
+    'LOAD_CHUNK_SIZE': 10000,       # 构建特征矩阵时每次从数据库读取的行数
+}
+
+
+def get_config() -> dict:
+    """读取 settings.SIMILARITY 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'SIMILARITY', {})}
+
+
+def top_k(columns: np.ndarray, scores: np.ndarray, k: int):
+    """
+    选出得分最高的 k 个列，按得分降序返回
+
+    Returns:
+        (列号数组, 得分数组)
+    """
+    if len(scores) > k:
+        selected = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[selected], scores[selected]
+    order = np.argsort(-scores, kind='stable')
+    return columns[order], scores[order]
+
+
+def _load_rows(queryset, fields: tuple, chunk_size: int) -> np.ndarray:
+    """
+    分块读取 values_list 结果，逐块转换为 float64 数组（None 转为 NaN）
+
+    仍是一条查询，只是不一次性生成全部 Python 元组。
+    """
+    iterator = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    chunks = []
+    while True:
+        rows = list(islice(iterator, chunk_size))
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.float64))
+    if not chunks:
+        return np.empty((0, len(fields)), dtype=np.float64)
+    return np.concatenate(chunks)
+
+
+class FeatureMatrix:
+    """
+    已发布素材的特征矩阵
+
+    Attributes:
+        ids: 按主键升序排列的素材ID数组，行号即数组下标
+        tags: 行归一化后的 TF-IDF 标签矩阵（CSR）
+        categories: 每行的分类ID（无分类为 -1）
+        roots: 每行的顶级分类ID（无分类为 -1）
+    """
+
+    def __init__(self, ids: np.ndarray, tags: sparse.csr_matrix,
+                 categories: np.ndarray, roots: np.ndarray):
+        self.ids = ids
+        self.tags = tags
+        self.categories = categories
+        self.roots = roots
+        # 按分类 / 顶级分类排序的行号及对应的键，用于查找同分类的素材
+        self._category_order = np.argsort(categories, kind='stable')
+        self._sorted_categories = categories[self._category_order]
+        self._root_order = np.argsort(roots, kind='stable')
+        self._sorted_roots = roots[self._root_order]
+
+    @classmethod
+    def build(cls, config: Optional[dict] = None) -> 'FeatureMatrix':
+        """
+        从数据库加载已发布素材的标签和分类，构建特征矩阵
+
+        素材、分类和标签在同一条查询中读取（每个素材-标签一行，无标签的素材一行），
+        构建期间素材状态或标签变化不会使标签挂到错误的行上。
+        """
+        config = config or get_config()
+        approved = Material.objects.filter(status='approved')
+
+        rows = _load_rows(
+            approved.order_by('pk'), ('pk', 'category_id', 'category__parent_id', 'tags__id'),
+            config['LOAD_CHUNK_SIZE']
+        )
+        material_ids = rows[:, 0].astype(np.int64)
+        ids, first = np.unique(material_ids, return_index=True)
+        categories = np.nan_to_num(rows[first, 1], nan=-1).astype(np.int64)
+        parents = np.nan_to_num(rows[first, 2], nan=-1).astype(np.int64)
+        roots = np.where(parents >= 0, parents, categories)
+
+        tagged = ~np.isnan(rows[:, 3])
+        tag_ids, columns = np.unique(rows[tagged, 3].astype(np.int64), return_inverse=True)
+        document_frequency = np.bincount(columns, minlength=len(tag_ids))
+
+        n = len(ids)
+        keep = document_frequency[columns] <= config['MAX_TAG_MATERIALS']
+        row_index = np.searchsorted(ids, material_ids[tagged][keep])
+        columns = columns[keep]
+        weights = np.log1p(n / np.maximum(document_frequency[columns], 1)).astype(np.float32)
+
+        matrix = sparse.csr_matrix((weights, (row_index, columns)), shape=(n, len(tag_ids)), dtype=np.float32)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        matrix = sparse.diags(inverse.astype(np.float32)) @ matrix
+
+        return cls(ids, matrix.tocsr(), categories, roots)
+
+    def rows_of(self, material_ids: Iterable[int]) -> np.ndarray:
+        """将素材ID转换为行号，忽略不在矩阵中的素材"""
+        material_ids = np.fromiter(material_ids, dtype=np.int64)
+        if not len(material_ids) or not len(self.ids):
+            return np.array([], dtype=np.int64)
+        positions = np.searchsorted(self.ids, material_ids)
+        positions = np.minimum(positions, len(self.ids) - 1)
+        return np.unique(positions[self.ids[positions] == material_ids])
+
+    @staticmethod
+    def _group_rows(order: np.ndarray, sorted_keys: np.ndarray, key: int, limit: int) -> np.ndarray:
+        """键等于 key 的行（按行号升序取前 limit 个）"""
+        start = np.searchsorted(sorted_keys, key, side='left')
+        end = min(np.searchsorted(sorted_keys, key, side='right'), start + limit)
+        return order[start:end]
+
+    def category_candidates(self, row: int, limit: int) -> np.ndarray:
+        """
+        仅凭分类即可入选的候选行
+
+        同分类的素材得分相同，只需前 limit 个；同顶级分类的候选多取 limit 个，
+        以便跳过其中属于同一分类的行。
+        """
+        if self.categories[row] < 0:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([
+            self._group_rows(self._category_order, self._sorted_categories, self.categories[row], limit),
+            self._group_rows(self._root_order, self._sorted_roots, self.roots[row], 2 * limit),
+        ])
+
+    def neighbor_rows(self, rows: np.ndarray, block_size: int) -> np.ndarray:
+        """与给定行至少共享一个标签的所有行（按 block_size 行分块相乘）"""
+        neighbors = [np.array([], dtype=np.int64)]
+        for start in range(0, len(rows), block_size):
+            products = self.tags[rows[start:start + block_size]] @ self.tags.T
+            neighbors.append(np.unique(products.indices))
+        return np.unique(np.concatenate(neighbors))
+
+    def top_similar(self, rows: np.ndarray, config: dict):
+        """
+        计算给定行的 Top-N 相似素材
+
+        候选为共享标签的行和同分类的行，得分为标签余弦相似度加分类重合加权。
+
+        Yields:
+            (素材ID, 相似素材ID数组, 相似度数组)
+        """
+        top_n = config['TOP_N']
+        products = (self.tags[rows] @ self.tags.T).tocsr()
+
+        for i, row in enumerate(rows):
+            start, end = products.indptr[i], products.indptr[i + 1]
+            candidates = np.union1d(products.indices[start:end], self.category_candidates(row, top_n + 1))
+            scores = np.zeros(len(candidates), dtype=np.float64)
+            scores[np.searchsorted(candidates, products.indices[start:end])] = products.data[start:end]
+
+            mask = candidates != row
+            columns, scores = candidates[mask], scores[mask]
+            if self.categories[row] >= 0:
+                scores += config['CATEGORY_WEIGHT'] * (self.categories[columns] == self.categories[row])
+                scores += config['ROOT_CATEGORY_WEIGHT'] * (
+                    (self.roots[columns] == self.roots[row]) & (self.categories[columns] != self.categories[row])
+                )
+
+            columns, scores = top_k(columns, scores, top_n)
+            yield int(self.ids[row]), self.ids[columns], scores
+
+
+def _write_rows(features: FeatureMatrix, rows: np.ndarray, config: dict, computed_at) -> int:
+    """分块计算并覆盖写入给定行的相似列表"""
+    written = 0
+    block_size = config['BLOCK_SIZE']
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        objects = []
+        for material_id, similar_ids, scores in features.top_similar(block, config):
+            objects.extend(
+                SimilarMaterial(
+                    material_id=material_id,
+                    similar_id=int(similar_id),
+                    score=float(score),
+                    rank=rank,
+                    computed_at=computed_at
+                )
+                for rank, (similar_id, score) in enumerate(zip(similar_ids, scores), start=1)
+            )
+        with transaction.atomic():
+            SimilarMaterial.objects.filter(material_id__in=features.ids[block].tolist()).delete()
+            SimilarMaterial.objects.bulk_create(objects, batch_size=1000)
+        written += len(block)
+    return written
+
+
+def rebuild_similar(full: bool = False) -> int:
+    """
+    重建相似素材列表
+
+    增量模式下只重算上次构建之后发生变化的素材，以及与它们共享标签
+    或在列表中引用了它们的素材。只凭分类入选的相似素材得分固定且低于任何共享标签的素材，
+    同分类其他素材的列表不随之重算，在下次全量重建时更新。
+
+    Args:
+        full: 是否全量重建
+
+    Returns:
+        int: 重算的素材数量
+    """
+    config = get_config()
+    started_at = timezone.now()
+    last_build = None if full else SimilarMaterial.objects.aggregate(last=Max('computed_at'))['last']
+
+    features = FeatureMatrix.build(config)
+
+    if last_build is None:
+        rows = np.arange(len(features.ids))
+        SimilarMaterial.objects.exclude(material__status='approved').delete()
+    else:
+        changed: Set[int] = set(
+            Material.objects.filter(updated_at__gt=last_build).values_list('pk', flat=True)
+        )
+        if not changed:
+            return 0
+        referencing = SimilarMaterial.objects.filter(similar_id__in=changed).values_list('material_id', flat=True)
+        changed_rows = features.rows_of(changed)
+        rows = np.union1d(
+            features.neighbor_rows(changed_rows, config['BLOCK_SIZE']),
+            np.union1d(changed_rows, features.rows_of(set(referencing)))
+        ).astype(np.int64)
+        SimilarMaterial.objects.filter(material_id__in=changed).exclude(material__status='approved').delete()
+
+    count = _write_rows(features, rows, config, started_at)
+    logger.info(f"Rebuilt similar materials for {count} materials (full={last_build is None})")
+    return count
@@ -0,0 +1,153 @@
+"""
+稀疏字段集模块
+解析 fields / exclude / expand 查询参数，同时裁剪序列化输出和查询：
+未请求的列用 only() 延迟加载，未展开的关联不再联表或预取
+"""
+
+from typing import Iterable, List, Optional, Sequence, Set
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+from rest_framework.request import Request
+
+from src.backend.exceptions import ValidationError
+from .models import Tag
+
+# 可展开的关联字段：展开时输出嵌套对象，否则只输出主键（tags 为主键列表）
+RELATIONS = ('author', 'category', 'tags')
+
+# 非模型字段依赖的模型列
+DEPENDENCIES = {
+    'file_size_display': ('file_size',),
+    'is_favorited': (),
+}
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _check(names: Iterable[str], allowed: Sequence[str], param: str) -> None:
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValidationError(f"{param} 包含未知字段: {', '.join(unknown)}")
+
+
+class FieldSelection:
+    """
+    素材字段选择
+
+    Attributes:
+        fields: 输出字段（保持序列化器中的顺序）
+        expanded: 以嵌套对象输出的关联
+    """
+
+    def __init__(self, fields: List[str], expanded: Set[str]):
+        self.fields = fields
+        self.expanded = expanded
+
+    @classmethod
+    def from_request(cls, request: Request, available: Sequence[str]) -> Optional['FieldSelection']:
+        """
+        解析查询参数
+
+        - fields=id,title,author：只输出列出的字段，其中的关联默认只输出主键
+        - expand=author,tags：把关联展开为嵌套对象（未在 fields 中列出时自动加入）
+        - exclude=tags,is_favorited：去掉字段
+
+        未指定 fields 时输出全部字段且关联全部展开，与不带参数时相同。
+
+        Args:
+            request: HTTP请求
+            available: 序列化器的全部字段
+
+        Returns:
+            Optional[FieldSelection]: 未使用这些参数时为 None
+
+        Raises:
+            ValidationError: 包含未知字段
+        """
+        params = request.query_params
+        requested = _split(params.get('fields'))
+        excluded = _split(params.get('exclude'))
+        expand = _split(params.get('expand'))
+        if not (requested or excluded or expand):
+            return None
+
+        _check(requested, available, 'fields')
+        _check(excluded, available, 'exclude')
+        _check(expand, [name for name in RELATIONS if name in available], 'expand')
+
+        if requested:
+            wanted = set(requested) | set(expand)
+            expanded = set(expand)
+        else:
+            wanted = set(available)
+            expanded = {name for name in RELATIONS if name in available}
+        fields = [name for name in available if name in wanted and name not in excluded]
+        return cls(fields, expanded & set(fields))
+
+    def includes(self, name: str) -> bool:
+        return name in self.fields
+
+    def is_expanded(self, name: str) -> bool:
+        return name in self.expanded
+
+    def columns(self, serializer_class) -> List[str]:
+        """
+        序列化所需的素材列（用于 only()）
+
+        Args:
+            serializer_class: 素材序列化器类（嵌套关联的字段从其声明中读取）
+        """
+        columns = {'id'}
+        for name in self.fields:
+            if name in DEPENDENCIES:
+                columns.update(DEPENDENCIES[name])
+            elif name == 'tags':
+                continue
+            else:
+                columns.add(name)
+                if name in self.expanded:
+                    nested = serializer_class._declared_fields[name]
+                    columns.update(f'{name}__{column}' for column in _concrete(nested.Meta.model, nested.Meta.fields))
+        return sorted(columns)
+
+    def optimize(self, queryset: QuerySet, serializer_class, relation: Optional[str] = None,
+                 own_fields: Sequence[str] = ()) -> QuerySet:
+        """
+        按字段选择调整 select_related / prefetch_related / only()
+
+        Args:
+            queryset: 素材查询集，或通过 relation 关联素材的查询集
+            serializer_class: 素材序列化器类
+            relation: 外层模型指向素材的外键名（如收藏的 material）
+            own_fields: 外层模型需要加载的列
+
+        Returns:
+            QuerySet: 调整后的查询集
+        """
+        prefix = f'{relation}__' if relation else ''
+        select = [relation] if relation else []
+        select += [prefix + name for name in ('author', 'category') if self.is_expanded(name)]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if self.includes('tags'):
+            tags = Tag.objects.all() if self.is_expanded('tags') else Tag.objects.only('id')
+            queryset = queryset.prefetch_related(Prefetch(prefix + 'tags', queryset=tags))
+        return queryset.only(*own_fields, *(prefix + column for column in self.columns(serializer_class)))
+
+
+def _concrete(model, names: Iterable[str]) -> List[str]:
+    """字段名中属于模型列的部分"""
+    columns = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.append(name)
+    return columns
+
@@ -0,0 +1,503 @@
+"""
+标签位图索引
+为每个标签维护素材ID的压缩位图（按标签分别存放在共享缓存中），把 AND/OR/NOT 标签表达式
+在内存中解析为已发布素材ID集合，再以主键条件交给 ORM 查询；
+全量构建由 rebuild_tag_index 命令或后台任务执行
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q, QuerySet
+
+from backend.caches import require_shared_cache
+from src.backend.exceptions import ValidationError
+from .bitmaps import Bitmap
+from .models import Material, Tag
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',       # 必须是共享缓存（Redis/文件缓存），进程内缓存时不启用索引
+    'DATA_TTL': 7 * 24 * 3600,      # 索引条目的保留时间（秒），未修改的条目过期后查询退回 ORM 并触发重建
+    'BUILD_TIMEOUT': 3600,          # 全量构建的最长时间（秒），超时后构建标记失效
+    'REBUILD_RETRY': 300,           # 安排重建后该时间内不重复安排（秒）
+    'LOCK_TIMEOUT': 10,             # 条目锁的自动释放时间（秒）
+    'LOCK_WAIT': 2.0,               # 等待条目锁的最长时间（秒），超时则放弃增量并重建
+    'MAX_IN_IDS': 10000,            # 结果超过该数量时改用子查询，避免过长的 IN 条件
+    'MAX_TOKENS': 64,               # 表达式最多包含的词元数
+}
+
+GENERATION_KEY = 'tag_index:generation'     # 当前可用的构建代号，缺失表示索引不可用
+BUILDING_KEY = 'tag_index:building'         # 正在进行的构建代号
+REBUILD_SCHEDULED_KEY = 'tag_index:rebuild_scheduled'
+
+# 表达式语法树：('tag', slug) / ('not', node) / ('and', left, right) / ('or', left, right)
+Node = Tuple[Union[str, tuple], ...]
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|(,)|([\w-]+))')
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def get_config() -> dict:
+    """读取 settings.TAG_INDEX 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'TAG_INDEX', {})}
+
+
+def tag_key(tag_id: int) -> str:
+    """标签位图的条目名"""
+    return f'tag:{tag_id}'
+
+
+def entry_key(generation: int, name: str) -> str:
+    """共享缓存中索引条目（戳记, 值）的键"""
+    return f'tag_index:{generation}:{name}'
+
+
+def stamp_key(generation: int, name: str) -> str:
+    """共享缓存中索引条目戳记的键"""
+    return f'tag_index:{generation}:{name}:stamp'
+
+
+def pending_key(generation: int) -> str:
+    """构建期间待重放的修改列表的键"""
+    return f'tag_index:{generation}:pending'
+
+
+# ========== 表达式解析 ==========
+
+def _tokenize(text: str, max_tokens: int) -> List[str]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise ValidationError(f"标签表达式在第 {position + 1} 个字符处无法解析")
+        tokens.append(next(group for group in match.groups() if group))
+        position = match.end()
+        if len(tokens) > max_tokens:
+            raise ValidationError(f"标签表达式过长（最多 {max_tokens} 项）")
+    return tokens
+
+
+def parse_expression(text: str, max_tokens: Optional[int] = None) -> Node:
+    """
+    解析标签表达式
+
+    运算符必须大写（标签 slug 均为小写）：NOT 优先级最高，其次 AND，最后 OR，
+    逗号等同于 OR，可以用括号分组。例如 ``nature AND (city, night) AND NOT people``。
+
+    Args:
+        text: 表达式
+        max_tokens: 最多包含的词元数
+
+    Returns:
+        Node: 语法树
+
+    Raises:
+        ValidationError: 表达式不合法
+    """
+    tokens = _tokenize(text, max_tokens or get_config()['MAX_TOKENS'])
+    if not tokens:
+        raise ValidationError("标签表达式不能为空")
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> Node:
+        node = parse_and()
+        while peek() in ('OR', ','):
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and() -> Node:
+        node = parse_not()
+        while peek() == 'AND':
+            take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not() -> Node:
+        token = peek()
+        if token == 'NOT':
+            take()
+            return ('not', parse_not())
+        if token == '(':
+            take()
+            node = parse_or()
+            if peek() != ')':
+                raise ValidationError("标签表达式缺少右括号")
+            take()
+            return node
+        if token is None or token in OPERATORS or token in (')', ','):
+            raise ValidationError(f"标签表达式缺少标签: {token or '结尾'}")
+        return ('tag', take())
+
+    node = parse_or()
+    if peek() is not None:
+        raise ValidationError(f"标签表达式存在多余内容: {peek()}")
+    return node
+
+
+def any_of(slugs: List[str]) -> Node:
+    """任一标签（OR）的语法树"""
+    node: Node = ('tag', slugs[0])
+    for slug in slugs[1:]:
+        node = ('or', node, ('tag', slug))
+    return node
+
+
+def expression_q(node: Node) -> Q:
+    """将语法树转换为基于子查询的 Q 对象（索引不可用或结果过大时使用）"""
+    kind = node[0]
+    if kind == 'tag':
+        through = Material.tags.through.objects.filter(tag__slug=node[1]).values('material_id')
+        return Q(pk__in=through)
+    if kind == 'not':
+        return ~expression_q(node[1])
+    left, right = expression_q(node[1]), expression_q(node[2])
+    return left & right if kind == 'and' else left | right
+
+
+# ========== 位图索引 ==========
+
+class IndexUnavailable(Exception):
+    """共享缓存中的索引条目缺失（被淘汰）或加锁超时，需要重建"""
+
+
+def tag_slugs(node: Node) -> List[str]:
+    """语法树中出现的标签 slug"""
+    if node[0] == 'tag':
+        return [node[1]]
+    return [slug for child in node[1:] for slug in tag_slugs(child)]
+
+
+class TagIndex:
+    """
+    标签位图索引
+
+    索引数据按条目分别存放在共享缓存中：slugs（{slug: 标签ID}）、universe（已发布素材）
+    和每个标签一条 tag:<ID>（关联该标签的素材，不区分发布状态，查询结果再与 universe 取交集）。
+    每个条目带有递增的戳记，单个标签或素材变化只读写受影响的条目，读-改-写在条目锁内进行，
+    并发修改不会互相覆盖；各进程在本地保留读取过的条目，戳记未变时不再从缓存加载。
+
+    全量构建由 rebuild_tag_index 命令或后台任务执行，不在请求中进行；
+    索引尚未构建、条目被淘汰或写入失败时查询退回到 ORM 子查询，并安排后台重建。
+    构建期间发生的修改记录在待应用列表中，构建完成后依次重放。
+
+    Attributes:
+        generation: 本地条目所属的构建代号
+        entries: {条目名: (戳记, 值)}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generation: Optional[int] = None
+        self.entries: Dict[str, tuple] = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        """索引已开启且使用共享缓存"""
+        config = get_config()
+        return config['ENABLED'] and require_shared_cache(config['CACHE_ALIAS'], 'Tag bitmap index')
+
+    @staticmethod
+    def _cache():
+        return caches[get_config()['CACHE_ALIAS']]
+
+    @contextmanager
+    def _locked(self, key: str):
+        """以 cache.add 实现的跨进程锁"""
+        config = get_config()
+        cache = self._cache()
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + config['LOCK_WAIT']
+        while not cache.add(lock_key, 1, timeout=config['LOCK_TIMEOUT']):
+            if time.monotonic() >= deadline:
+                raise IndexUnavailable(f"Timed out waiting for {lock_key}")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            cache.delete(lock_key)
+
+    # ---------- 查询 ----------
+
+    def _fetch(self, generation: int, names: List[str]) -> Dict[str, object]:
+        """
+        读取条目，本地戳记与缓存一致的条目不再加载
+
+        Raises:
+            IndexUnavailable: 条目或戳记缺失
+        """
+        cache = self._cache()
+        stamps = cache.get_many([stamp_key(generation, name) for name in names])
+        stale = [
+            name for name in names
+            if name not in self.entries or self.entries[name][0] != stamps.get(stamp_key(generation, name))
+        ]
+        if stale:
+            data = cache.get_many([entry_key(generation, name) for name in stale])
+            for name in stale:
+                entry = data.get(entry_key(generation, name))
+                if entry is None or stamp_key(generation, name) not in stamps:
+                    raise IndexUnavailable(f"Tag index entry {name} is missing")
+                self.entries[name] = entry
+        return {name: self.entries[name][1] for name in names}
+
+    def resolve(self, node: Node, slugs: Dict[str, int], values: Dict[str, Bitmap]) -> Bitmap:
+        """按语法树计算素材位图（NOT 以 universe 为全集）"""
+        kind = node[0]
+        if kind == 'tag':
+            tag_id = slugs.get(node[1])
+            return values[tag_key(tag_id)] if tag_id is not None else Bitmap()
+        if kind == 'not':
+            return values['universe'] - self.resolve(node[1], slugs, values)
+        left, right = self.resolve(node[1], slugs, values), self.resolve(node[2], slugs, values)
+        return left & right if kind == 'and' else left | right
+
+    def lookup(self, node: Node) -> Optional[List[int]]:
+        """
+        计算表达式匹配的已发布素材ID
+
+        Returns:
+            Optional[List[int]]: 升序的素材ID；索引不可用时为 None（已安排后台重建）
+        """
+        generation = self._cache().get(GENERATION_KEY)
+        if generation is None:
+            schedule_rebuild()
+            return None
+        with self._lock:
+            if generation != self.generation:
+                self.generation = generation
+                self.entries = {}
+            try:
+                slugs = self._fetch(generation, ['slugs'])['slugs']
+                names = ['universe'] + [tag_key(slugs[slug]) for slug in tag_slugs(node) if slug in slugs]
+                values = self._fetch(generation, list(dict.fromkeys(names)))
+            except IndexUnavailable as e:
+                logger.warning(f"Tag index unavailable, falling back to ORM: {str(e)}")
+                self.invalidate()
+                return None
+            return (self.resolve(node, slugs, values) & values['universe']).to_ids()
+
+    # ---------- 全量构建 ----------
+
+    def rebuild(self) -> int:
+        """
+        从数据库全量构建新一代索引并切换（由命令或后台任务调用）
+
+        Returns:
+            int: 索引中的标签数
+        """
+        cache = self._cache()
+        config = get_config()
+        generation = time.time_ns()
+        started = time.monotonic()
+        cache.set(BUILDING_KEY, generation, timeout=config['BUILD_TIMEOUT'])
+
+        members = defaultdict(list)
+        pairs = Material.tags.through.objects.values_list('tag_id', 'material_id').iterator(chunk_size=10000)
+        for tag_id, material_id in pairs:
+            members[tag_id].append(material_id)
+        slugs = dict(Tag.objects.values_list('slug', 'pk'))
+
+        entries = {
+            'slugs': slugs,
+            'universe': Bitmap.from_ids(
+                Material.objects.filter(status='approved').values_list('pk', flat=True).iterator(chunk_size=10000)
+            ),
+        }
+        for tag_id in slugs.values():
+            entries[tag_key(tag_id)] = Bitmap.from_ids(members.get(tag_id, ()))
+        del members
+        names = list(entries)
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            cache.set_many({entry_key(generation, name): (1, entries[name]) for name in batch}, config['DATA_TTL'])
+            cache.set_many({stamp_key(generation, name): 1 for name in batch}, config['DATA_TTL'])
+
+        # 重放构建期间记录的修改，然后切换到新一代
+        with self._locked(pending_key(generation)):
+            operations = cache.get(pending_key(generation), [])
+            for operation in operations:
+                self._apply(generation, operation)
+            cache.set(GENERATION_KEY, generation, timeout=None)
+            cache.delete_many([BUILDING_KEY, pending_key(generation), REBUILD_SCHEDULED_KEY])
+        logger.info(
+            f"Tag index generation {generation} built in {time.monotonic() - started:.2f}s: "
+            f"{len(slugs)} tags, {len(operations)} replayed changes"
+        )
+        return len(slugs)
+
+    def invalidate(self) -> None:
+        """停用当前索引（查询退回到 ORM）并安排后台重建"""
+        if not self.enabled():
+            return
+        self._cache().delete(GENERATION_KEY)
+        schedule_rebuild()
+
+    # ---------- 增量修改 ----------
+
+    def _modify(self, generation: int, name: str, change, create: bool = False) -> None:
+        """
+        在条目锁内读-改-写单个条目并递增戳记
+
+        Raises:
+            IndexUnavailable: 条目缺失（create=False）或加锁超时
+        """
+        cache = self._cache()
+        key = entry_key(generation, name)
+        with self._locked(key):
+            entry = cache.get(key)
+            if entry is None:
+                if not create:
+                    raise IndexUnavailable(f"Tag index entry {name} is missing")
+                entry = (0, Bitmap())
+            stamp, value = entry
+            value = change(value)
+            ttl = get_config()['DATA_TTL']
+            cache.set(key, (stamp + 1, value), ttl)
+            cache.set(stamp_key(generation, name), stamp + 1, ttl)
+
+    def _apply(self, generation: int, operation: tuple) -> None:
+        """
+        把一项修改应用到指定一代的索引条目
+
+        Args:
+            operation: (类型, 目标, add, remove)
+                universe: 发布/下线的素材ID
+                material: 素材ID，新增/移除关联的标签ID
+                tag: 标签ID，新增/移除关联的素材ID（remove 为 None 表示以 add 替换全部）
+                slug: 标签ID，新 slug（空字符串表示删除）
+        """
+        kind, target, add, remove = operation
+        if kind == 'universe':
+            self._modify(generation, 'universe', members_change(add, remove))
+        elif kind == 'material':
+            for tag_id in add:
+                self._modify(generation, tag_key(tag_id), members_change((target,), ()), create=True)
+            for tag_id in remove:
+                self._modify(generation, tag_key(tag_id), members_change((), (target,)))
+        elif kind == 'tag':
+            change = (lambda bitmap: Bitmap.from_ids(add)) if remove is None else members_change(add, remove)
+            self._modify(generation, tag_key(target), change, create=True)
+        elif kind == 'slug':
+            # target 为标签ID，add 为新 slug（空表示删除）
+            def rename(slugs: Dict[str, int]) -> Dict[str, int]:
+                slugs = {slug: tag_id for slug, tag_id in slugs.items() if tag_id != target}
+                if add:
+                    slugs[add] = target
+                return slugs
+
+            self._modify(generation, 'slugs', rename)
+            if add:
+                self._modify(generation, tag_key(target), lambda bitmap: bitmap, create=True)
+
+    def _submit(self, operation: tuple) -> None:
+        """发布一项修改：应用到当前一代，构建进行中时同时记录到待应用列表"""
+        if not self.enabled():
+            return
+        cache = self._cache()
+        try:
+            building = cache.get(BUILDING_KEY)
+            if building is not None:
+                with self._locked(pending_key(building)):
+                    if cache.get(BUILDING_KEY) == building:
+                        operations = cache.get(pending_key(building), [])
+                        operations.append(operation)
+                        cache.set(pending_key(building), operations, get_config()['BUILD_TIMEOUT'])
+            generation = cache.get(GENERATION_KEY)
+            if generation is not None:
+                self._apply(generation, operation)
+        except IndexUnavailable as e:
+            logger.warning(f"Tag index update failed, scheduling rebuild: {str(e)}")
+            self.invalidate()
+
+    def set_tag(self, tag_id: int, slug: Optional[str]) -> None:
+        """标签新建/改名（slug 为 None 表示删除）"""
+        self._submit(('slug', tag_id, slug or '', ()))
+
+    def set_published(self, add: Tuple[int, ...] = (), remove: Tuple[int, ...] = ()) -> None:
+        """素材发布（add）/下线或删除（remove）"""
+        self._submit(('universe', None, tuple(add), tuple(remove)))
+
+    def set_material_tags(self, material_id: int, add: Tuple[int, ...] = (), remove: Tuple[int, ...] = ()) -> None:
+        """单个素材新增/移除关联的标签"""
+        self._submit(('material', material_id, tuple(add), tuple(remove)))
+
+    def set_tag_materials(self, tag_id: int, add: Tuple[int, ...] = (), remove: Tuple[int, ...] = (),
+                          clear: bool = False) -> None:
+        """单个标签新增/移除关联的素材（clear 时以 add 作为全部关联素材）"""
+        self._submit(('tag', tag_id, tuple(add), None if clear else tuple(remove)))
+
+
+def members_change(add: Tuple[int, ...], remove: Tuple[int, ...]):
+    """位图的修改函数：先移除 remove，再加入 add"""
+    def change(bitmap: Bitmap) -> Bitmap:
+        for value in remove:
+            bitmap.discard(value)
+        for value in add:
+            bitmap.add(value)
+        return bitmap
+
+    return change
+
+
+def schedule_rebuild() -> None:
+    """安排后台任务重建索引（REBUILD_RETRY 秒内只安排一次）"""
+    if not TagIndex.enabled():
+        return
+    if not caches[get_config()['CACHE_ALIAS']].add(REBUILD_SCHEDULED_KEY, 1, timeout=get_config()['REBUILD_RETRY']):
+        return
+    from .tasks import rebuild_tag_index
+    try:
+        rebuild_tag_index.delay()
+    except Exception as e:
+        logger.error(f"Failed to schedule tag index rebuild: {str(e)}")
+
+
+tag_index = TagIndex()
+
+
+def filter_by_tags(queryset: QuerySet, node: Node) -> QuerySet:
+    """
+    按标签表达式筛选已发布素材
+
+    结果在位图索引中计算，以主键 IN 条件交给数据库，不再联表和去重，没有匹配时返回空查询集；
+    索引未启用、尚未构建或结果超过 MAX_IN_IDS 时退回到子查询。
+
+    Args:
+        queryset: 素材查询集
+        node: 标签表达式语法树
+
+    Returns:
+        QuerySet: 筛选后的查询集
+    """
+    if tag_index.enabled():
+        try:
+            ids = tag_index.lookup(node)
+        except Exception as e:
+            logger.error(f"Tag index lookup failed: {str(e)}")
+        else:
+            if ids is not None and not ids:
+                return queryset.none()
+            if ids is not None and len(ids) <= get_config()['MAX_IN_IDS']:
+                return queryset.filter(pk__in=ids)
+    return queryset.filter(expression_q(node))
@@ -0,0 +1,13 @@
+"""
+素材站后台任务（由 runworker 执行）
+"""
+
+from jobs.queue import task
+
+from .tag_index import tag_index
+
+
+@task(queue='default', priority=5, max_attempts=3)
+def rebuild_tag_index():
+    """全量重建标签位图索引"""
+    tag_index.rebuild()
@@ -1,3 +1,1548 @@
-from django.test import TestCase
+import asyncio
+import atexit
+import csv
+import gzip
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO, TextIOWrapper
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from psycopg_pool import ConnectionPool
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.db.models import QuerySet, Sum
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend import replicas
+from backend.db import DEFAULTS as DB_DEFAULTS, POOL_PARAMS, POSTGRESQL_ENGINE, database_config, pool_stats
+from backend.paginators import EstimatedCountPaginator
+from backend.renderers import ORJSONRenderer
+from jobs.models import Job
+from jobs.queue import get_task
+from src.backend.exceptions import ValidationError
+from . import rollups, views
+from .bitmaps import SPARSE_LIMIT, Bitmap
+from .counters import bump_counter, read_counter, reconcile_material_counters, reconcile_user_counters
+from .facets import compute_facets, facet_cache_key
+from .fast_serializers import FastFavoriteListSerializer, FastMaterialListSerializer
+from .hyperloglog import HyperLogLog
+from .models import (
+    Category, DailyAuthorDownloads, DailyMaterialDownloads, DownloadHistory, Favorite, Material, MaterialDailyViews,
+    MaterialRecommendation, MaterialTrendingScore, ModerationLease, SimilarMaterial, Tag, UserRecommendation
+)
+from .moderation import queue_queryset
+from .query_plans import analyze_plan, explain_scenarios
+from .recommendations import InteractionMatrix, build_recommendations, get_config as get_recommendation_config
+from .rollups import _archive_path, archive_downloads, day_bounds, rollup_downloads, rollup_favorites
+from .serializers import FavoriteSerializer, MaterialListSerializer
+from .similarity import FeatureMatrix, get_config as get_similarity_config, rebuild_similar
+from .tag_index import BUILDING_KEY, GENERATION_KEY, TagIndex, entry_key, parse_expression, stamp_key, tag_index
+from .trending import (
+    _decay as trending_decay, compute_trending, get_config as get_trending_config, get_trending_queryset
+)
+from .urls import async_urlpatterns, router
+from .view_tracking import ViewTracker, merge_view_counts, sketch_cache_key
+from .views import MaterialViewSet
+
+User = get_user_model()
+
+# 独立的 SQLite 数据库充当只读副本（ReplicaRoutingTests 使用）
+REPLICA = 'replica_test'
+connections.settings.setdefault(REPLICA, {
+    **connections.settings['default'],
+    'TEST': {**connections.settings['default']['TEST'], 'NAME': None, 'MIRROR': None},
+})
+
+# 跨进程共享的缓存（本机文件缓存），测试依赖共享缓存的功能时使用
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='material-site-cache-')
+atexit.register(shutil.rmtree, SHARED_CACHE_DIR, ignore_errors=True)
+SHARED_CACHES = {
+    **settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': SHARED_CACHE_DIR},
+}
+
+
+def postgresql_sql(queryset) -> str:
+    """以 PostgreSQL 编译器生成查询集的 SQL（不连接数据库）"""
+    connection = PostgreSQLDatabaseWrapper(
+        {**connections['default'].settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, alias='postgresql_compile'
+    )
+    # SELECT ... FOR UPDATE 只能在事务中编译
+    with mock.patch.object(connection, 'get_autocommit', return_value=False):
+        sql, _ = queryset.query.get_compiler(connection=connection).as_sql()
+    return sql
+
+
+# 启用异步读取视图的 URL 配置（AsyncReadViewTests 使用）
+urlpatterns = [
+    path('api/', include(async_urlpatterns + router.urls)),
+]
+
+
+class MaterialDataMixin:
+    """素材、分类、标签和收藏测试数据"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='password123',
+            avatar='avatars/a.png', bio='简介', website='https://example.com'
+        )
+        cls.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='password123')
+
+        parent = Category.objects.create(name='图片', slug='images', icon='fa-image')
+        child = Category.objects.create(name='风景', slug='landscape', parent=parent, sort_order=2)
+        tags = [Tag.objects.create(name=name, slug=slug) for name, slug in
+                [('自然', 'nature'), ('城市', 'city'), ('夜景', 'night')]]
+
+        specs = [
+            {'category': child, 'tags': tags, 'thumbnail': 'thumbnails/1.png', 'price': Decimal('9.90'), 'file_size': 1536},
+            {'category': parent, 'tags': tags[1:2], 'preview_image': 'previews/2.png', 'file_size': 5 * 1024 ** 4},
+            {'category': None, 'tags': [], 'price': Decimal('12.5'), 'file_size': 100},
+            {'category': child, 'tags': tags[:1], 'status': 'draft', 'file_size': 1},
+            {'category': child, 'tags': tags[2:], 'status': 'pending', 'dimensions': '1920x1080', 'file_size': 2048},
+        ]
+        cls.materials = []
+        for i, spec in enumerate(specs):
+            tag_objects = spec.pop('tags')
+            spec.setdefault('status', 'approved')
+            material = Material.objects.create(
+                title=f'素材{i}', slug=f'material-{i}', author=cls.author, main_file=f'materials/{i}.zip', **spec
+            )
+            material.tags.set(tag_objects)
+            cls.materials.append(material)
+
+        Favorite.objects.create(user=cls.viewer, material=cls.materials[0])
+        Favorite.objects.create(user=cls.viewer, material=cls.materials[2])
+        Favorite.objects.create(user=cls.author, material=cls.materials[1])
+
+
+class FastListSerializerTests(MaterialDataMixin, TestCase):
+    """快速列表序列化与 DRF 序列化器输出逐字节一致"""
+
+    def _request(self, user=None) -> Request:
+        request = Request(APIRequestFactory().get('/api/materials/'))
+        if user is not None:
+            request.user = user
+        return request
+
+    def _assert_same_materials(self, user=None):
+        request = self._request(user)
+        queryset = Material.objects.select_related('author', 'category').prefetch_related('tags')
+        expected = MaterialListSerializer(queryset, many=True, context={'request': request}).data
+        actual = FastMaterialListSerializer({'request': request}).serialize(FastMaterialListSerializer.prepare(queryset))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_materials_anonymous(self):
+        self._assert_same_materials()
+
+    def test_materials_authenticated(self):
+        self._assert_same_materials(self.viewer)
+
+    def test_materials_without_request(self):
+        queryset = Material.objects.all()
+        expected = MaterialListSerializer(queryset, many=True).data
+        actual = FastMaterialListSerializer().serialize(FastMaterialListSerializer.prepare(queryset))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_favorites(self):
+        request = self._request(self.viewer)
+        queryset = Favorite.objects.filter(user=self.viewer).order_by('pk')
+        expected = FavoriteSerializer(queryset, many=True, context={'request': request}).data
+        actual = FastFavoriteListSerializer({'request': request}).serialize(FastFavoriteListSerializer.prepare(queryset))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_endpoints_byte_identical(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        urls = [
+            '/api/materials/',
+            '/api/materials/?ordering=price',
+            '/api/materials/?category=landscape',
+            '/api/materials/my_materials/',
+            '/api/materials/drafts/',
+            '/api/favorites/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(FAST_LIST_SERIALIZATION=False):
+                    expected = client.get(url)
+                with override_settings(FAST_LIST_SERIALIZATION=True):
+                    actual = client.get(url)
+                self.assertEqual(expected.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+
+    def test_query_count_independent_of_page_size(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        # 计数、素材、标签、分类素材数、收藏状态
+        with self.assertNumQueries(5):
+            client.get('/api/materials/')
+
+    def test_sparse_fields_byte_identical(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        urls = [
+            '/api/materials/?fields=id,title,thumbnail',
+            '/api/materials/?fields=id,author,category,tags',
+            '/api/materials/?fields=id,title&expand=author,category,tags',
+            '/api/materials/?exclude=tags,is_favorited,author',
+            '/api/materials/?expand=author',
+            '/api/favorites/?fields=id,title,tags',
+            '/api/favorites/?exclude=category&expand=tags',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(FAST_LIST_SERIALIZATION=False):
+                    expected = client.get(url)
+                with override_settings(FAST_LIST_SERIALIZATION=True):
+                    actual = client.get(url)
+                self.assertEqual(expected.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+
+    def test_sparse_fields_output(self):
+        client = APIClient()
+        url = '/api/materials/?category=landscape&fields=title,author,tags&expand=category'
+        data = client.get(url).json()['results']
+        self.assertEqual(list(data[0]), ['title', 'author', 'category', 'tags'])
+        self.assertEqual(data[0]['author'], self.author.pk)
+        self.assertIsInstance(data[0]['category'], dict)
+        self.assertTrue(all(isinstance(tag_id, int) for item in data for tag_id in item['tags']))
+
+        detail = client.get(f'/api/materials/{self.materials[0].pk}/?fields=id,description')
+        self.assertEqual(detail.json(), {'id': self.materials[0].pk, 'description': ''})
+
+    def test_sparse_fields_trim_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        for enabled in (True, False):
+            with self.subTest(fast=enabled), override_settings(FAST_LIST_SERIALIZATION=enabled):
+                # 计数、素材
+                with self.assertNumQueries(2):
+                    client.get('/api/materials/?fields=id,title,author,category')
+                # 计数、素材、标签ID
+                with self.assertNumQueries(3):
+                    client.get('/api/materials/?fields=id,tags')
+
+    def test_sparse_fields_unknown(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/materials/?fields=id,secret').status_code, 400)
+        self.assertEqual(client.get('/api/materials/?expand=title').status_code, 400)
+
+
+class AsyncReadViewTests(MaterialDataMixin, TestCase):
+    """异步读取视图的响应与同步视图集逐字节一致"""
+
+    URLS = [
+        '/api/materials/',
+        '/api/materials/?page=2',
+        '/api/materials/?ordering=price&category=landscape',
+        '/api/materials/?tags=city,night&fields=id,title,tags',
+        '/api/materials/?fields=id,secret',
+        '/api/materials/facets/?material_type=image',
+        '/api/categories/',
+        '/api/tags/',
+        '/api/tags/?ordering=-name',
+    ]
+
+    def _compare(self, urls, user=None):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'} if user else {}
+        for url in urls:
+            with self.subTest(url=url, user=user):
+                expected = self.client.get(url, headers=headers)
+                with override_settings(ROOT_URLCONF=__name__):
+                    actual = async_to_sync(AsyncClient().get)(url, headers=headers)
+                self.assertEqual(actual.status_code, expected.status_code)
+                self.assertEqual(actual.content, expected.content)
+                self.assertEqual(actual['Content-Type'], expected['Content-Type'])
+
+    def test_anonymous(self):
+        self._compare(self.URLS + [f'/api/materials/{self.materials[0].pk}/', '/api/materials/99999/'])
+
+    def test_authenticated(self):
+        self._compare(self.URLS + [f'/api/materials/{self.materials[1].pk}/?exclude=tags'], self.viewer)
+
+    def test_invalid_token(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = async_to_sync(AsyncClient().get)('/api/materials/', headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(CACHES=SHARED_CACHES, VIEW_TRACKING={'CACHE_ALIAS': 'shared', 'FLUSH_INTERVAL': 0})
+    def test_detail_flushes_views_off_event_loop(self):
+        material = self.materials[0]
+        with override_settings(ROOT_URLCONF=__name__):
+            response = async_to_sync(AsyncClient().get)(f'/api/materials/{material.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(MaterialDailyViews.objects.filter(material=material).exists())
+
+    def test_writes_use_sync_view(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = async_to_sync(AsyncClient().post)('/api/materials/', {'title': '新素材'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_drf_hooks_run_off_event_loop(self):
+        in_loop = []
+
+        def recorder(original):
+            def hook(view, *args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    in_loop.append(True)
+                except RuntimeError:
+                    in_loop.append(False)
+                return original(view, *args, **kwargs)
+            return hook
+
+        with override_settings(ROOT_URLCONF=__name__), \
+                mock.patch.object(views.TagViewSet, 'initial', recorder(views.TagViewSet.initial)), \
+                mock.patch.object(views.TagViewSet, 'finalize_response', recorder(views.TagViewSet.finalize_response)):
+            response = async_to_sync(AsyncClient().get)('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(in_loop, [False, False])
+
+
+@override_settings(DATABASE_REPLICATION={'REPLICAS': [REPLICA], 'PIN_SECONDS': 30})
+class ReplicaRoutingTests(TestCase):
+    """只读副本路由、写后固定与副本故障回退"""
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='password123')
+        cls.material = Material.objects.create(
+            title='素材', slug='material', author=cls.user, main_file='materials/m.zip', file_size=1, status='approved'
+        )
+        # 两个库内容不同，便于区分读取来源
+        Tag.objects.create(name='主库', slug='primary')
+        Tag.objects.using(REPLICA).create(name='副本', slug='replica')
+        Category.objects.create(name='主库分类', slug='primary')
+        Category.objects.using(REPLICA).create(name='副本分类', slug='replica')
+
+    def setUp(self):
+        replicas._failed_until.clear()
+        cache.clear()
+
+    @staticmethod
+    def _tag_names(client) -> list:
+        response = client.get('/api/tags/')
+        return [tag['name'] for tag in response.json()]
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(self._tag_names(APIClient()), ['副本'])
+        # 副本中没有素材
+        self.assertEqual(APIClient().get('/api/materials/').json()['count'], 0)
+
+    def test_async_reads_use_replica(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = async_to_sync(AsyncClient().get)('/api/tags/')
+        self.assertEqual([tag['name'] for tag in response.json()], ['副本'])
+        self.assertIsNone(replicas.current_replica())
+
+    def test_write_pins_to_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/favorites/', {'material': self.material.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Favorite.objects.using('default').filter(user=self.user).exists())
+        self.assertIn('db_pin', response.cookies)
+
+        # 带 Cookie 的后续读取走主库
+        self.assertEqual(self._tag_names(client), ['主库'])
+        # 不带 Cookie 的令牌客户端按用户标记固定
+        other_device = APIClient()
+        other_device.force_authenticate(self.user)
+        self.assertEqual(self._tag_names(other_device), ['主库'])
+        # 其他访客仍读副本
+        self.assertEqual(self._tag_names(APIClient()), ['副本'])
+
+    def test_replica_error_falls_back_to_primary(self):
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute(f'DROP TABLE {Tag._meta.db_table}')
+        self.assertEqual(self._tag_names(APIClient()), ['主库'])
+        self.assertEqual(replicas.healthy_replicas(), [])
+        self.assertEqual(self._tag_names(APIClient()), ['主库'])
+
+    def test_category_tree_built_from_primary(self):
+        # 版本号在写入提交后递增，副本可能尚未同步，快照只能从主库构建
+        response = APIClient().get('/api/categories/tree/')
+        self.assertEqual([node['slug'] for node in response.json()], ['primary'])
+
+    def test_unhandled_error_resets_replica(self):
+        # 未处理的异常（500）绕过 finalize_response，副本仍须在 dispatch 结束时恢复
+        with mock.patch.object(MaterialViewSet, 'list', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                APIClient().get('/api/materials/')
+        self.assertIsNone(replicas.current_replica())
+
+
+@override_settings(THROTTLING={'RATES': {'material.like': {'user': '2/min', 'ip': '3/min'}}})
+class TokenBucketThrottleTests(MaterialDataMixin, TestCase):
+    """写入类动作的令牌桶限流"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _like(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/materials/{self.materials[0].pk}/like/')
+
+    def test_user_bucket(self):
+        with mock.patch('backend.throttling.time.time', return_value=1000.0) as clock:
+            self.assertEqual(self._like(self.viewer).status_code, 200)
+            self.assertEqual(self._like(self.viewer).status_code, 200)
+            response = self._like(self.viewer)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+
+            # 每 30 秒补充一个令牌
+            clock.return_value = 1030.0
+            self.assertEqual(self._like(self.viewer).status_code, 200)
+            self.assertEqual(self._like(self.viewer).status_code, 429)
+
+    def test_ip_bucket_shared_by_users(self):
+        with mock.patch('backend.throttling.time.time', return_value=1000.0):
+            self.assertEqual(self._like(self.viewer).status_code, 200)
+            self.assertEqual(self._like(self.viewer).status_code, 200)
+            self.assertEqual(self._like(self.author).status_code, 200)
+            self.assertEqual(self._like(self.author).status_code, 429)
+
+    def test_unconfigured_actions_not_throttled(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        for _ in range(5):
+            self.assertEqual(client.post(f'/api/materials/{self.materials[0].pk}/favorite/').status_code, 200)
+
+
+class CategoryTreeTests(MaterialDataMixin, TestCase):
+    """分类树快照"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_nested_tree_with_counts(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/categories/tree/')
+        self.assertEqual(response.status_code, 200)
+        tree = response.json()
+        self.assertEqual([node['slug'] for node in tree], ['images'])
+        root = tree[0]
+        self.assertEqual((root['material_count'], root['total_material_count']), (1, 2))
+        child = root['children'][0]
+        self.assertEqual(child['slug'], 'landscape')
+        # 草稿和待审核素材不计数
+        self.assertEqual((child['material_count'], child['total_material_count']), (1, 1))
+        self.assertEqual(child['children'], [])
+
+        # 后续请求只读缓存
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/categories/tree/').content, response.content)
+
+    def test_signals_bump_version(self):
+        self.client.get('/api/categories/tree/')
+        material = self.materials[4]
+        material.status = 'approved'
+        with self.captureOnCommitCallbacks(execute=True):
+            material.save(update_fields=['status'])
+        child = self.client.get('/api/categories/tree/').json()[0]['children'][0]
+        self.assertEqual(child['material_count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(slug='landscape').update(is_active=False)
+            Category.objects.get(slug='images').save()
+        self.assertEqual(self.client.get('/api/categories/tree/').json()[0]['children'], [])
+
+    def test_counter_updates_keep_snapshot(self):
+        self.client.get('/api/categories/tree/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.materials[0].save(update_fields=['view_count'])
+        with self.assertNumQueries(0):
+            self.client.get('/api/categories/tree/')
+
+
+class AdminPerformanceTests(MaterialDataMixin, TestCase):
+    """后台大表列表"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password123')
+        self.client.force_login(self.admin)
+
+    def test_changelists(self):
+        for url in ['/admin/material_site/material/', '/admin/material_site/downloadhistory/',
+                    '/admin/material_site/favorite/', '/admin/material_site/material/?created_at__year=2026']:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+
+    def test_change_form_uses_autocomplete(self):
+        response = self.client.get(f'/admin/material_site/material/{self.materials[0].pk}/change/')
+        self.assertEqual(response.status_code, 200)
+        for name in ['author', 'category', 'tags']:
+            self.assertContains(response, f'data-field-name="{name}"')
+        response = self.client.get('/admin/autocomplete/', {
+            'term': '自', 'app_label': 'material_site', 'model_name': 'material', 'field_name': 'tags'
+        })
+        self.assertEqual([item['text'] for item in response.json()['results']], ['自然'])
+
+    def test_exact_count_without_estimate(self):
+        # SQLite 没有估算行数，回退到精确计数
+        self.assertEqual(EstimatedCountPaginator(Material.objects.all(), 2).count, len(self.materials))
+
+
+class BulkModerationTests(MaterialDataMixin, TestCase):
+    """批量审核"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password123')
+
+    def _moderate(self, user, action, ids):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/materials/moderate/', {'action': action, 'ids': ids}, format='json')
+
+    def test_approve_in_one_update(self):
+        draft, pending = self.materials[3], self.materials[4]
+        published_at = self.materials[0].published_at
+        ids = [self.materials[0].pk, draft.pk, pending.pk]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self._moderate(self.admin, 'approve', ids)
+        self.assertEqual(response.json(), {'action': 'approve', 'updated': 2})
+        self.assertEqual(len(callbacks), 2)
+
+        for material in (draft, pending):
+            material.refresh_from_db()
+            self.assertEqual(material.status, 'approved')
+            self.assertIsNotNone(material.published_at)
+        self.materials[0].refresh_from_db()
+        self.assertEqual(self.materials[0].published_at, published_at)
+        # 分类树快照已失效
+        child = self.client.get('/api/categories/tree/').json()[0]['children'][0]
+        self.assertEqual(child['material_count'], 3)
+
+    def test_feature_skips_index_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self._moderate(self.admin, 'feature', [self.materials[0].pk])
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(callbacks, [])
+        self.assertTrue(Material.objects.get(pk=self.materials[0].pk).is_featured)
+
+    def test_requires_admin_and_valid_action(self):
+        self.assertEqual(self._moderate(self.viewer, 'approve', [self.materials[3].pk]).status_code, 403)
+        self.assertEqual(self._moderate(self.admin, 'publish', [self.materials[3].pk]).status_code, 400)
+        self.assertEqual(self._moderate(self.admin, 'approve', []).status_code, 400)
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        response = self.client.post('/admin/material_site/material/', {
+            'action': 'reject_materials', '_selected_action': [self.materials[3].pk, self.materials[4].pk]
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Material.objects.filter(status='rejected').count(), 2)
+
+
+class ModerationQueueTests(MaterialDataMixin, TestCase):
+    """审核队列领取与租约"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.moderators = [
+            User.objects.create_user(username=f'mod{i}', email=f'mod{i}@example.com', password='password123',
+                                     is_staff=True)
+            for i in range(2)
+        ]
+        cls.pending = [cls.materials[4]] + [
+            Material.objects.create(title=f'待审{i}', slug=f'pending-{i}', author=cls.author,
+                                    main_file=f'materials/p{i}.zip', file_size=1, status='pending')
+            for i in range(3)
+        ]
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    @staticmethod
+    def _ids(response) -> list:
+        return [lease['material']['id'] for lease in response.json()]
+
+    def test_parallel_claims_are_disjoint(self):
+        first = self._ids(self._client(self.moderators[0]).post('/api/moderation/claim/', {'size': 2}))
+        second = self._ids(self._client(self.moderators[1]).post('/api/moderation/claim/', {'size': 10}))
+        self.assertEqual(first, [material.pk for material in self.pending[:2]])
+        self.assertEqual(second, [material.pk for material in self.pending[2:]])
+        self.assertEqual(self._client(self.moderators[1]).post('/api/moderation/claim/').json(), [])
+        self.assertEqual(self._ids(self._client(self.moderators[0]).get('/api/moderation/')), first)
+
+    def test_expired_and_released_leases_return_to_queue(self):
+        client = self._client(self.moderators[0])
+        claimed = self._ids(client.post('/api/moderation/claim/', {'size': 2}))
+        ModerationLease.objects.filter(material_id=claimed[0]).update(expires_at=timezone.now())
+        self.assertEqual(client.post('/api/moderation/renew/', {'ids': claimed}, format='json').json(),
+                         {'renewed': 1})
+        self.assertEqual(client.post('/api/moderation/release/', {'ids': claimed[1:]}, format='json').json(),
+                         {'released': 1})
+
+        other = self._ids(self._client(self.moderators[1]).post('/api/moderation/claim/', {'size': 10}))
+        self.assertEqual(other, [claimed[0]] + [material.pk for material in self.pending[1:]])
+
+    def test_decide_requires_lease(self):
+        client = self._client(self.moderators[0])
+        claimed = self._ids(client.post('/api/moderation/claim/', {'size': 1}))
+        response = client.post('/api/moderation/decide/', {
+            'action': 'approve', 'ids': claimed + [self.pending[1].pk]
+        }, format='json')
+        self.assertEqual(response.json(), {'updated': claimed, 'skipped': [self.pending[1].pk]})
+        self.assertEqual(Material.objects.get(pk=claimed[0]).status, 'approved')
+        self.assertEqual(Material.objects.get(pk=self.pending[1].pk).status, 'pending')
+        self.assertFalse(ModerationLease.objects.exists())
+
+        response = client.post('/api/moderation/decide/', {'action': 'feature', 'ids': claimed}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._client(self.viewer).post('/api/moderation/claim/').status_code, 403)
+
+    def test_postgresql_claim_query(self):
+        # PostgreSQL 不允许对外连接可为空的一侧加 FOR UPDATE，租约须以子查询排除
+        queryset = queue_queryset(timezone.now()).select_for_update(skip_locked=True).values_list('pk', flat=True)
+        sql = postgresql_sql(queryset[:10])
+        self.assertNotIn('JOIN', sql)
+        self.assertIn('NOT EXISTS', sql)
+        self.assertTrue(sql.endswith('FOR UPDATE SKIP LOCKED'))
+
+
+class BitmapTests(SimpleTestCase):
+    """压缩位图的集合运算与 Python 集合一致"""
+
+    def setUp(self):
+        rng = random.Random(7)
+        # 稀疏块、稠密（位集）块和只在一侧出现的块
+        self.a = set(rng.sample(range(0, 1 << 16), 50)) | set(rng.sample(range(1 << 16, 2 << 16), SPARSE_LIMIT + 500))
+        self.b = set(rng.sample(range(0, 1 << 16), SPARSE_LIMIT + 100)) | set(rng.sample(range(1 << 16, 2 << 16), 30))
+        self.b |= {5 << 16, (5 << 16) + 1}
+
+    def test_set_operations(self):
+        a, b = Bitmap.from_ids(self.a), Bitmap.from_ids(self.b)
+        self.assertEqual((a & b).to_ids(), sorted(self.a & self.b))
+        self.assertEqual((a | b).to_ids(), sorted(self.a | self.b))
+        self.assertEqual((a - b).to_ids(), sorted(self.a - self.b))
+        self.assertEqual((b - a).to_ids(), sorted(self.b - self.a))
+        self.assertEqual(len(a | b), len(self.a | self.b))
+        # 运算不修改操作数
+        self.assertEqual(a.to_ids(), sorted(self.a))
+
+    def test_add_discard_and_membership(self):
+        bitmap = Bitmap.from_ids(self.a)
+        for value in [3, 1 << 16, 9 << 16]:
+            bitmap.add(value)
+            self.assertIn(value, bitmap)
+        for value in list(self.a)[:20] + [9 << 16]:
+            bitmap.discard(value)
+            self.assertNotIn(value, bitmap)
+        bitmap.discard(123 << 16)
+        expected = (self.a | {3, 1 << 16}) - set(list(self.a)[:20])
+        self.assertEqual(bitmap.to_ids(), sorted(expected))
+        self.assertFalse(Bitmap.from_ids([7]) - Bitmap.from_ids([7]))
+
+
+class TagExpressionTests(SimpleTestCase):
+    """标签表达式解析"""
+
+    def test_precedence(self):
+        self.assertEqual(
+            parse_expression('a OR b AND NOT c'),
+            ('or', ('tag', 'a'), ('and', ('tag', 'b'), ('not', ('tag', 'c'))))
+        )
+        self.assertEqual(
+            parse_expression('(a, b) AND NOT NOT c-d'),
+            ('and', ('or', ('tag', 'a'), ('tag', 'b')), ('not', ('not', ('tag', 'c-d'))))
+        )
+        self.assertEqual(parse_expression('a AND b AND c'), ('and', ('and', ('tag', 'a'), ('tag', 'b')), ('tag', 'c')))
+
+    def test_errors(self):
+        for text in ['', '   ', 'a AND', '(a OR b', 'a b', 'a )', 'AND a', 'a, ,b', 'a $ b', 'NOT']:
+            with self.subTest(text=text), self.assertRaises(ValidationError):
+                parse_expression(text)
+        with self.assertRaises(ValidationError):
+            parse_expression(' OR '.join(['a'] * 10), max_tokens=5)
+
+
+@override_settings(CACHES=SHARED_CACHES, TAG_INDEX={'CACHE_ALIAS': 'shared'})
+class TagIndexTests(MaterialDataMixin, TestCase):
+    """标签位图索引与信号同步"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        tag_index.generation = None
+        tag_index.entries = {}
+
+    def _slugs(self, expression) -> list:
+        response = self.client.get('/api/materials/', {'tag_expr': expression})
+        return sorted(item['slug'] for item in response.json()['results'])
+
+    def _stamps(self) -> dict:
+        generation = caches['shared'].get(GENERATION_KEY)
+        names = ['universe'] + [f'tag:{tag.pk}' for tag in Tag.objects.order_by('slug')]
+        return {name: caches['shared'].get(stamp_key(generation, name)) for name in names}
+
+    def _tag(self, slug) -> Tag:
+        return Tag.objects.get(slug=slug)
+
+    def test_falls_back_and_schedules_rebuild(self):
+        # 索引尚未构建：查询走 ORM，只安排一次后台重建
+        self.assertEqual(self._slugs('nature AND city'), ['material-0'])
+        self.assertEqual(self._slugs('NOT nature'), ['material-1', 'material-2'])
+        job = Job.objects.get(name='material_site.tasks.rebuild_tag_index')
+        get_task(job.name).func(*job.args, **job.kwargs)
+        with self.assertNumQueries(0):
+            ids = tag_index.lookup(parse_expression('city OR night'))
+        self.assertEqual(ids, sorted([self.materials[0].pk, self.materials[1].pk]))
+
+    def test_expressions(self):
+        call_command('rebuild_tag_index', stdout=StringIO())
+        self.assertEqual(self._slugs('nature AND city'), ['material-0'])
+        self.assertEqual(self._slugs('city OR night'), ['material-0', 'material-1'])
+        self.assertEqual(self._slugs('NOT nature'), ['material-1', 'material-2'])
+        self.assertEqual(self._slugs('missing'), [])
+        self.assertFalse(Job.objects.exists())
+
+    def test_signals_write_only_affected_entries(self):
+        tag_index.rebuild()
+        before = self._stamps()
+        material = self.materials[4]
+        material.status = 'approved'
+        with self.captureOnCommitCallbacks(execute=True):
+            material.save(update_fields=['status'])
+            self.materials[2].tags.add(self._tag('night'))
+        after = self._stamps()
+        night, city, nature = (f'tag:{self._tag(slug).pk}' for slug in ['night', 'city', 'nature'])
+        self.assertEqual(after['universe'], before['universe'] + 1)
+        self.assertEqual(after[night], before[night] + 1)
+        self.assertEqual((after[city], after[nature]), (before[city], before[nature]))
+
+        with self.assertNumQueries(0):
+            ids = tag_index.lookup(('tag', 'night'))
+        self.assertEqual(ids, sorted([self.materials[0].pk, self.materials[2].pk, material.pk]))
+
+        # 下线后不再出现在结果中；清空标签只移除原有的标签
+        with self.captureOnCommitCallbacks(execute=True):
+            material.status = 'draft'
+            material.save(update_fields=['status'])
+            self.materials[0].tags.clear()
+        self.assertEqual(tag_index.lookup(('tag', 'night')), [self.materials[2].pk])
+        self.assertEqual(tag_index.lookup(('tag', 'city')), [self.materials[1].pk])
+
+    def test_other_process_reuses_unchanged_entries(self):
+        tag_index.rebuild()
+        writer, reader = TagIndex(), TagIndex()
+        reader.lookup(('tag', 'city'))
+        writer.set_material_tags(self.materials[2].pk, add=(self._tag('city').pk,))
+        with self.assertNumQueries(0), mock.patch.object(FileBasedCache, 'get_many', wraps=caches['shared'].get_many) as get_many:
+            ids = reader.lookup(('tag', 'city'))
+        self.assertEqual(ids, sorted([self.materials[0].pk, self.materials[1].pk, self.materials[2].pk]))
+        # 戳记两次读取，只重新加载变化的 tag:city
+        self.assertEqual(get_many.call_count, 3)
+
+    def test_locked_entry_is_not_overwritten(self):
+        tag_index.rebuild()
+        generation = caches['shared'].get(GENERATION_KEY)
+        city = f'tag:{self._tag("city").pk}'
+        caches['shared'].add(f'{entry_key(generation, city)}:lock', 1)
+        with override_settings(TAG_INDEX={'CACHE_ALIAS': 'shared', 'LOCK_WAIT': 0}):
+            tag_index.set_material_tags(self.materials[2].pk, add=(self._tag('city').pk,))
+        # 拿不到锁时放弃增量，停用索引并安排重建，查询退回 ORM
+        self.assertIsNone(caches['shared'].get(GENERATION_KEY))
+        self.assertIsNone(tag_index.lookup(('tag', 'city')))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_evicted_entry_falls_back(self):
+        tag_index.rebuild()
+        generation = caches['shared'].get(GENERATION_KEY)
+        caches['shared'].delete(entry_key(generation, f'tag:{self._tag("city").pk}'))
+        self.assertIsNone(tag_index.lookup(('tag', 'city')))
+        self.assertEqual(self._slugs('city'), ['material-0', 'material-1'])
+
+    def test_changes_during_build_are_replayed(self):
+        generation = time.time_ns()
+        caches['shared'].set(BUILDING_KEY, generation)
+        # 构建读取数据库之后提交的修改（数据库中已有，构建结果中没有）
+        tag_index.set_material_tags(self.materials[2].pk, add=(self._tag('night').pk,))
+        with mock.patch('material_site.tag_index.time.time_ns', return_value=generation):
+            tag_index.rebuild()
+        self.assertEqual(tag_index.lookup(('tag', 'night')), [self.materials[0].pk, self.materials[2].pk])
+        self.assertIsNone(caches['shared'].get(BUILDING_KEY))
+
+    def test_disabled_without_shared_cache(self):
+        with override_settings(TAG_INDEX={'CACHE_ALIAS': 'default'}):
+            self.assertFalse(tag_index.enabled())
+            self.assertEqual(self._slugs('nature AND city'), ['material-0'])
+            with self.assertRaises(CommandError):
+                call_command('rebuild_tag_index')
+        self.assertFalse(Job.objects.exists())
+
+    def test_explain_queries_with_empty_tag_result(self):
+        # 标签索引中没有匹配的素材时查询集为空，不能编译为 SQL
+        Material.objects.update(status='draft')
+        tag_index.rebuild()
+        out = StringIO()
+        call_command('explain_queries', 'material_list_tags', 'material_list', stdout=out)
+        self.assertIn('结果为空', out.getvalue())
+        self.assertIn('分析完成: 2 个查询', out.getvalue())
+
+
+class HyperLogLogTests(SimpleTestCase):
+    """HyperLogLog 基数估计"""
+
+    def test_estimate_within_error(self):
+        for count in [10, 1000, 50000]:
+            sketch = HyperLogLog(12)
+            for i in range(count):
+                sketch.add(f'viewer-{i}')
+            # p=12 的标准误差约 1.6%，取 4 倍
+            with self.subTest(count=count):
+                self.assertLessEqual(abs(sketch.count() - count), max(count * 0.065, 1))
+
+    def test_add_reports_changes_and_ignores_duplicates(self):
+        sketch = HyperLogLog(10)
+        self.assertTrue(sketch.add('a'))
+        self.assertFalse(sketch.add('a'))
+        self.assertEqual(sketch.count(), 1)
+        self.assertEqual(HyperLogLog(10).count(), 0)
+
+    def test_merge_is_union(self):
+        left, right, union = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+        for i in range(3000):
+            (left if i % 2 else right).add(str(i))
+            union.add(str(i))
+        merged = HyperLogLog(10, left.registers).merge(right)
+        self.assertEqual(merged.registers, union.registers)
+        self.assertTrue(merged.covers(left) and merged.covers(right))
+        self.assertFalse(left.covers(merged))
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(11))
+
+    def test_serialization(self):
+        sketch = HyperLogLog(8)
+        for i in range(100):
+            sketch.add(str(i))
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+        self.assertEqual((restored.precision, restored.registers), (8, sketch.registers))
+        self.assertEqual(len(sketch.to_bytes()), 1 + 256)
+        for precision in (3, 17):
+            with self.assertRaises(ValueError):
+                HyperLogLog(precision)
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_bytes(bytes([10]) + bytes(10))
+
+
+@override_settings(CACHES=SHARED_CACHES, VIEW_TRACKING={'CACHE_ALIAS': 'shared', 'FLUSH_INTERVAL': 3600})
+class ViewTrackingTests(MaterialDataMixin, TestCase):
+    """浏览草图的刷新与合并"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.tracker = ViewTracker()
+
+    def _view(self, material, *viewers):
+        for viewer in viewers:
+            self.tracker.record_view(material.pk, viewer)
+
+    def test_flush_and_merge_reconcile(self):
+        material = self.materials[0]
+        self._view(material, 'u:1', 'u:2', 'u:1', 'a:ip')
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.tracker.flush(), 0)
+
+        self.assertEqual(merge_view_counts(), 1)
+        material.refresh_from_db()
+        self.assertEqual(material.view_count, 3)
+        self.assertEqual(MaterialDailyViews.objects.get(material=material).unique_views, 3)
+        # 重复合并不会重复计数
+        self.assertEqual(merge_view_counts(), 0)
+
+        # 另一个进程记录的访客合并进同一草图，只累加增量
+        other = ViewTracker()
+        other.record_view(material.pk, 'u:2')
+        other.record_view(material.pk, 'u:3')
+        other.flush()
+        self.assertEqual(merge_view_counts(), 1)
+        material.refresh_from_db()
+        self.assertEqual(material.view_count, 4)
+
+    def test_overwritten_sketch_is_rewritten(self):
+        material = self.materials[1]
+        self._view(material, 'u:1', 'u:2')
+        # 模拟其他进程的并发写入覆盖了本进程的草图
+        with mock.patch.object(FileBasedCache, 'set_many'):
+            self.tracker.flush()
+        self.assertEqual(self.tracker.flush(), 1)
+        data = caches['shared'].get(sketch_cache_key(timezone.localdate(), material.pk))
+        self.assertEqual(HyperLogLog.from_bytes(data).count(), 2)
+
+    def test_requires_shared_cache(self):
+        with override_settings(VIEW_TRACKING={'CACHE_ALIAS': 'default'}):
+            self._view(self.materials[0], 'u:1')
+            self.assertEqual(self.tracker._dirty, set())
+            with self.assertRaises(CommandError):
+                call_command('merge_view_counts', stdout=StringIO())
+
+
+class ORJSONRendererTests(MaterialDataMixin, TestCase):
+    """orjson 渲染器与 DRF JSONRenderer 的输出对比"""
+
+    def test_endpoints_match_json_renderer(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        for url in ['/api/materials/', f'/api/materials/{self.materials[0].pk}/', '/api/materials/?expand=author',
+                    '/api/favorites/', '/api/categories/', '/api/tags/']:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_values(self):
+        data = {
+            'text': '中文 ', 'price': Decimal('9.90'), 'created_at': timezone.now(),
+            'nested': [1, None, True, {'key': 'value'}], 1: 'non-string key',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_big_int_falls_back(self):
+        data = {'value': 2 ** 70, 'items': [-(2 ** 64)]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_documented_differences(self):
+        # 浮点数写法不同但数值相同；NaN 输出为 null（DRF 抛出 ValueError）
+        data = [1e-05, 1e+20, 0.1]
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONRenderer().render([float('nan')]), b'[null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+
+
+class QueryPlanTests(MaterialDataMixin, TestCase):
+    """典型查询的执行计划分析"""
+
+    def test_scenario_index_from_model_meta(self):
+        result, = explain_scenarios(['material_list'])
+        index = result['index']
+        self.assertEqual(index['fields'], ['-created_at'])
+        self.assertEqual(index['condition'], "status = 'approved'")
+        self.assertTrue(index['defined'] and index['applied'])
+        self.assertEqual(index['used'], 'material_approved_created_idx' in result['plan'])
+
+    def test_analyze_postgresql_plan(self):
+        plan = '\n'.join([
+            'Limit  (cost=10.0..10.1 rows=20 width=8)',
+            '  ->  Sort  (cost=10.0..10.5 rows=200 width=8)',
+            '        ->  Seq Scan on materials  (cost=0.0..5.0 rows=200 width=8)',
+            '  ->  Index Scan using material_approved_created_idx on materials',
+        ])
+        self.assertEqual(analyze_plan(plan, 'postgresql'), ['额外排序', '全表扫描: materials'])
+        self.assertEqual(analyze_plan('Index Only Scan using users_pkey on users', 'postgresql'), [])
+
+    def test_analyze_sqlite_plan(self):
+        plan = 'SCAN materials\nSEARCH users USING INTEGER PRIMARY KEY (rowid=?)\nUSE TEMP B-TREE FOR ORDER BY'
+        self.assertEqual(analyze_plan(plan, 'sqlite'), ['全表扫描: materials', '额外排序: FOR ORDER BY'])
+        self.assertEqual(analyze_plan('SCAN materials USING INDEX material_approved_created_idx', 'sqlite'), [])
+
+
+class FavoriteToggleTests(MaterialDataMixin, TestCase):
+    """收藏切换与收藏计数"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def _toggle(self, pk):
+        return self.client.post(f'/api/materials/{pk}/favorite/')
+
+    def test_toggle_updates_counter(self):
+        material = self.materials[0]
+        Material.objects.filter(pk=material.pk).update(favorite_count=1)
+        self.assertEqual(self._toggle(material.pk).json(), {'favorited': True, 'count': 2})
+        self.assertTrue(Favorite.objects.filter(user=self.author, material=material).exists())
+        self.assertEqual(self._toggle(material.pk).json(), {'favorited': False, 'count': 1})
+        self.assertFalse(Favorite.objects.filter(user=self.author, material=material).exists())
+
+    def test_unfavorite_keeps_counter_non_negative(self):
+        material = self.materials[1]
+        self.assertEqual(self._toggle(material.pk).json(), {'favorited': False, 'count': 0})
+
+    def test_missing_or_unpublished_material(self):
+        for pk in [99999, 'abc', self.materials[3].pk]:
+            with self.subTest(pk=pk):
+                self.assertEqual(self._toggle(pk).status_code, 404)
+        self.assertEqual(Material.objects.get(pk=self.materials[3].pk).favorite_count, 0)
+        self.assertEqual(APIClient().post(f'/api/materials/{self.materials[0].pk}/favorite/').status_code, 401)
+
+
+class DownloadArchiveTests(MaterialDataMixin, TestCase):
+    """原始下载记录归档与汇总、对账"""
+
+    def setUp(self):
+        self.archive_dir = Path(tempfile.mkdtemp(prefix='download-archive-'))
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.day = timezone.localdate() - timedelta(days=200)
+        start, _ = day_bounds(self.day)
+        for i, material in enumerate(self.materials[:2] * 2 + self.materials[:1]):
+            DownloadHistory.objects.create(
+                user=self.viewer, material=material, downloaded_at=start + timedelta(hours=i), ip_address='127.0.0.1'
+            )
+
+    def _archive(self):
+        return archive_downloads(retention_days=180, archive_dir=self.archive_dir, chunk_size=2)
+
+    def _archived_rows(self):
+        path = _archive_path(self.archive_dir, self.day)
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return list(csv.reader(archive))[1:]
+
+    def test_archive_then_rollup_and_reconcile(self):
+        self.assertEqual(self._archive(), 5)
+        self.assertFalse(DownloadHistory.objects.exists())
+        self.assertEqual(len(self._archived_rows()), 5)
+        self.assertEqual(
+            dict(DailyMaterialDownloads.objects.filter(date=self.day, archived=True)
+                 .values_list('material', 'downloads')),
+            {self.materials[0].pk: 3, self.materials[1].pk: 2},
+        )
+        self.assertEqual(DailyAuthorDownloads.objects.get(date=self.day, archived=True).downloads, 5)
+
+        # 归档后重新汇总不会清空已归档日期，对账也不会重复计数
+        rollup_downloads(since=self.day)
+        total = DailyMaterialDownloads.objects.filter(date=self.day).aggregate(total=Sum('downloads'))['total']
+        self.assertEqual(total, 5)
+        reconcile_material_counters()
+        self.assertEqual(Material.objects.get(pk=self.materials[0].pk).download_count, 3)
+        self.assertEqual(Material.objects.get(pk=self.materials[1].pk).download_count, 2)
+
+    def test_failed_delete_rolls_back_archived_flag(self):
+        original = QuerySet.delete
+
+        def failing_delete(queryset):
+            if queryset.model is DownloadHistory:
+                raise RuntimeError('delete failed')
+            return original(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', autospec=True, side_effect=failing_delete):
+            with self.assertRaises(RuntimeError):
+                self._archive()
+        self.assertEqual(DownloadHistory.objects.count(), 5)
+        self.assertFalse(DailyMaterialDownloads.objects.filter(archived=True).exists())
+        self.assertFalse(DailyAuthorDownloads.objects.filter(archived=True).exists())
+
+    def test_records_added_while_archiving_are_retried(self):
+        write_archive = rollups._write_archive
+
+        def write_then_download(raw, path, chunk_size):
+            last_pk = write_archive(raw, path, chunk_size)
+            DownloadHistory.objects.create(
+                user=self.author, material=self.materials[1], downloaded_at=day_bounds(self.day)[0]
+            )
+            return last_pk
+
+        with mock.patch.object(rollups, '_write_archive', side_effect=write_then_download):
+            self.assertEqual(self._archive(), 0)
+        self.assertEqual(DownloadHistory.objects.count(), 6)
+        self.assertFalse(DailyMaterialDownloads.objects.filter(archived=True).exists())
+        self.assertFalse(_archive_path(self.archive_dir, self.day).exists())
+
+        self.assertEqual(self._archive(), 6)
+        self.assertEqual(len(self._archived_rows()), 6)
+        self.assertEqual(DailyAuthorDownloads.objects.get(date=self.day, archived=True).downloads, 6)
+
+    def test_late_records_are_added_to_archived_rollup(self):
+        self.assertEqual(self._archive(), 5)
+        start, _ = day_bounds(self.day)
+        for material in [self.materials[1], self.materials[2]]:
+            DownloadHistory.objects.create(user=self.author, material=material, downloaded_at=start)
+
+        # 已归档日期的迟到记录累加到原有汇总，而不是删除后丢失
+        self.assertEqual(self._archive(), 2)
+        self.assertFalse(DownloadHistory.objects.exists())
+        self.assertEqual(
+            dict(DailyMaterialDownloads.objects.filter(date=self.day, archived=True)
+                 .values_list('material', 'downloads')),
+            {self.materials[0].pk: 3, self.materials[1].pk: 3, self.materials[2].pk: 1},
+        )
+        self.assertEqual(DailyAuthorDownloads.objects.get(date=self.day, archived=True).downloads, 7)
+
+
+class RecommendationTests(MaterialDataMixin, TestCase):
+    """协同过滤推荐排序与分块计算"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        first, second = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='password123')
+            for i in range(2)
+        ]
+        # 收藏：viewer {0, 2}，author {1}，first {0, 1, 3(草稿)}，second {0, 2}
+        for user, indexes in [(first, [0, 1, 3]), (second, [0, 2])]:
+            for i in indexes:
+                Favorite.objects.create(user=user, material=cls.materials[i])
+
+    def _recommended(self, material):
+        return list(MaterialRecommendation.objects.filter(material=material).values_list('recommended', flat=True))
+
+    def test_material_and_user_ranking(self):
+        self.assertEqual(build_recommendations(get_recommendation_config()), (3, 4))
+        materials = self.materials
+        # 素材0: 与素材2 共同用户 2 个（0.82），与素材1 共同用户 1 个（0.41）；草稿素材3 不被推荐
+        self.assertEqual(self._recommended(materials[0]), [materials[2].pk, materials[1].pk])
+        self.assertEqual(self._recommended(materials[1]), [materials[0].pk])
+        self.assertEqual(self._recommended(materials[2]), [materials[0].pk])
+        self.assertFalse(MaterialRecommendation.objects.filter(material=materials[3]).exists())
+        scores = dict(MaterialRecommendation.objects.filter(material=materials[0]).values_list('recommended', 'score'))
+        self.assertAlmostEqual(scores[materials[2].pk], 2 / 6 ** 0.5, places=5)
+        self.assertAlmostEqual(scores[materials[1].pk], 1 / 6 ** 0.5, places=5)
+
+        self.assertEqual(
+            list(UserRecommendation.objects.filter(user=self.viewer).values_list('material', flat=True)),
+            [materials[1].pk]
+        )
+        self.assertEqual(
+            list(UserRecommendation.objects.filter(user=self.author).values_list('material', flat=True)),
+            [materials[0].pk]
+        )
+
+    def test_product_split_does_not_change_results(self):
+        config = get_recommendation_config()
+        matrix = InteractionMatrix.build(config)
+        rows = np.arange(len(matrix.item_ids))
+        allowed = np.ones(len(rows), dtype=bool)
+
+        # 每个素材的上界：其用户交互过的素材数之和，且不超过素材总数
+        chunks = list(matrix._split_by_product_size(rows, max_nnz=4))
+        self.assertEqual(np.concatenate(chunks).tolist(), rows.tolist())
+        self.assertGreater(len(chunks), 1)
+
+        whole = list(matrix.similar_items(rows, allowed, config['TOP_N'], max_nnz=10 ** 6))
+        split = list(matrix.similar_items(rows, allowed, config['TOP_N'], max_nnz=1))
+        self.assertEqual(len(whole), len(rows))
+        for (row, columns, scores), (split_row, split_columns, split_scores) in zip(whole, split):
+            self.assertEqual(row, split_row)
+            self.assertEqual(columns.tolist(), split_columns.tolist())
+            np.testing.assert_allclose(scores, split_scores)
+
+
+class SimilarMaterialTests(MaterialDataMixin, TestCase):
+    """相似素材：标签相似度与分类加权"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        landscape = Category.objects.get(slug='landscape')
+        cls.untagged = Material.objects.create(
+            title='无标签素材', slug='untagged', author=cls.author, main_file='materials/untagged.zip',
+            category=landscape, status='approved', file_size=1
+        )
+
+    def _similar(self, material):
+        return list(SimilarMaterial.objects.filter(material=material).order_by('rank').values_list('similar', 'score'))
+
+    def test_build_reads_one_snapshot(self):
+        with self.assertNumQueries(1):
+            features = FeatureMatrix.build()
+        approved = [self.materials[0].pk, self.materials[1].pk, self.materials[2].pk, self.untagged.pk]
+        self.assertEqual(features.ids.tolist(), approved)
+        self.assertEqual(np.diff(features.tags.indptr).tolist(), [3, 1, 0, 0])
+        landscape, images = self.materials[0].category_id, self.materials[1].category_id
+        self.assertEqual(features.categories.tolist(), [landscape, images, -1, landscape])
+        self.assertEqual(features.roots.tolist(), [images, images, -1, images])
+
+    def _assert_similar(self, material, expected):
+        similar = self._similar(material)
+        self.assertEqual([pk for pk, _ in similar], [pk for pk, _ in expected])
+        for (_, score), (_, expected_score) in zip(similar, expected):
+            self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_rebuild_ranks_tag_and_category_neighbours(self):
+        self.assertEqual(rebuild_similar(full=True), 4)
+        first, second, uncategorized = self.materials[:3]
+        config = get_similarity_config()
+        category, root = config['CATEGORY_WEIGHT'], config['ROOT_CATEGORY_WEIGHT']
+        # 素材0 与素材1 只共享 city 标签（4 个已发布素材中 2 个使用），两者同属顶级分类"图片"
+        rare, common = np.log1p(4), np.log1p(2)
+        tag_score = common ** 2 / (common * np.sqrt(2 * rare ** 2 + common ** 2))
+
+        self._assert_similar(first, [(second.pk, tag_score + root), (self.untagged.pk, category)])
+        self._assert_similar(second, [(first.pk, tag_score + root), (self.untagged.pk, root)])
+        # 无标签素材只凭分类获得相似素材
+        self._assert_similar(self.untagged, [(first.pk, category), (second.pk, root)])
+        self.assertEqual(self._similar(uncategorized), [])
+
+    def test_incremental_rebuild_recomputes_tag_neighbours_only(self):
+        rebuild_similar(full=True)
+        added = Material.objects.create(
+            title='新素材', slug='added', author=self.author, main_file='materials/added.zip',
+            category=self.untagged.category, status='approved', file_size=1
+        )
+        added.tags.set(Tag.objects.filter(slug='city'))
+        # 新素材及与其共享标签的素材0、素材1；无标签的同分类素材不重算
+        self.assertEqual(rebuild_similar(), 3)
+        first, second = self.materials[:2]
+        self.assertIn(added.pk, [pk for pk, _ in self._similar(first)])
+        self.assertIn(added.pk, [pk for pk, _ in self._similar(second)])
+        self.assertEqual([pk for pk, _ in self._similar(added)][:2], [second.pk, first.pk])
+        self.assertNotIn(added.pk, [pk for pk, _ in self._similar(self.untagged)])
+
+    def test_build_in_chunks_matches_single_chunk(self):
+        whole = FeatureMatrix.build({**get_similarity_config(), 'LOAD_CHUNK_SIZE': 10000})
+        chunked = FeatureMatrix.build({**get_similarity_config(), 'LOAD_CHUNK_SIZE': 2})
+        self.assertEqual(chunked.ids.tolist(), whole.ids.tolist())
+        self.assertEqual((chunked.tags != whole.tags).nnz, 0)
+        rows = np.array([0, 1, 3])
+        self.assertEqual(chunked.neighbor_rows(rows, block_size=1).tolist(), whole.neighbor_rows(rows, 100).tolist())
+
+
+class ExportMaterialsCommandTests(MaterialDataMixin, TestCase):
+    """素材导出命令"""
+
+    def test_writes_text_to_command_stdout(self):
+        out = StringIO()
+        call_command('export_materials', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['id'] for record in records], [material.pk for material in self.materials[:3]])
+        self.assertEqual(records[0]['tags'], sorted(tag.name for tag in Tag.objects.all()))
+
+        out = StringIO()
+        call_command('export_materials', '--output', 'csv', stdout=out)
+        rows = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1], '素材0')
+
+    def test_gzip_writes_to_process_stdout(self):
+        stdout = TextIOWrapper(BytesIO())
+        with mock.patch('sys.stdout', stdout):
+            call_command('export_materials', '--output', 'csv', '--gzip', stdout=StringIO())
+        rows = list(csv.reader(StringIO(gzip.decompress(stdout.buffer.getvalue()).decode('utf-8'))))
+        self.assertEqual(len(rows), 4)
+
+    def test_writes_to_file(self):
+        directory = Path(tempfile.mkdtemp(prefix='export-'))
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = directory / 'materials.ndjson'
+        out = StringIO()
+        call_command('export_materials', '--file', str(path), stdout=out)
+        self.assertEqual(len(path.read_bytes().splitlines()), 3)
+        self.assertIn(str(path), out.getvalue())
+
+
+class CounterReconcileTests(MaterialDataMixin, TestCase):
+    """冗余计数字段的原子更新与对账"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        first, second = cls.materials[:2]
+        for material in [first, first, second]:
+            DownloadHistory.objects.create(user=cls.viewer, material=material)
+        old_day = timezone.localdate() - timedelta(days=365)
+        DailyMaterialDownloads.objects.create(material=second, date=old_day, downloads=4, archived=True)
+        DailyAuthorDownloads.objects.create(author=cls.author, date=old_day, downloads=4, archived=True)
+        # 未归档的汇总与原始记录重复，不计入
+        DailyMaterialDownloads.objects.create(material=first, date=timezone.localdate(), downloads=2)
+
+    def _counters(self, material):
+        return tuple(Material.objects.filter(pk=material.pk).values_list('favorite_count', 'download_count').get())
+
+    def test_bump_and_read_counter(self):
+        material = self.materials[2]
+        self.assertEqual(bump_counter(Material, material.pk, 'favorite_count', 3), 1)
+        self.assertEqual(bump_counter(Material, material.pk, 'favorite_count', -1), 1)
+        self.assertEqual(read_counter(Material, material.pk, 'favorite_count'), 2)
+        self.assertEqual(bump_counter(Material, 99999, 'favorite_count'), 0)
+        self.assertEqual(read_counter(Material, 99999, 'favorite_count'), 0)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        Material.objects.update(favorite_count=100, download_count=100)
+        User.objects.update(materials_count=100, downloads_count=100)
+
+        # 主键区间小于素材数，覆盖多个区间
+        self.assertEqual(reconcile_material_counters(chunk_size=2), 5)
+        self.assertEqual(reconcile_user_counters(chunk_size=2), 2)
+
+        expected = [(1, 2), (1, 5), (1, 0), (0, 0), (0, 0)]
+        self.assertEqual([self._counters(material) for material in self.materials], expected)
+        self.assertEqual(
+            tuple(User.objects.filter(pk=self.author.pk).values_list('materials_count', 'downloads_count').get()),
+            (5, 7)
+        )
+        self.assertEqual(
+            tuple(User.objects.filter(pk=self.viewer.pk).values_list('materials_count', 'downloads_count').get()),
+            (0, 0)
+        )
+
+    def test_command_reconciles_only_requested_objects(self):
+        Material.objects.update(favorite_count=100)
+        User.objects.update(materials_count=100)
+        out = StringIO()
+        call_command('reconcile_counters', '--only', 'materials', stdout=out)
+        self.assertIn('素材计数对账完成: 5 条', out.getvalue())
+        self.assertNotIn('用户', out.getvalue())
+        self.assertEqual(self._counters(self.materials[0]), (1, 2))
+        self.assertEqual(User.objects.get(pk=self.author.pk).materials_count, 100)
+
+
+class TrendingTests(MaterialDataMixin, TestCase):
+    """热度分的时间衰减与增量更新"""
+
+    def setUp(self):
+        Favorite.objects.all().delete()
+        self.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    def _compute(self, now):
+        with mock.patch('material_site.trending.timezone.now', return_value=now):
+            return compute_trending()
+
+    def _scores(self):
+        return dict(MaterialTrendingScore.objects.values_list('material_id', 'score'))
+
+    def _assert_scores(self, expected):
+        scores = self._scores()
+        self.assertEqual(scores.keys(), expected.keys())
+        for pk, score in scores.items():
+            self.assertAlmostEqual(score, expected[pk])
+
+    def test_decay(self):
+        self.assertEqual(trending_decay(timedelta(0), 48), 1)
+        self.assertEqual(trending_decay(timedelta(hours=48), 48), 0.5)
+        self.assertEqual(trending_decay(timedelta(hours=96), 48), 0.25)
+        self.assertEqual(trending_decay(timedelta(hours=-1), 48), 1)
+
+    def test_initial_and_incremental_scores(self):
+        first, second, third = self.materials[:3]
+        weights = get_trending_config()['WEIGHTS']
+        recent = 0.5 ** (1 / 48)
+        for material, at in [(first, self.now - timedelta(hours=48)), (first, self.now - timedelta(minutes=30)),
+                             (second, self.now - timedelta(days=8))]:
+            DownloadHistory.objects.create(user=self.viewer, material=material, downloaded_at=at)
+        Favorite.objects.create(user=self.viewer, material=second, created_at=self.now - timedelta(hours=96))
+        Material.objects.filter(pk=third.pk).update(like_count=4)
+
+        # 首次计算回溯 7 天：8 天前的下载不计入；半小时前的下载按所在整点计算衰减
+        self.assertEqual(self._compute(self.now), 3)
+        expected = {
+            first.pk: weights['download'] * (0.5 + recent),
+            second.pk: weights['favorite'] * 0.25,
+            third.pk: weights['like'] * 4,
+        }
+        self._assert_scores(expected)
+
+        # 48 小时后：已有热度减半，只累加新事件和新增点赞
+        later = self.now + timedelta(hours=48)
+        DownloadHistory.objects.create(user=self.author, material=second, downloaded_at=later - timedelta(minutes=30))
+        Material.objects.filter(pk=third.pk).update(like_count=6)
+        self.assertEqual(self._compute(later), 2)
+        expected = {
+            first.pk: expected[first.pk] / 2,
+            second.pk: expected[second.pk] / 2 + weights['download'] * recent,
+            third.pk: expected[third.pk] / 2 + weights['like'] * 2,
+        }
+        self._assert_scores(expected)
+        self.assertEqual(MaterialTrendingScore.objects.get(material=third).like_snapshot, 6)
+        self.assertEqual(list(get_trending_queryset(2)), [third, second])
+
+    def test_small_scores_drop_to_zero(self):
+        Material.objects.filter(pk=self.materials[0].pk).update(like_count=1)
+        self._compute(self.now)
+        # 10 个半衰期后 1 / 1024 < MIN_SCORE
+        self.assertEqual(self._compute(self.now + timedelta(hours=480)), 0)
+        self.assertEqual(self._scores(), {self.materials[0].pk: 0})
+        self.assertEqual(list(get_trending_queryset(10)), [])
+
+
+class FacetTests(MaterialDataMixin, TestCase):
+    """分面统计与缓存键"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Material.objects.filter(pk=cls.materials[1].pk).update(material_type='vector', license_type='premium')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_key_normalizes_params(self):
+        key = facet_cache_key([('material_type', ['vector', 'image']), ('category', ['images'])])
+        self.assertEqual(key, facet_cache_key([
+            ('category', ['images']), ('page', ['2']), ('material_type', ['image', 'vector', '']),
+            ('ordering', ['-created_at']), ('tags', ['']),
+        ]))
+        self.assertNotEqual(key, facet_cache_key([('material_type', ['vector']), ('category', ['images'])]))
+        self.assertNotEqual(key, facet_cache_key([('license_type', ['vector', 'image']), ('category', ['images'])]))
+
+    def test_counts(self):
+        facets = compute_facets(Material.objects.filter(status='approved'), top_tags=2)
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(
+            [(item['value'], item['label'], item['count']) for item in facets['material_type']],
+            [('image', '图片', 2), ('vector', '矢量图', 1)]
+        )
+        self.assertEqual(
+            [(item['value'], item['count']) for item in facets['license_type']], [('free', 2), ('premium', 1)]
+        )
+        self.assertCountEqual(
+            [(item['slug'], item['count']) for item in facets['category']], [('landscape', 1), ('images', 1)]
+        )
+        self.assertEqual(len(facets['tags']), 2)
+        self.assertEqual((facets['tags'][0]['slug'], facets['tags'][0]['count']), ('city', 2))
+
+    def test_duplicate_rows_counted_once(self):
+        queryset = Material.objects.filter(status='approved', tags__slug__in=['city', 'nature'])
+        self.assertEqual(queryset.count(), 3)
+        facets = compute_facets(queryset)
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual({tag['slug']: tag['count'] for tag in facets['tags']}, {'city': 2, 'nature': 1, 'night': 1})
+
+    def test_endpoint_caches_equivalent_queries(self):
+        client = APIClient()
+        response = client.get('/api/materials/facets/?material_type=vector&material_type=image&page=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 3)
+        with self.assertNumQueries(0):
+            cached = client.get('/api/materials/facets/?material_type=image&material_type=vector')
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(client.get('/api/materials/facets/?material_type=vector').json()['total'], 1)
+
+
+class AuthorStatsTests(MaterialDataMixin, TestCase):
+    """作者统计接口（基于日汇总表）"""
+
+    url = '/api/materials/my_materials/stats/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.today = timezone.localdate()
+        cls.yesterday = cls.today - timedelta(days=1)
+        first, second = cls.materials[:2]
+        for material, day in [(first, cls.today), (first, cls.today), (second, cls.yesterday),
+                              (first, cls.today - timedelta(days=40))]:
+            DownloadHistory.objects.create(
+                user=cls.viewer, material=material, downloaded_at=day_bounds(day)[0] + timedelta(hours=1)
+            )
+        rollup_downloads(since=cls.today - timedelta(days=60))
+        rollup_favorites(since=cls.today - timedelta(days=60))
+        reconcile_material_counters()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_totals_and_series(self):
+        response = self.client.get(self.url, {'days': 30, 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        today, yesterday = self.today.isoformat(), self.yesterday.isoformat()
+        self.assertEqual(data['start'], (self.today - timedelta(days=29)).isoformat())
+        self.assertEqual(data['end'], today)
+        self.assertEqual(data['totals'], {
+            'materials': 5, 'downloads': 4, 'favorites': 3, 'views': 0,
+            'period_downloads': 3, 'period_favorites': 3,
+        })
+        self.assertEqual(data['daily'], [
+            {'date': yesterday, 'downloads': 1, 'favorites': 0},
+            {'date': today, 'downloads': 2, 'favorites': 3},
+        ])
+        first, second = data['materials']
+        self.assertEqual((first['id'], first['download_count']), (self.materials[0].pk, 3))
+        self.assertEqual(first['series'], [{'date': today, 'downloads': 2, 'favorites': 1}])
+        self.assertEqual((second['id'], second['download_count']), (self.materials[1].pk, 1))
+        self.assertEqual(second['series'], [
+            {'date': yesterday, 'downloads': 1, 'favorites': 0},
+            {'date': today, 'downloads': 0, 'favorites': 1},
+        ])
+
+    def test_window_and_validation(self):
+        data = self.client.get(self.url, {'days': 1000}).json()
+        self.assertEqual(data['start'], (self.today - timedelta(days=364)).isoformat())
+        self.assertEqual(data['totals']['period_downloads'], 4)
+        self.assertEqual(len(data['materials']), 5)
+
+        self.assertEqual(self.client.get(self.url, {'days': 'week'}).status_code, 400)
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.client.get(self.url).json()['totals']['materials'], 0)
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    """DATABASE_URL 解析与连接池配置"""
+
+    def test_persistent_connections_by_default(self):
+        config = database_config('sqlite:////tmp/site.db')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/tmp/site.db')
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_connection_params_from_url(self):
+        config = database_config('postgres://u:p@db:5432/site?conn_max_age=30&health_checks=false&sslmode=require')
+        self.assertEqual(config['ENGINE'], POSTGRESQL_ENGINE)
+        self.assertEqual(config['CONN_MAX_AGE'], 30)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS'], {'sslmode': 'require'})
+
+    def test_pool(self):
+        config = database_config(
+            'postgres://u:p@db:5432/site?pool=true&pool_max_size=20&pool_timeout=2.5&sslmode=require'
+        )
+        pool = config['OPTIONS']['pool']
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['sslmode'], 'require')
+        self.assertFalse(set(POOL_PARAMS) & set(config['OPTIONS']))
+        self.assertEqual(pool['min_size'], DB_DEFAULTS['POOL']['min_size'])
+        self.assertEqual((pool['max_size'], pool['timeout']), (20, 2.5))
+        self.assertEqual(pool['check'], ConnectionPool.check_connection)
+
+        pool = database_config('postgres://u:p@db:5432/site?pool=true&health_checks=false')['OPTIONS']['pool']
+        self.assertNotIn('check', pool)
+
+    def test_pool_ignored_without_postgresql_or_psycopg_pool(self):
+        config = database_config('sqlite:////tmp/site.db?pool=true')
+        self.assertNotIn('pool', config['OPTIONS'])
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+
+        with mock.patch('backend.db.has_psycopg_pool', return_value=False), self.assertLogs('backend.db', 'WARNING'):
+            config = database_config('postgres://u:p@db:5432/site?pool=true')
+        self.assertNotIn('pool', config['OPTIONS'])
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+
+    def test_pool_stats(self):
+        stats = pool_stats('default')
+        self.assertFalse(stats['pooled'])
+        self.assertEqual(stats['vendor'], connections['default'].vendor)
+
+        pool = mock.Mock(min_size=2, max_size=10)
+        pool.get_stats.return_value = {
+            'pool_size': 5, 'pool_available': 1, 'requests_num': 4, 'requests_wait_ms': 10, 'requests_errors': 1,
+        }
+        with mock.patch('backend.db._get_pool', return_value=pool):
+            stats = pool_stats('default')
+        self.assertTrue(stats['pooled'])
+        self.assertEqual(
+            (stats['size'], stats['in_use'], stats['overflow'], stats['wait_ms_avg'], stats['timeouts']),
+            (5, 4, 3, 2.5, 1)
+        )
@@ -0,0 +1,138 @@
+"""
+热度排行模块
+根据近期下载、收藏、点赞计算按时间衰减的热度分，存入 MaterialTrendingScore
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Max, Value, When
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from .models import Material, Favorite, DownloadHistory, MaterialTrendingScore
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'HALF_LIFE_HOURS': 48,      # 热度半衰期
+    'INITIAL_WINDOW_DAYS': 7,   # 首次计算时回溯的天数
+    'MIN_SCORE': 0.01,          # 低于该值的热度分直接归零，不再参与衰减
+    'WEIGHTS': {
+        'download': 3.0,
+        'favorite': 2.0,
+        'like': 1.0,
+    },
+}
+
+BATCH_SIZE = 500
+
+
+def get_config() -> dict:
+    """读取 settings.TRENDING 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'TRENDING', {})}
+
+
+def _decay(age: timedelta, half_life_hours: float) -> float:
+    """计算经过 age 后的衰减系数"""
+    return 0.5 ** (max(age.total_seconds(), 0) / (half_life_hours * 3600))
+
+
+def _event_scores(queryset, time_field: str, since: datetime, now: datetime,
+                  weight: float, half_life_hours: float) -> Dict[int, float]:
+    """按小时分组统计事件数，并按事件发生时间衰减后累加"""
+    rows = (
+        queryset.filter(**{f'{time_field}__gt': since, f'{time_field}__lte': now})
+        .annotate(hour=TruncHour(time_field))
+        .order_by()
+        .values('material_id', 'hour')
+        .annotate(total=Count('pk'))
+    )
+    scores: Dict[int, float] = defaultdict(float)
+    for row in rows:
+        scores[row['material_id']] += weight * row['total'] * _decay(now - row['hour'], half_life_hours)
+    return scores
+
+
+def compute_trending() -> int:
+    """
+    增量更新热度分
+
+    1. 仍有热度的记录按距上次计算的时间整体衰减（单条 UPDATE）；
+    2. 上次计算之后的下载、收藏按小时分组累加；
+    3. 点赞没有时间记录，以点赞数相对上次快照的增量计入。
+
+    Returns:
+        int: 本次有新增热度的素材数量
+    """
+    config = get_config()
+    half_life = config['HALF_LIFE_HOURS']
+    weights = config['WEIGHTS']
+    now = timezone.now()
+
+    last_run = MaterialTrendingScore.objects.aggregate(last=Max('updated_at'))['last']
+    since = last_run or now - timedelta(days=config['INITIAL_WINDOW_DAYS'])
+
+    increments: Dict[int, float] = defaultdict(float)
+    for source, time_field, weight in (
+        (DownloadHistory.objects.all(), 'downloaded_at', weights['download']),
+        (Favorite.objects.all(), 'created_at', weights['favorite']),
+    ):
+        for material_id, score in _event_scores(source, time_field, since, now, weight, half_life).items():
+            increments[material_id] += score
+
+    like_snapshots: Dict[int, int] = {}
+    new_likes = (
+        Material.objects.filter(status='approved')
+        .annotate(snapshot=Coalesce('trending__like_snapshot', 0))
+        .filter(like_count__gt=F('snapshot'))
+        .values_list('pk', 'like_count', 'snapshot')
+    )
+    for material_id, like_count, snapshot in new_likes:
+        increments[material_id] += weights['like'] * (like_count - snapshot)
+        like_snapshots[material_id] = like_count
+
+    with transaction.atomic():
+        if last_run:
+            factor = _decay(now - last_run, half_life)
+            MaterialTrendingScore.objects.filter(score__gt=0).update(score=F('score') * factor, updated_at=now)
+            MaterialTrendingScore.objects.filter(score__gt=0, score__lt=config['MIN_SCORE']).update(score=0)
+
+        material_ids = list(increments)
+        for start in range(0, len(material_ids), BATCH_SIZE):
+            batch = material_ids[start:start + BATCH_SIZE]
+            MaterialTrendingScore.objects.bulk_create(
+                [MaterialTrendingScore(material_id=material_id, updated_at=now) for material_id in batch],
+                ignore_conflicts=True
+            )
+            MaterialTrendingScore.objects.filter(material_id__in=batch).update(
+                score=F('score') + Case(
+                    *[When(material_id=material_id, then=Value(increments[material_id])) for material_id in batch],
+                    default=Value(0.0),
+                    output_field=FloatField()
+                ),
+                like_snapshot=Case(
+                    *[When(material_id=material_id, then=Value(like_snapshots[material_id]))
+                      for material_id in batch if material_id in like_snapshots],
+                    default=F('like_snapshot'),
+                    output_field=IntegerField()
+                ),
+                updated_at=now,
+            )
+
+    logger.info(f"Trending scores updated for {len(increments)} materials")
+    return len(increments)
+
+
+def get_trending_queryset(limit: int):
+    """按热度分读取前 limit 个已发布素材"""
+    return (
+        Material.objects.filter(status='approved', trending__score__gt=0)
+        .select_related('author', 'category')
+        .prefetch_related('tags')
+        .order_by('-trending__score')[:limit]
+    )
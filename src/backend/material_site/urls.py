@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'materials', views.MaterialViewSet, basename='material')
 router.register(r'categories', views.CategoryViewSet, basename='category')
 router.register(r'tags', views.TagViewSet, basename='tag')
 router.register(r'favorites', views.FavoriteViewSet, basename='favorite')
+router.register(r'moderation', views.ModerationQueueViewSet, basename='moderation')
 
-urlpatterns = [
+# 热点读取接口的异步视图（写操作转交同步视图集），启用时排在路由器之前
+async_urlpatterns = [
+    path('materials/', async_views.materials, name='material-list'),
+    path('materials/facets/', async_views.material_facets, name='material-facets'),
+    path('materials/<int:pk>/', async_views.material_detail, name='material-detail'),
+    path('categories/', async_views.categories, name='category-list'),
+    path('tags/', async_views.tags, name='tag-list'),
+]
+
+urlpatterns = list(async_urlpatterns) if settings.ASYNC_READ_VIEWS else []
+urlpatterns += [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
@@ -0,0 +1,247 @@
+"""
+浏览统计模块
+按"素材 × 日期"记录独立访客的 HyperLogLog 草图，定期合并到
+MaterialDailyViews 日统计表和 Material.view_count，避免每次浏览都写数据库
+"""
+
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from backend.caches import is_shared_cache, require_shared_cache
+from .hyperloglog import HyperLogLog
+from .models import Material, MaterialDailyViews
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',       # 必须是共享缓存（Redis/文件缓存），合并命令在独立进程中读取草图
+    'PRECISION': 10,                # 每个草图 1KB，误差约 3.2%
+    'FLUSH_INTERVAL': 30,           # 本地草图写入共享缓存的间隔（秒）
+    'SKETCH_TTL': 3 * 24 * 3600,    # 共享缓存中草图的保留时间（秒）
+    'MAX_LOCAL_SKETCHES': 10000,    # 单进程最多保留的本地草图数量
+}
+
+SketchKey = Tuple[date, int]
+
+
+def get_config() -> dict:
+    """读取 settings.VIEW_TRACKING 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'VIEW_TRACKING', {})}
+
+
+def sketch_cache_key(day: date, material_id: int) -> str:
+    """共享缓存中草图的键"""
+    return f'views:hll:{day.isoformat()}:{material_id}'
+
+
+def get_sketch_cache():
+    """
+    存放草图的共享缓存
+
+    Raises:
+        ImproperlyConfigured: CACHE_ALIAS 是进程内缓存，合并命令读不到各进程写入的草图
+    """
+    alias = get_config()['CACHE_ALIAS']
+    if not is_shared_cache(alias):
+        raise ImproperlyConfigured(
+            f"VIEW_TRACKING['CACHE_ALIAS'] ({alias}) must be a cache shared by all processes, e.g. Redis"
+        )
+    return caches[alias]
+
+
+class ViewTracker:
+    """
+    进程内浏览记录器
+
+    每个进程在内存中维护当天的草图，按 FLUSH_INTERVAL 合并进共享缓存。
+    草图合并是幂等的（寄存器取最大值）；多个进程同时刷新同一草图时后写入者会覆盖先写入者，
+    因此写入后回读校验，未包含本地寄存器的草图重新标记为待刷新，在下一次刷新时补回。
+    CACHE_ALIAS 不是共享缓存时不记录浏览（草图无法被合并命令读取）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sketches: Dict[SketchKey, HyperLogLog] = {}
+        self._dirty = set()
+        self._last_flush = time.monotonic()
+
+    def record_view(self, material_id: int, viewer_key: str) -> None:
+        """
+        记录一次浏览
+
+        Args:
+            material_id: 素材ID
+            viewer_key: 访客标识（用户ID或IP+UA）
+        """
+        config = get_config()
+        if not require_shared_cache(config['CACHE_ALIAS'], 'View tracking'):
+            return
+        key = (timezone.localdate(), material_id)
+
+        with self._lock:
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = HyperLogLog(config['PRECISION'])
+            if sketch.add(viewer_key):
+                self._dirty.add(key)
+            due = time.monotonic() - self._last_flush >= config['FLUSH_INTERVAL']
+
+        if due:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush view sketches: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        将有变化的本地草图合并到共享缓存，并登记日统计行
+
+        Returns:
+            int: 写入的草图数量
+
+        Raises:
+            ImproperlyConfigured: CACHE_ALIAS 不是共享缓存
+        """
+        config = get_config()
+        cache = get_sketch_cache()
+        today = timezone.localdate()
+
+        with self._lock:
+            pending = {key: HyperLogLog(self._sketches[key].precision, self._sketches[key].registers)
+                       for key in self._dirty}
+            self._dirty.clear()
+            self._last_flush = time.monotonic()
+
+            # 已结束日期的草图以及超出上限的草图在刷新后即可丢弃
+            stale = [key for key in self._sketches if key[0] < today]
+            if len(self._sketches) - len(stale) > config['MAX_LOCAL_SKETCHES']:
+                stale = list(self._sketches)
+            for key in stale:
+                del self._sketches[key]
+
+        if not pending:
+            return 0
+
+        cache_keys = {sketch_cache_key(*key): key for key in pending}
+        existing = cache.get_many(list(cache_keys))
+
+        merged = {}
+        for cache_key, key in cache_keys.items():
+            sketch = pending[key]
+            if cache_key in existing:
+                sketch.merge(HyperLogLog.from_bytes(existing[cache_key]))
+            merged[cache_key] = sketch.to_bytes()
+        cache.set_many(merged, timeout=config['SKETCH_TTL'])
+
+        # 回读校验：被其他进程覆盖的草图放回本地并在下一次刷新时重写
+        stored = cache.get_many(list(merged))
+        lost = [
+            key for cache_key, key in cache_keys.items()
+            if cache_key not in stored or not HyperLogLog.from_bytes(stored[cache_key]).covers(pending[key])
+        ]
+        if lost:
+            with self._lock:
+                for key in lost:
+                    local = self._sketches.get(key)
+                    self._sketches[key] = pending[key] if local is None else local.merge(pending[key])
+                    self._dirty.add(key)
+            logger.warning(f"{len(lost)} view sketches were overwritten concurrently, retrying on next flush")
+
+        MaterialDailyViews.objects.bulk_create(
+            [MaterialDailyViews(material_id=material_id, date=day) for day, material_id in pending],
+            ignore_conflicts=True
+        )
+        return len(pending)
+
+
+view_tracker = ViewTracker()
+
+
+def merge_view_counts(days: int = 2, batch_size: int = 500) -> int:
+    """
+    将共享缓存中的草图估计值合并到日统计表和 Material.view_count
+
+    只处理最近 days 天的日统计行；估计值增长的部分作为增量累加到
+    view_count，重复执行不会重复计数。
+
+    Args:
+        days: 回溯天数（需小于草图在缓存中的保留时间）
+        batch_size: 每批处理的日统计行数
+
+    Returns:
+        int: 更新的日统计行数
+
+    Raises:
+        ImproperlyConfigured: CACHE_ALIAS 不是共享缓存
+    """
+    cache = get_sketch_cache()
+    since = timezone.localdate() - timedelta(days=days - 1)
+
+    rows = MaterialDailyViews.objects.filter(date__gte=since).order_by('pk')
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        sketches = cache.get_many([sketch_cache_key(row.date, row.material_id) for row in batch])
+        now = timezone.now()
+        changed = []
+        deltas: Dict[int, int] = {}
+        for row in batch:
+            data = sketches.get(sketch_cache_key(row.date, row.material_id))
+            if data is None:
+                continue
+            estimate = HyperLogLog.from_bytes(data).count()
+            if estimate > row.unique_views:
+                deltas[row.material_id] = deltas.get(row.material_id, 0) + estimate - row.unique_views
+                row.unique_views = estimate
+                row.updated_at = now
+                changed.append(row)
+
+        if not changed:
+            continue
+
+        with transaction.atomic():
+            MaterialDailyViews.objects.bulk_update(changed, ['unique_views', 'updated_at'])
+            Material.objects.filter(pk__in=deltas).update(
+                view_count=F('view_count') + Case(
+                    *[When(pk=material_id, then=Value(delta)) for material_id, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=IntegerField()
+                )
+            )
+        updated += len(changed)
+
+    logger.info(f"Merged view sketches into {updated} daily rows")
+    return updated
+
+
+def get_viewer_key(request) -> str:
+    """
+    生成访客标识
+
+    已登录用户使用用户ID，匿名用户使用 IP + User-Agent。
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u:{user.pk}'
+
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0].strip()
+    else:
+        ip = request.META.get('REMOTE_ADDR', '')
+    return f"a:{ip}:{request.META.get('HTTP_USER_AGENT', '')[:200]}"
@@ -4,21 +4,41 @@
 """
 
 import logging
+from datetime import timedelta
 from typing import Optional
-from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.request import Request
 
+from backend.replicas import ReplicaReadMixin
+from .counters import bump_counter, read_counter
+from . import exports, fast_serializers
+from .category_tree import category_tree
+from .facets import compute_facets, facet_cache_key, get_cache_ttl
+from .fast_serializers import FastFavoriteListSerializer, FastMaterialListSerializer
+from .favorites import add_favorite, remove_favorite, toggle_favorite
+from . import moderation
 from .filters import MaterialFilter
-from .models import Material, Category, Tag, Favorite, DownloadHistory
+from .rollups import author_stats
+from .sparse_fields import FieldSelection
+from .models import (
+    Material, Category, Tag, Favorite, DownloadHistory, SimilarMaterial,
+    MaterialRecommendation, UserRecommendation
+)
 from .serializers import (
     CategorySerializer, TagSerializer, MaterialListSerializer,
-    MaterialDetailSerializer, MaterialCreateSerializer, FavoriteSerializer
+    MaterialDetailSerializer, MaterialCreateSerializer, FavoriteSerializer, MaterialIdsSerializer,
+    MaterialModerationSerializer, ModerationLeaseSerializer, SparseFieldsMixin
 )
+from .trending import get_trending_queryset
+from .view_tracking import get_viewer_key, view_tracker
 from src.backend.exceptions import (
     ValidationError, NotFoundError, MaterialUploadError
 )
@@ -26,7 +46,7 @@ from src.backend.exceptions import (
 logger = logging.getLogger(__name__)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     分类视图集
     处理分类相关的只读操作
@@ -35,8 +55,31 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     pagination_class = None
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request: Request) -> HttpResponse:
+        """
+        嵌套的分类树
+
+        每个节点包含 material_count（自身的已发布素材数）、total_material_count（含子分类）
+        和 children。内容按版本号缓存，分类或素材变化后重建。
+
+        Args:
+            request: HTTP请求
+
+        Returns:
+            HttpResponse: 预先渲染的分类树
+        """
+        renderer = request.accepted_renderer
+        # 可浏览 API 和带参数的媒体类型（如 indent）按请求渲染
+        if isinstance(renderer, BrowsableAPIRenderer) or request.accepted_media_type != renderer.media_type:
+            return Response(category_tree.get_data())
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return HttpResponse(category_tree.render(renderer), content_type=content_type)
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     标签视图集
     处理标签相关的只读操作
@@ -46,7 +89,7 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     素材视图集
     处理素材的CRUD操作和其他业务逻辑
@@ -65,6 +108,9 @@ class MaterialViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'view_count', 'download_count', 'like_count', 'price']
     ordering = ['-created_at']
 
+    # 按字段选择裁剪查询的 action（其余 action 只裁剪输出）
+    SPARSE_ACTIONS = ('list', 'retrieve', 'my_materials', 'drafts')
+
     def get_queryset(self):
         """
         获取查询集
@@ -78,10 +124,34 @@ class MaterialViewSet(viewsets.ModelViewSet):
 
         # 用户查看自己的素材或草稿
         if self.request.user.is_authenticated and self.action in ['my_materials', 'drafts']:
-            return Material.objects.filter(author=self.request.user)
+            queryset = Material.objects.filter(author=self.request.user)
 
+        selection = self.get_field_selection()
+        if selection is not None and self.action in self.SPARSE_ACTIONS:
+            queryset = selection.optimize(queryset, self.get_serializer_class())
         return queryset
 
+    def get_field_selection(self) -> Optional[FieldSelection]:
+        """
+        解析 GET 请求的 fields / exclude / expand 参数
+
+        Returns:
+            Optional[FieldSelection]: 字段选择，未使用这些参数时为 None
+        """
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = None
+            serializer_class = self.get_serializer_class()
+            if self.request is not None and self.request.method == 'GET' \
+                    and issubclass(serializer_class, SparseFieldsMixin):
+                self._field_selection = FieldSelection.from_request(self.request, serializer_class.Meta.fields)
+        return self._field_selection
+
+    def get_serializer_context(self) -> dict:
+        """序列化上下文，附带字段选择"""
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
+
     def get_serializer_class(self):
         """
         根据action获取对应的序列化器类
@@ -98,6 +168,47 @@ class MaterialViewSet(viewsets.ModelViewSet):
         }
         return action_serializer_map.get(self.action, MaterialListSerializer)
 
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """
+        获取素材详情并记录浏览
+
+        浏览只写入进程内的 HyperLogLog 草图，由 merge_view_counts 定期合并到 view_count
+        """
+        instance = self.get_object()
+        view_tracker.record_view(instance.pk, get_viewer_key(request))
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """获取素材列表"""
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset) -> Response:
+        """
+        分页序列化素材列表
+
+        启用 FAST_LIST_SERIALIZATION 时用 values() + 预编译字段提取代替
+        MaterialListSerializer，输出完全相同；fields / exclude / expand 参数在两条路径上效果一致。
+
+        Args:
+            queryset: 素材查询集
+
+        Returns:
+            Response: 分页响应
+        """
+        if not fast_serializers.is_enabled() or self.get_serializer_class() is not MaterialListSerializer:
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                return Response(self.get_serializer(queryset, many=True).data)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        serializer = FastMaterialListSerializer(self.get_serializer_context())
+        queryset = serializer.prepare(queryset, serializer.columns)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.serialize(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
+
     def perform_create(self, serializer):
         """
         执行创建操作
@@ -125,25 +236,187 @@ class MaterialViewSet(viewsets.ModelViewSet):
         """
         try:
             queryset = self.get_queryset().filter(author=request.user)
-            page = self.paginate_queryset(queryset)
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.list_response(queryset)
         except Exception as e:
             logger.error(f"Failed to get user materials: {str(e)}")
             raise ValidationError("获取用户素材失败")
 
+    @action(detail=False, methods=['get'], url_path='my_materials/stats', url_name='my-materials-stats',
+            permission_classes=[IsAuthenticated])
+    def my_materials_stats(self, request: Request) -> Response:
+        """
+        获取当前用户素材的下载/收藏统计
+
+        数据来自按天维护的汇总表（rollup_stats 命令），不扫描原始下载/收藏记录。
+
+        Query params:
+            days: 统计最近多少天（默认30，最大365）
+            limit: 返回趋势的素材数量（按下载量取前N个，默认10，最大50）
+
+        Returns:
+            Response: 累计值、每日趋势和各素材的每日趋势
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            raise ValidationError("days 必须是整数")
+        days = max(1, min(days, 365))
+        limit = self.get_limit(request, default=10, maximum=50)
+
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        return Response(author_stats(request.user.id, start, end, limit))
+
     @action(detail=False, methods=['get'])
     def drafts(self, request: Request) -> Response:
         """获取当前用户的草稿"""
         try:
             queryset = Material.objects.filter(author=request.user, status='draft')
-            page = self.paginate_queryset(queryset)
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.list_response(queryset)
         except Exception as e:
             logger.error(f"Failed to get drafts: {str(e)}")
             raise ValidationError("获取草稿失败")
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """
+        流式导出已发布素材目录
+
+        支持列表接口的筛选参数，按主键顺序输出全部匹配的素材。
+
+        Query params:
+            output: ndjson（默认）或 csv
+            gzip: 为 1/true 时即时 gzip 压缩
+
+        Returns:
+            StreamingHttpResponse: 附件下载
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in exports.OUTPUT_FORMATS:
+            raise ValidationError(f"output 只能是 {' / '.join(exports.OUTPUT_FORMATS)}")
+        compress = request.query_params.get('gzip', '').lower() in ('1', 'true')
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            exports.export_stream(output, queryset, compress=compress),
+            content_type='application/gzip' if compress else exports.CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.export_filename(output, compress)}"'
+        logger.info(f"User {request.user.id} started {output} export (gzip={compress})")
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request: Request) -> Response:
+        """
+        获取筛选侧边栏的分面数量
+
+        复用列表接口的筛选参数，结果按规范化后的参数短时间缓存
+
+        Args:
+            request: HTTP请求，筛选参数与列表接口相同
+
+        Returns:
+            Response: 素材类型、许可类型、分类和热门标签的数量
+        """
+        key = facet_cache_key(request.query_params.lists())
+        data = cache.get(key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            data = compute_facets(queryset)
+            cache.set(key, data, get_cache_ttl())
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request: Request) -> Response:
+        """
+        获取热门素材
+
+        直接读取预先计算的热度分索引，不对素材表排序
+
+        Args:
+            request: HTTP请求，可带 limit 参数（默认20，最大100）
+
+        Returns:
+            Response: 热门素材列表
+        """
+        limit = self.get_limit(request, default=20, maximum=100)
+        serializer = self.get_serializer(get_trending_queryset(limit), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request: Request, pk: Optional[int] = None) -> Response:
+        """
+        获取相似素材
+
+        读取 rebuild_similar 预先计算的 Top-N 列表
+
+        Args:
+            request: HTTP请求，可带 limit 参数（默认10，最大20）
+            pk: 素材ID
+
+        Returns:
+            Response: 相似素材列表
+        """
+        limit = self.get_limit(request, default=10, maximum=20)
+        material = self.get_object()
+        rows = (
+            SimilarMaterial.objects.filter(material=material, similar__status='approved')
+            .select_related('similar__author', 'similar__category')
+            .prefetch_related('similar__tags')
+            .order_by('rank')[:limit]
+        )
+        serializer = self.get_serializer([row.similar for row in rows], many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def recommendations(self, request: Request, pk: Optional[int] = None) -> Response:
+        """
+        获取"下载/收藏过该素材的用户还喜欢"的素材
+
+        读取 build_recommendations 预先计算的列表
+
+        Args:
+            request: HTTP请求，可带 limit 参数（默认10，最大20）
+            pk: 素材ID
+
+        Returns:
+            Response: 推荐素材列表
+        """
+        limit = self.get_limit(request, default=10, maximum=20)
+        material = self.get_object()
+        rows = (
+            MaterialRecommendation.objects.filter(material=material, recommended__status='approved')
+            .select_related('recommended__author', 'recommended__category')
+            .prefetch_related('recommended__tags')
+            .order_by('rank')[:limit]
+        )
+        serializer = self.get_serializer([row.recommended for row in rows], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def for_you(self, request: Request) -> Response:
+        """
+        获取当前用户的个性化推荐
+
+        没有推荐记录的用户（新用户或不活跃用户）返回热门素材
+
+        Args:
+            request: HTTP请求，可带 limit 参数（默认20，最大20）
+
+        Returns:
+            Response: 推荐素材列表
+        """
+        limit = self.get_limit(request, default=20, maximum=20)
+        rows = (
+            UserRecommendation.objects.filter(user=request.user, material__status='approved')
+            .select_related('material__author', 'material__category')
+            .prefetch_related('material__tags')
+            .order_by('rank')[:limit]
+        )
+        materials = [row.material for row in rows] or list(get_trending_queryset(limit))
+        serializer = self.get_serializer(materials, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def favorite(self, request: Request, pk: Optional[int] = None) -> Response:
         """
@@ -156,26 +429,17 @@ class MaterialViewSet(viewsets.ModelViewSet):
         Returns:
             Response: 收藏状态和计数
         """
+        # 不加载素材对象；非数字的ID与不存在的素材一样返回 404
         try:
-            material = self.get_object()
-            favorite, created = Favorite.objects.get_or_create(
-                user=request.user,
-                material=material
-            )
-
-            if not created:
-                favorite.delete()
-                material.favorite_count -= 1
-                is_favorited = False
-            else:
-                material.favorite_count += 1
-                is_favorited = True
-
-            material.save()
+            material_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFoundError("素材不存在")
 
+        try:
+            favorited, count = toggle_favorite(request.user.pk, material_id)
             return Response({
-                'favorited': is_favorited,
-                'count': material.favorite_count
+                'favorited': favorited,
+                'count': count
             })
 
         except Material.DoesNotExist:
@@ -202,26 +466,18 @@ class MaterialViewSet(viewsets.ModelViewSet):
             if not material.main_file:
                 raise ValidationError("素材文件不存在")
 
-            # 记录下载历史
+            # 记录下载历史（素材下载数和作者被下载次数由 signals 原子更新）
             DownloadHistory.objects.create(
                 user=request.user,
                 material=material,
                 ip_address=self.get_client_ip(request)
             )
 
-            # 更新统计
-            material.download_count += 1
-            material.save()
-
-            # 更新用户统计
-            request.user.downloads_count += 1
-            request.user.save()
-
             logger.info(f"User {request.user.id} downloaded material {material.id}")
 
             return Response({
                 'download_url': material.main_file.url,
-                'download_count': material.download_count
+                'download_count': read_counter(Material, material.pk, 'download_count')
             })
 
         except Material.DoesNotExist:
@@ -235,10 +491,9 @@ class MaterialViewSet(viewsets.ModelViewSet):
         """点赞素材"""
         try:
             material = self.get_object()
-            material.like_count += 1
-            material.save()
+            bump_counter(Material, material.pk, 'like_count', 1)
 
-            return Response({'like_count': material.like_count})
+            return Response({'like_count': read_counter(Material, material.pk, 'like_count')})
 
         except Material.DoesNotExist:
             raise NotFoundError("素材不存在")
@@ -246,6 +501,46 @@ class MaterialViewSet(viewsets.ModelViewSet):
             logger.error(f"Like operation failed: {str(e)}")
             raise ValidationError("点赞失败")
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def moderate(self, request: Request) -> Response:
+        """
+        批量审核素材
+
+        POST /api/materials/moderate/ {"action": "approve", "ids": [1, 2, 3]}
+        action 为 approve / reject / feature / unfeature，所选素材以单条 UPDATE 更新
+
+        Args:
+            request: HTTP请求
+
+        Returns:
+            Response: 动作和实际更新的数量
+        """
+        serializer = MaterialModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        material_ids = moderation.moderate(data['ids'], data['action'])
+        logger.info(f"User {request.user.id} moderated {len(material_ids)} materials: {data['action']}")
+        return Response({'action': data['action'], 'updated': len(material_ids)})
+
+    @staticmethod
+    def get_limit(request: Request, default: int, maximum: int) -> int:
+        """
+        解析 limit 查询参数
+
+        Args:
+            request: HTTP请求
+            default: 默认值
+            maximum: 最大值
+
+        Returns:
+            int: 限定在 1 到 maximum 之间的数量
+        """
+        try:
+            limit = int(request.query_params.get('limit', default))
+        except ValueError:
+            raise ValidationError("limit 必须是整数")
+        return min(max(limit, 1), maximum)
+
     @staticmethod
     def get_client_ip(request: Request) -> Optional[str]:
         """
@@ -272,7 +567,41 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """获取当前用户的收藏"""
-        return Favorite.objects.filter(user=self.request.user).select_related('material')
+        queryset = Favorite.objects.filter(user=self.request.user).select_related('material')
+        selection = self.get_field_selection()
+        if selection is not None and self.action in ('list', 'retrieve'):
+            queryset = selection.optimize(
+                queryset, MaterialListSerializer, relation='material', own_fields=('id', 'created_at', 'material')
+            )
+        return queryset
+
+    def get_field_selection(self) -> Optional[FieldSelection]:
+        """解析 fields / exclude / expand 参数，作用于收藏中嵌套的素材"""
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = None
+            if self.request is not None and self.request.method == 'GET':
+                self._field_selection = FieldSelection.from_request(
+                    self.request, MaterialListSerializer.Meta.fields
+                )
+        return self._field_selection
+
+    def get_serializer_context(self) -> dict:
+        """序列化上下文，附带字段选择"""
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """获取收藏列表，启用 FAST_LIST_SERIALIZATION 时使用快速序列化"""
+        if not fast_serializers.is_enabled():
+            return super().list(request, *args, **kwargs)
+
+        serializer = FastFavoriteListSerializer(self.get_serializer_context())
+        queryset = serializer.prepare(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.serialize(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
 
     def perform_create(self, serializer):
         """创建收藏记录"""
@@ -280,5 +609,94 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         if not material_id:
             raise ValidationError("需要提供素材ID")
 
-        material = get_object_or_404(Material, id=material_id)
-        serializer.save(user=self.request.user, material=material)
\ No newline at end of file
+        try:
+            favorite = add_favorite(self.request.user.pk, material_id)
+        except (Material.DoesNotExist, ValueError):
+            raise NotFoundError("素材不存在")
+        if favorite is None:
+            raise ValidationError("已收藏该素材")
+        serializer.instance = favorite
+
+    def perform_destroy(self, instance):
+        """删除收藏记录"""
+        remove_favorite(instance.user_id, instance.material_id)
+
+
+class ModerationQueueViewSet(viewsets.GenericViewSet):
+    """
+    审核队列视图集
+    审核员按批领取待审核素材，租约期内其他审核员不会领取到相同素材
+
+    GET  /api/moderation/          当前持有的租约
+    POST /api/moderation/claim/    领取一批 {"size": 10}
+    POST /api/moderation/renew/    续期 {"ids": [...]}
+    POST /api/moderation/release/  释放，素材回到队列 {"ids": [...]}（不传 ids 释放全部）
+    POST /api/moderation/decide/   审核并结束租约 {"action": "approve", "ids": [...]}
+    """
+    serializer_class = ModerationLeaseSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            moderation.active_leases(self.request.user)
+            .select_related('material__author', 'material__category')
+            .prefetch_related('material__tags')
+            .order_by('material__created_at', 'material_id')
+        )
+
+    def list(self, request: Request) -> Response:
+        """当前持有的租约"""
+        return Response(self.get_serializer(self.get_queryset(), many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def claim(self, request: Request) -> Response:
+        """
+        领取一批待审核素材
+
+        Args:
+            request: HTTP请求，size 为领取数量
+
+        Returns:
+            Response: 领取到的租约（队列为空时为空列表）
+        """
+        size = request.data.get('size')
+        try:
+            size = int(size) if size not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValidationError("size 必须是整数")
+        leases = moderation.claim(request.user, size)
+        queryset = self.get_queryset().filter(material_id__in=[lease.material_id for lease in leases])
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def renew(self, request: Request) -> Response:
+        """续期持有的租约"""
+        serializer = MaterialIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'renewed': moderation.renew(request.user, serializer.validated_data['ids'])})
+
+    @action(detail=False, methods=['post'])
+    def release(self, request: Request) -> Response:
+        """释放租约"""
+        material_ids = None
+        if 'ids' in request.data:
+            serializer = MaterialIdsSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            material_ids = serializer.validated_data['ids']
+        return Response({'released': moderation.release(request.user, material_ids)})
+
+    @action(detail=False, methods=['post'])
+    def decide(self, request: Request) -> Response:
+        """
+        审核持有租约的素材
+
+        Returns:
+            Response: updated 为已审核的素材ID，skipped 为租约已失效的素材ID
+        """
+        serializer = MaterialModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = moderation.decide(request.user, data['ids'], data['action'])
+        logger.info(f"User {request.user.id} decided {len(result['updated'])} materials: {data['action']}")
+        return Response(result)
@@ -0,0 +1,104 @@
+"""
+用户认证模块
+JWT 认证时从共享缓存读取用户，避免每个已认证请求都查询一次用户表；
+用户保存或删除（含修改密码、停用账号）时由 signals 清除缓存
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from backend.caches import require_shared_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TTL': 60,                  # 用户缓存时间（秒），也是通过 update() 等绕过信号的修改最长的生效延迟
+    'CACHE_ALIAS': 'default',   # 必须是共享缓存，进程内缓存时不缓存用户
+    'KEY_PREFIX': 'auth:user:',
+}
+
+
+def get_config() -> dict:
+    """读取 settings.JWT_USER_CACHE 并补全默认值"""
+    return {**DEFAULTS, **getattr(settings, 'JWT_USER_CACHE', {})}
+
+
+def user_cache_key(user_id) -> str:
+    return f"{get_config()['KEY_PREFIX']}{user_id}"
+
+
+def cached_field_names() -> list:
+    """缓存的用户字段（不含密码哈希）"""
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.attname != 'password']
+
+
+def invalidate_user(user_id) -> None:
+    """清除用户缓存"""
+    config = get_config()
+    try:
+        caches[config['CACHE_ALIAS']].delete(user_cache_key(user_id))
+    except Exception as e:
+        logger.error(f"Failed to invalidate cached user {user_id}: {str(e)}")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    带用户缓存的 JWT 认证
+
+    令牌校验与 JWTAuthentication 相同；用户字段缓存 TTL 秒，
+    is_active 和密码变更（CHECK_REVOKE_TOKEN）检查仍对缓存的用户执行。
+
+    缓存中只保存除密码外的字段和密码哈希的摘要（供 CHECK_REVOKE_TOKEN 比对），
+    还原的用户对象中密码为延迟加载字段，访问时才查询数据库。
+    信号只能清除共享缓存中的数据，CACHE_ALIAS 为进程内缓存时不缓存用户，
+    否则停用账号、撤销权限在其他进程中要等到 TTL 到期才生效。
+    """
+
+    def get_user(self, validated_token: Token):
+        config = get_config()
+        if not config['TTL'] or not require_shared_cache(config['CACHE_ALIAS'], 'JWT user cache'):
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        cache = caches[config['CACHE_ALIAS']]
+        cached = self._cached(cache, user_id)
+        if cached is None:
+            user = super().get_user(validated_token)
+            cache.set(user_cache_key(user_id), {
+                'fields': {name: getattr(user, name) for name in cached_field_names()},
+                'password_md5': get_md5_hash_password(user.password),
+            }, config['TTL'])
+            return user
+
+        fields = cached['fields']
+        user = get_user_model().from_db('default', list(fields), list(fields.values()))
+        return self.check_user(user, validated_token, cached['password_md5'])
+
+    @staticmethod
+    def _cached(cache, user_id) -> Optional[dict]:
+        if user_id is None:
+            return None
+        try:
+            return cache.get(user_cache_key(user_id))
+        except Exception as e:
+            logger.error(f"Failed to read cached user {user_id}: {str(e)}")
+            return None
+
+    def check_user(self, user, validated_token: Token, password_md5: str):
+        """对缓存的用户重复 JWTAuthentication.get_user 中的状态检查"""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance, **kwargs):
+    """用户资料、密码或状态变更后清除认证缓存"""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    """删除用户后清除认证缓存"""
+    invalidate_user(instance.pk)
@@ -1,3 +1,86 @@
-from django.test import TestCase
+import atexit
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication, user_cache_key
+from .models import User
+
+# 跨进程共享的缓存（本机文件缓存）
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='users-cache-')
+atexit.register(shutil.rmtree, SHARED_CACHE_DIR, ignore_errors=True)
+SHARED_CACHES = {
+    **settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': SHARED_CACHE_DIR},
+}
+
+
+@override_settings(CACHES=SHARED_CACHES, JWT_USER_CACHE={'TTL': 60, 'CACHE_ALIAS': 'shared'})
+class CachedJWTAuthenticationTests(TestCase):
+    """JWT 认证的用户缓存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def _user_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/favorites/')
+        self.assertEqual(response.status_code, 200)
+        return sum(User._meta.db_table in query['sql'] for query in queries.captured_queries)
+
+    def test_user_loaded_once(self):
+        self.assertEqual(self._user_queries(), 1)
+        self.assertEqual(self._user_queries(), 0)
+
+    def test_password_hash_not_cached(self):
+        self._user_queries()
+        cached = caches['shared'].get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', cached['fields'])
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_save_invalidates_cache(self):
+        self._user_queries()
+        self.user.bio = '新简介'
+        self.user.save()
+        self.assertEqual(self._user_queries(), 1)
+
+    def test_deactivated_user_rejected(self):
+        self._user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/favorites/').status_code, 401)
+
+    def test_cached_user_loads_password_on_access(self):
+        authentication = CachedJWTAuthentication()
+        token = authentication.get_validated_token(str(AccessToken.for_user(self.user)))
+        authentication.get_user(token)
+        with self.assertNumQueries(0):
+            user = authentication.get_user(token)
+        self.assertEqual(user.username, 'alice')
+        # 密码为延迟加载字段
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('password123'))
+
+    def test_profile_reads_current_counters(self):
+        self._user_queries()
+        User.objects.filter(pk=self.user.pk).update(materials_count=5)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.json()['materials_count'], 5)
+
+    def test_process_local_cache_not_used(self):
+        with override_settings(JWT_USER_CACHE={'TTL': 60, 'CACHE_ALIAS': 'default'}):
+            self.assertEqual(self._user_queries(), 1)
+            self.assertEqual(self._user_queries(), 1)
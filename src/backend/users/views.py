@@ -66,8 +66,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     parser_classes = [MultiPartParser, JSONParser]
 
     def get_object(self):
-        """获取当前登录用户"""
-        return self.request.user
+        """获取当前登录用户（认证得到的用户可能来自缓存，这里读取最新数据）"""
+        return User.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         """更新用户资料"""
@@ -174,7 +174,7 @@ def change_password_view(request):
 
         with transaction.atomic():
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=['password'])
 
         # 使旧token失效（客户端需要重新登录）
         logout(request)